@@ -0,0 +1,95 @@
+"""Deterministic synthetic markdown corpora for benchmarks"""
+import random
+
+SIZES = {
+    "1KB": 1024,
+    "10KB": 10 * 1024,
+    "100KB": 100 * 1024,
+    "1MB": 1024 * 1024,
+    "10MB": 10 * 1024 * 1024,
+    "50MB": 50 * 1024 * 1024,
+}
+
+WORDS = (
+    "markdown editor preview render latency document section paragraph table image "
+    "link heading list quote code block inline emphasis strong theme night light "
+    "workspace search index file save load convert pandoc python widget engine cache "
+    "the a of and to in is for on with as by at from it that this be are was"
+).split()
+
+
+def _sentence(rng, min_words=6, max_words=18):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    if rng.random() < 0.2:
+        i = rng.randrange(len(words))
+        words[i] = f"**{words[i]}**"
+    if rng.random() < 0.2:
+        i = rng.randrange(len(words))
+        words[i] = f"`{words[i]}`"
+    if rng.random() < 0.1:
+        i = rng.randrange(len(words))
+        words[i] = f"[{words[i]}](https://example.com/{words[i]})"
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng):
+    return " ".join(_sentence(rng) for _ in range(rng.randint(3, 7)))
+
+
+def _code_block(rng):
+    lines = [f"def {rng.choice(WORDS)}_{i}(value):" if i % 4 == 0 else
+             f"    return value * {rng.randint(1, 99)}  # {rng.choice(WORDS)}"
+             for i in range(rng.randint(4, 16))]
+    return "```python\n" + "\n".join(lines) + "\n```"
+
+
+def _table(rng):
+    columns = rng.randint(3, 6)
+    header = "| " + " | ".join(rng.choice(WORDS).title() for _ in range(columns)) + " |"
+    rule = "|" + "---|" * columns
+    rows = ["| " + " | ".join(str(rng.randint(0, 9999)) if c % 2 else rng.choice(WORDS)
+                              for c in range(columns)) + " |"
+            for _ in range(rng.randint(4, 20))]
+    return "\n".join([header, rule] + rows)
+
+
+def _math(rng):
+    a, b = rng.randint(1, 9), rng.randint(1, 9)
+    inline = f"Inline math $x^{a} + y_{b} = \\frac{{{a}}}{{{b}}}$ appears in text."
+    display = f"$$\n\\int_0^{{{a}}} x^{{{b}}}\\,dx = \\frac{{{a}^{{{b + 1}}}}}{{{b + 1}}}\n$$"
+    return inline + "\n\n" + display
+
+
+def _heading(rng, index):
+    return "#" * rng.randint(1, 3) + f" {rng.choice(WORDS).title()} {index}"
+
+
+BLOCK_MIX = {
+    "prose": [(_paragraph, 8), (_code_block, 0), (_table, 0), (_math, 0)],
+    "code": [(_paragraph, 2), (_code_block, 6), (_table, 0), (_math, 0)],
+    "table": [(_paragraph, 2), (_code_block, 0), (_table, 6), (_math, 0)],
+    "math": [(_paragraph, 3), (_code_block, 0), (_table, 0), (_math, 5)],
+}
+KINDS = tuple(BLOCK_MIX)
+
+
+def generate(kind, size, seed=0):
+    """Generate roughly size characters of markdown of the given kind"""
+    rng = random.Random(f"{kind}-{seed}")
+    makers = [maker for maker, weight in BLOCK_MIX[kind] for _ in range(weight)]
+
+    # A pool of varied blocks keeps generation fast even for 50 MB documents
+    pool = [rng.choice(makers)(rng) for _ in range(256)]
+    parts = []
+    length = 0
+    index = 0
+    while length < size:
+        if index % 10 == 0:
+            heading = _heading(rng, index)
+            parts.append(heading)
+            length += len(heading) + 2
+        block = pool[rng.randrange(len(pool))]
+        parts.append(block)
+        length += len(block) + 2
+        index += 1
+    return "\n\n".join(parts)
@@ -0,0 +1,134 @@
+"""Compare memory use and refresh time of the web engine and lite previews.
+
+Each mode runs in its own process so resident memory is measured cleanly,
+including the web engine's helper processes:
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.preview_modes --sizes 10KB,100KB,1MB
+
+RSS is reported on Linux and macOS. Without a working QtWebEngine only the
+lite mode is measured, and the summary says the comparison is missing.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import statistics
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import SIZES, generate
+from utils import get_process_rss
+
+MODES = ("web", "lite")
+DEFAULT_SIZES = "10KB,100KB,1MB"
+
+
+def megabytes(value):
+    return None if value is None else round(value / (1024 * 1024), 1)
+
+
+def run_mode(mode, sizes, repeat):
+    """Measure one preview mode in this process; returns a result dict"""
+    from benchmarks.typing_latency import isolate_settings, wait
+
+    with tempfile.TemporaryDirectory() as settings_dir:
+        isolate_settings(settings_dir)
+        from PyQt5.QtCore import QSettings
+        QSettings("MyApp", "Markdown Editor").setValue("litePreview", mode == "lite")
+        # The web engine must be imported before the application object exists
+        from main import MainWindow
+        from PyQt5.QtWidgets import QApplication
+        app = QApplication.instance() or QApplication(sys.argv)
+        rss_start = get_process_rss()
+        window = MainWindow()
+        window.show()
+        wait(app, 1.0)
+        if window.preview_handler.lite != (mode == "lite"):
+            window.close()
+            return {"error": "web engine unavailable"}
+
+        refresh = {}
+        peak = rss_idle = get_process_rss()
+        traces = []
+        window.render_tracer.trace_finished.connect(traces.append)
+        for size_name in sizes:
+            tab = window.add_tab()
+            tab.editor.setPlainText(generate("prose", SIZES[size_name]))
+            window.preview_timer.stop()
+            timings = []
+            for _ in range(repeat):
+                del traces[:]
+                window.update_preview()
+                deadline = time.perf_counter() + 60
+                while not traces and time.perf_counter() < deadline:
+                    wait(app, 0.005)
+                if traces:
+                    timings.append(traces[0].total_ms)
+                current = get_process_rss()
+                if current is not None:
+                    peak = max(peak, current)
+            refresh[size_name] = round(statistics.median(timings), 2) if timings else None
+            tab.is_modified = False
+        window.close()
+        return {
+            "rss_start_mb": megabytes(rss_start),
+            "rss_idle_mb": megabytes(rss_idle),
+            "rss_peak_mb": megabytes(peak),
+            "refresh_median_ms": refresh,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the web engine and lite preview modes")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"document sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=5, help="refreshes per size")
+    parser.add_argument("--mode", choices=MODES, help="measure a single mode in this process")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",")]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, sizes, args.repeat)))
+        return 0
+
+    results = {}
+    for mode in MODES:
+        command = [sys.executable, "-m", "benchmarks.preview_modes", "--mode", mode,
+                   "--sizes", args.sizes, "--repeat", str(args.repeat)]
+        process = subprocess.run(command, capture_output=True, text=True,
+                                 cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        lines = process.stdout.strip().splitlines()
+        try:
+            results[mode] = json.loads(lines[-1])
+        except (IndexError, ValueError):
+            results[mode] = {"error": process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "no output"}
+
+    for mode, result in results.items():
+        if "error" in result:
+            print(f"{mode:<5} not measured: {result['error']}")
+            continue
+        print(f"{mode:<5} RSS start {result['rss_start_mb']} MB, idle {result['rss_idle_mb']} MB, "
+              f"peak {result['rss_peak_mb']} MB")
+        for size_name, ms in result["refresh_median_ms"].items():
+            print(f"{'':<5} refresh {size_name:<6} " + ("timed out" if ms is None else f"{ms:>10.2f} ms"))
+
+    missing = [mode for mode, result in results.items() if "error" in result]
+    if missing:
+        print(f"Comparison incomplete: {', '.join(missing)} mode not measured", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
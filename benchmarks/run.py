@@ -0,0 +1,221 @@
+"""Headless benchmark suite for the converter, file I/O, image saving and theme switching.
+
+Run from the repository root:
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.run --sizes 1KB,100KB,1MB
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.run --baseline benchmarks/results/baseline.json
+
+Results are written as JSON; with --baseline, cases whose median got slower
+than the threshold are reported and the exit code is 1.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tempfile
+from types import SimpleNamespace
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QSettings, PYQT_VERSION_STR, QT_VERSION_STR
+from PyQt5.QtGui import QImage, QColor
+from PyQt5.QtWidgets import QApplication, QPlainTextEdit
+
+from benchmarks.corpus import SIZES, KINDS, generate
+from converter.markdown_converter import MarkdownConverter
+from handlers.file_handler import FileHandler
+from handlers.image_handler import ImageHandler
+
+DEFAULT_SIZES = "1KB,10KB,100KB,1MB"
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "latest.json")
+
+
+def measure(func, repeat=5, time_budget=10.0):
+    """Time func a few times (fewer if it is slow); returns stats in milliseconds"""
+    timings = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - begin) * 1000)
+        if time.perf_counter() - started > time_budget:
+            break
+    return {
+        "runs": len(timings),
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "mean_ms": round(statistics.mean(timings), 3),
+    }
+
+
+def bench_converter(ctx):
+    """MarkdownConverter body conversion per backend, corpus kind and size"""
+    converter = MarkdownConverter(SimpleNamespace(night_mode=False))
+    for backend, convert in converter.available_backends().items():
+        for kind in KINDS:
+            for size_name in ctx.sizes:
+                text = ctx.corpus(kind, size_name)
+                yield f"converter/{backend}/{kind}/{size_name}", lambda: convert(text), len(text)
+
+
+def bench_file_io(ctx):
+    """FileHandler.load_file into an editor widget and FileHandler.save_file"""
+    handler = FileHandler()
+    editor = QPlainTextEdit()
+    for size_name in ctx.sizes:
+        text = ctx.corpus("prose", size_name)
+        path = os.path.join(ctx.temp_dir, f"io_{size_name}.md")
+        handler.save_file(path, text)
+        yield f"file/load_file/{size_name}", lambda: handler.load_file(path, editor), len(text)
+        yield f"file/save_file/{size_name}", lambda: handler.save_file(path, text), len(text)
+
+
+def _test_image(width, height):
+    """Gradient with noise so PNG encoding does real work"""
+    image = QImage(width, height, QImage.Format_ARGB32)
+    for y in range(height):
+        for x in range(0, width, 4):
+            image.setPixelColor(x, y, QColor((x * 7 + y) % 256, (y * 3) % 256, (x ^ y) % 256))
+    return image
+
+
+def bench_image(ctx):
+    """ImageHandler.save_clipboard_image PNG encoding and duplicate handling"""
+    settings = QSettings(os.path.join(ctx.temp_dir, "bench.ini"), QSettings.IniFormat)
+    settings.setValue("lastImageFolder", os.path.join(ctx.temp_dir, "images"))
+    handler = ImageHandler(settings)
+    os.makedirs(handler.save_folder, exist_ok=True)
+    # Skip the interactive name dialog
+    handler.prompt_for_name = lambda base_name: "bench"
+    for width, height in ((256, 256), (1024, 768), (2048, 1536)):
+        image = _test_image(width, height)
+        yield (f"image/save_clipboard_image/{width}x{height}",
+               lambda: handler.save_clipboard_image(image), width * height * 4)
+
+
+def bench_theme(ctx):
+    """ThemeManager.apply_theme alone, and a full night mode toggle with a rendered preview"""
+    from benchmarks.typing_latency import isolate_settings, wait
+    isolate_settings(ctx.temp_dir)
+    from main import MainWindow
+    window = MainWindow()
+    window.show()
+    app = QApplication.instance()
+
+    def toggle():
+        window.toggle_night_mode()
+        app.processEvents()
+
+    yield "theme/apply_theme", lambda: (window.theme_manager.apply_theme(), app.processEvents()), 0
+    for size_name in ctx.sizes:
+        text = ctx.corpus("prose", size_name)
+        tab = window.add_tab()
+        tab.editor.setPlainText(text)
+        window.preview_timer.stop()
+        window.update_preview()
+        render_id = window.render_tracer.next_id
+        while window.render_tracer.last_trace is None or window.render_tracer.last_trace.render_id < render_id:
+            wait(app, 0.01)
+        yield f"theme/toggle_night_mode/{size_name}", toggle, len(text)
+        tab.is_modified = False
+
+
+SUITES = {
+    "converter": bench_converter,
+    "file_io": bench_file_io,
+    "image": bench_image,
+    "theme": bench_theme,
+}
+
+
+class Context:
+    """Shared state for suites: selected sizes, cached corpora and a scratch folder"""
+
+    def __init__(self, sizes, temp_dir):
+        self.sizes = sizes
+        self.temp_dir = temp_dir
+        self._corpora = {}
+
+    def corpus(self, kind, size_name):
+        key = (kind, size_name)
+        if key not in self._corpora:
+            self._corpora[key] = generate(kind, SIZES[size_name])
+        return self._corpora[key]
+
+
+def compare(results, baseline, threshold):
+    """Return [(case, baseline_ms, current_ms, ratio)] for cases that slowed down"""
+    regressions = []
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if not previous:
+            continue
+        before, after = previous["median_ms"], current["median_ms"]
+        # Ignore sub-millisecond noise
+        if after > before * (1 + threshold) and after - before > 1.0:
+            regressions.append((case, before, after, after / before))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the headless benchmark suite")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES),
+                        help="suite to run (repeatable; default: all)")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma separated corpus sizes from {','.join(SIZES)} or 'all' (default: {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case (fewer for slow cases)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative slowdown that counts as a regression (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    sizes = list(SIZES) if args.sizes == "all" else [s.strip() for s in args.sizes.split(",")]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        ctx = Context(sizes, temp_dir)
+        for suite in args.suite or list(SUITES):
+            for case, func, size in SUITES[suite](ctx):
+                stats = measure(func, args.repeat)
+                stats["bytes"] = size
+                results[case] = stats
+                print(f"{case:<50} {stats['median_ms']:>10.2f} ms  (min {stats['min_ms']:.2f}, {stats['runs']} runs)")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qt": QT_VERSION_STR,
+            "pyqt": PYQT_VERSION_STR,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for case, before, after, ratio in regressions:
+            print(f"REGRESSION {case}: {before:.2f} ms -> {after:.2f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""End-to-end typing latency harness for MainWindow.
+
+Replays typing sessions against the real editor on documents of several
+sizes and measures, per keystroke, the time until the editor viewport
+repaints and until the preview shows a render that includes it.
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.typing_latency --sizes 1KB,100KB
+    python -m benchmarks.typing_latency --session my_session.json --preview-budget-ms 800
+    python -m benchmarks.typing_latency --record my_session.json   # type in a real window
+
+A session file is JSON: {"name": ..., "events": [{"delay_ms": 90, "text": "a"},
+{"delay_ms": 120, "key": "Return"}, ...]}. Exits with 1 if a p99 exceeds its budget.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from bisect import bisect_left
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import Qt, QObject, QEvent, QSettings
+from PyQt5.QtTest import QTest
+from PyQt5.QtWidgets import QApplication
+
+from benchmarks.corpus import SIZES, generate
+
+DEFAULT_SIZES = "1KB,100KB,1MB"
+SPECIAL_KEYS = {"Return": Qt.Key_Return, "Backspace": Qt.Key_Backspace, "Tab": Qt.Key_Tab}
+
+
+def synthetic_session(name="prose", keystrokes=200, seed=0):
+    """A typing session with human-like inter-key delays"""
+    rng = random.Random(seed)
+    text = "The quick brown fox jumps over the lazy dog while the preview keeps up. "
+    events = []
+    for i in range(keystrokes):
+        delay = max(30, int(rng.gauss(110, 40)))
+        if i % 60 == 59:
+            events.append({"delay_ms": delay, "key": "Return"})
+        elif rng.random() < 0.04:
+            events.append({"delay_ms": delay, "key": "Backspace"})
+        else:
+            events.append({"delay_ms": delay, "text": text[i % len(text)]})
+    return {"name": name, "events": events}
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "p50_ms": percentile(values, 0.50),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+        "max_ms": max(values) if values else None,
+    }
+
+
+class PaintProbe(QObject):
+    """Records the time of every paint of the editor viewport"""
+
+    def __init__(self):
+        super().__init__()
+        self.paints = []
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            self.paints.append(time.perf_counter())
+        return False
+
+
+class SessionRecorder(QObject):
+    """Event filter that records keystrokes typed into the editor as a session"""
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+        self.last = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.KeyPress:
+            now = time.perf_counter()
+            delay = int((now - self.last) * 1000) if self.last else 0
+            self.last = now
+            names = {value: name for name, value in SPECIAL_KEYS.items()}
+            if event.key() in names:
+                self.events.append({"delay_ms": delay, "key": names[event.key()]})
+            elif event.text():
+                self.events.append({"delay_ms": delay, "text": event.text()})
+        return False
+
+
+def wait(app, seconds):
+    """Process events for a while"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def replay(app, window, session, document):
+    """Type a session into a fresh tab holding document; returns per-key latencies"""
+    tab = window.add_tab()
+    tab.editor.setPlainText(document)
+    cursor = tab.editor.textCursor()
+    cursor.movePosition(cursor.End)
+    tab.editor.setTextCursor(cursor)
+    tab.editor.setFocus()
+    wait(app, 1.0)
+
+    probe = PaintProbe()
+    tab.editor.viewport().installEventFilter(probe)
+    # (extract start, shown) per finished render
+    renders = []
+
+    def on_trace(trace):
+        extract = [start for name, start, _, _ in trace.stages if name == "extract"]
+        if extract:
+            renders.append((extract[0], time.perf_counter()))
+    window.render_tracer.trace_finished.connect(on_trace)
+
+    keystrokes = []
+    for event in session["events"]:
+        wait(app, event.get("delay_ms", 100) / 1000)
+        keystrokes.append(time.perf_counter())
+        if "key" in event:
+            QTest.keyClick(tab.editor, SPECIAL_KEYS[event["key"]])
+        else:
+            QTest.keyClicks(tab.editor, event["text"])
+
+    # Let the last debounced render land
+    deadline = time.perf_counter() + 10
+    while time.perf_counter() < deadline and not any(start >= keystrokes[-1] for start, _ in renders):
+        wait(app, 0.05)
+    wait(app, 0.2)
+
+    window.render_tracer.trace_finished.disconnect(on_trace)
+    tab.editor.viewport().removeEventFilter(probe)
+    tab.is_modified = False
+
+    paint_latency = []
+    preview_latency = []
+    render_starts = [start for start, _ in renders]
+    for pressed in keystrokes:
+        i = bisect_left(probe.paints, pressed)
+        if i < len(probe.paints):
+            paint_latency.append((probe.paints[i] - pressed) * 1000)
+        j = bisect_left(render_starts, pressed)
+        if j < len(renders):
+            preview_latency.append((renders[j][1] - pressed) * 1000)
+    return paint_latency, preview_latency
+
+
+def isolate_settings(folder):
+    """Keep the harness from touching the user's real settings, session snapshot, caches and indexes"""
+    QSettings.setDefaultFormat(QSettings.IniFormat)
+    QSettings.setPath(QSettings.IniFormat, QSettings.UserScope, folder)
+    # get_app_data_dir() resolves from these on every call
+    data_dir = os.path.join(folder, "data")
+    for name in ("XDG_DATA_HOME", "APPDATA", "HOME"):
+        os.environ[name] = data_dir
+
+
+def record(path):
+    """Open the editor and save whatever is typed into it as a session"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    from main import MainWindow
+    window = MainWindow()
+    recorder = SessionRecorder()
+    window.tabs.installEventFilter(recorder)
+    for tab in window.documents.values():
+        tab.editor.installEventFilter(recorder)
+    window.show()
+    app.exec_()
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"name": os.path.splitext(os.path.basename(path))[0], "events": recorder.events}, file, indent=1)
+    print(f"Recorded {len(recorder.events)} keystrokes to {path}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure keystroke-to-paint and keystroke-to-preview latency")
+    parser.add_argument("--session", action="append", help="recorded session JSON (repeatable; default: synthetic)")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"document sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--keystrokes", type=int, default=200, help="length of the synthetic session")
+    parser.add_argument("--paint-budget-ms", type=float, default=50.0, help="p99 keystroke-to-paint budget")
+    parser.add_argument("--preview-budget-ms", type=float, default=1500.0, help="p99 keystroke-to-preview budget")
+    parser.add_argument("--output", help="write the latency summary as JSON")
+    parser.add_argument("--record", metavar="PATH", help="record a session interactively instead of replaying")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        return record(args.record)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sizes = [s.strip() for s in args.sizes.split(",")]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+
+    sessions = []
+    for path in args.session or []:
+        with open(path, "r", encoding="utf-8") as file:
+            sessions.append(json.load(file))
+    if not sessions:
+        sessions.append(synthetic_session(keystrokes=args.keystrokes))
+
+    with tempfile.TemporaryDirectory() as settings_dir:
+        isolate_settings(settings_dir)
+        app = QApplication.instance() or QApplication(sys.argv)
+        from main import MainWindow
+        window = MainWindow()
+        window.show()
+        wait(app, 0.5)
+
+        report = {}
+        failed = False
+        for session in sessions:
+            for size_name in sizes:
+                paint, preview = replay(app, window, session, generate("prose", SIZES[size_name]))
+                case = f"{session.get('name', 'session')}/{size_name}"
+                report[case] = {"paint": summarize(paint), "preview": summarize(preview)}
+                for kind, budget in (("paint", args.paint_budget_ms), ("preview", args.preview_budget_ms)):
+                    stats = report[case][kind]
+                    over = stats["p99_ms"] is None or stats["p99_ms"] > budget
+                    failed |= over
+                    p99 = "n/a" if stats["p99_ms"] is None else f"{stats['p99_ms']:.1f}"
+                    p50 = "n/a" if stats["p50_ms"] is None else f"{stats['p50_ms']:.1f}"
+                    print(f"{case:<24} {kind:<8} p50 {p50:>8} ms  p99 {p99:>8} ms  "
+                          f"budget {budget:.0f} ms{'  OVER BUDGET' if over else ''}")
+        window.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import os
+import re
+import html
+import time
+import shutil
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from converter.render_cache import RenderCache
+from utils import get_app_data_dir
+
+# Fence language -> command reading the diagram source on stdin and writing SVG to stdout
+DIAGRAM_TOOLS = {
+    'dot': ['dot', '-Tsvg'],
+    'graphviz': ['dot', '-Tsvg'],
+    'mermaid': ['mmdc', '--input', '-', '--output', '-', '--outputFormat', 'svg', '--quiet'],
+    'plantuml': ['plantuml', '-tsvg', '-pipe'],
+    'puml': ['plantuml', '-tsvg', '-pipe'],
+}
+DIAGRAM_TIMEOUT = 30
+# Recently used SVGs kept in memory so re-renders skip the disk cache
+MEMORY_ENTRIES = 256
+# Failed diagrams are retried after this long, e.g. once a missing tool has been installed
+ERROR_RETRY_SECONDS = 30
+
+DIAGRAM_FENCE_RE = re.compile(
+    r'^( {0,3})(`{3,}|~{3,})[ \t]*(' + '|'.join(DIAGRAM_TOOLS) + r')[ \t]*\n(.*?)^ {0,3}\2[`~]*[ \t]*$',
+    re.M | re.S
+)
+# Pandoc turns the empty div into a Div and may put a line break inside
+PLACEHOLDER_RE = re.compile(r'<div class="diagram" data-diagram="(\d+)">\s*</div>')
+PENDING_RE = re.compile(r'<div class="diagram diagram-pending" data-pending="([0-9a-f]{64})">[^<]*</div>')
+
+
+class DiagramError(Exception):
+    """Raised when a diagram tool is missing or fails"""
+
+
+def run_tool(command, source):
+    """Run a diagram tool on source and return its SVG output"""
+    if shutil.which(command[0]) is None:
+        raise DiagramError(f"{command[0]} is not installed")
+    try:
+        result = subprocess.run(command, input=source.encode('utf-8'), capture_output=True, timeout=DIAGRAM_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise DiagramError(f"{command[0]} timed out after {DIAGRAM_TIMEOUT} s")
+    except OSError as e:
+        raise DiagramError(f"Could not run {command[0]}: {e}")
+    svg = result.stdout.decode('utf-8', 'replace')
+    start = svg.find('<svg')
+    if result.returncode != 0 or start < 0:
+        errors = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise DiagramError(errors[-1] if errors else f"{command[0]} exited with code {result.returncode}")
+    # Drop the XML prolog and doctype so the SVG can sit inline in HTML
+    return svg[start:]
+
+
+class DiagramRenderer(QObject):
+    """Renders diagram fences with local tools in the background, caching SVG by tool and source hash.
+
+    extract() swaps fences for placeholders before conversion and fill() puts
+    SVG back afterwards; diagrams not rendered yet are filled with a pending
+    block, swapped in by refresh() once diagram_ready fires.
+    """
+
+    diagram_ready = pyqtSignal()
+
+    def __init__(self, cache=None, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.cache = cache or RenderCache(get_app_data_dir("diagram_cache"), 64 * 1024 * 1024)
+        # Each worker drives one tool process at a time
+        self.executor = ThreadPoolExecutor(max_workers or min(4, os.cpu_count() or 1))
+        self.lock = threading.Lock()
+        self.svgs = OrderedDict()
+        self.errors = {}  # key -> (monotonic time of failure, message)
+        self.pending = {}  # key -> Future
+        # Sources of failed diagrams, shown with their error
+        self.sources = {}
+
+    @staticmethod
+    def extract(text):
+        """(text with diagram fences replaced by placeholders, [(tool, source)])"""
+        diagrams = []
+
+        def placeholder(match):
+            indent, _, tool, source = match.groups()
+            if indent:
+                # Fence content is indented like the fence, e.g. inside a list item
+                source = re.sub(f'^ {{0,{len(indent)}}}', '', source, flags=re.M)
+            diagrams.append((tool, source))
+            # Keeps a list the fence sits in going
+            return f'\n{indent}<div class="diagram" data-diagram="{len(diagrams) - 1}"></div>\n'
+
+        return DIAGRAM_FENCE_RE.sub(placeholder, text), diagrams
+
+    def fill(self, body, diagrams):
+        """Replace placeholders in converted HTML with SVG, errors or pending blocks"""
+        def diagram(match):
+            index = int(match.group(1))
+            if index >= len(diagrams):
+                return match.group(0)
+            return self.diagram_html(*diagrams[index])
+
+        return PLACEHOLDER_RE.sub(diagram, body)
+
+    def diagram_html(self, tool, source):
+        key = RenderCache.key(source, DIAGRAM_TOOLS[tool][0])
+        svg, error = self.lookup(key)
+        if svg is not None:
+            return f'<div class="diagram">{svg}</div>'
+        if error is not None:
+            return self.error_html(source, error)
+        self.submit(key, tool, source)
+        return f'<div class="diagram diagram-pending" data-pending="{key}">Rendering {tool} diagram…</div>'
+
+    @staticmethod
+    def error_html(source, error):
+        return (f'<pre class="diagram-error"><code>{html.escape(source)}</code></pre>\n'
+                f'<p class="diagram-error">{html.escape(error)}</p>')
+
+    def lookup(self, key):
+        """(svg, error) for key; both None while it is still to be rendered"""
+        with self.lock:
+            if key in self.svgs:
+                self.svgs.move_to_end(key)
+                return self.svgs[key], None
+            if key in self.errors:
+                failed_at, error = self.errors[key]
+                if time.monotonic() - failed_at < ERROR_RETRY_SECONDS:
+                    return None, error
+                del self.errors[key]
+        svg = self.cache.get(key)
+        if svg is not None:
+            self.remember(key, svg)
+        return svg, None
+
+    def remember(self, key, svg):
+        with self.lock:
+            self.svgs[key] = svg
+            if len(self.svgs) > MEMORY_ENTRIES:
+                self.svgs.popitem(last=False)
+
+    def submit(self, key, tool, source):
+        with self.lock:
+            if key in self.pending:
+                return
+            future = self.executor.submit(run_tool, DIAGRAM_TOOLS[tool], source)
+            self.pending[key] = future
+            self.sources[key] = source
+        future.add_done_callback(lambda future: self.on_done(key, future))
+
+    def on_done(self, key, future):
+        """Store a finished diagram; runs on the worker thread"""
+        try:
+            svg = future.result()
+        except CancelledError:
+            return
+        except DiagramError as e:
+            with self.lock:
+                self.errors[key] = (time.monotonic(), str(e))
+        else:
+            self.cache.put(key, svg)
+            self.remember(key, svg)
+            with self.lock:
+                self.sources.pop(key, None)
+        with self.lock:
+            self.pending.pop(key, None)
+        self.diagram_ready.emit()
+
+    @staticmethod
+    def has_pending(body):
+        return 'diagram-pending' in body
+
+    def refresh(self, body):
+        """Swap pending blocks whose diagrams have finished for their SVG or error"""
+        def finished(match):
+            key = match.group(1)
+            svg, error = self.lookup(key)
+            if svg is not None:
+                return f'<div class="diagram">{svg}</div>'
+            if error is not None:
+                return self.error_html(self.sources.get(key, ""), error)
+            return match.group(0)
+
+        return PENDING_RE.sub(finished, body)
+
+    def complete(self, body):
+        """Wait for every pending diagram in body and fill it in (for exports)"""
+        for key in PENDING_RE.findall(body):
+            with self.lock:
+                future = self.pending.get(key)
+            if future is None:
+                continue
+            # Done callbacks may not have run yet when result() returns
+            try:
+                self.remember(key, future.result())
+            except DiagramError as e:
+                with self.lock:
+                    self.errors[key] = (time.monotonic(), str(e))
+            except CancelledError:
+                pass
+        return self.refresh(body)
+
+    def shutdown(self):
+        """Drop queued diagrams; running tool processes finish on their own"""
+        with self.lock:
+            for future in self.pending.values():
+                future.cancel()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,215 @@
+import re
+from html.parser import HTMLParser
+
+try:
+    import pypandoc
+    PANDOC_AVAILABLE = True
+except ImportError:
+    PANDOC_AVAILABLE = False
+
+BLOCK_TAGS = {'p', 'div', 'section', 'article', 'header', 'footer', 'main', 'figure', 'dl', 'dd', 'dt'}
+SKIP_TAGS = {'script', 'style', 'head', 'title', 'noscript'}
+HEADINGS = {f'h{level}': level for level in range(1, 7)}
+SPACE_RE = re.compile(r'[ \t\r\n]+')
+ESCAPE_RE = re.compile(r'([\\`*_\[\]])')
+
+
+def html_to_markdown(html):
+    """Convert an HTML fragment (e.g. rich clipboard content) to Markdown, preferring pandoc"""
+    if PANDOC_AVAILABLE:
+        try:
+            return pypandoc.convert_text(html, 'gfm', format='html', extra_args=['--wrap=none']).strip() + '\n'
+        except (OSError, RuntimeError) as e:
+            print(f"Pandoc HTML conversion failed: {e}")
+    parser = MarkdownWriter()
+    parser.feed(html)
+    parser.close()
+    return parser.markdown()
+
+
+class MarkdownWriter(HTMLParser):
+    """Small HTML to Markdown converter for headings, emphasis, links, images, lists, code, quotes and tables"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []  # (text, number of the top-level list it belongs to or None)
+        self.line = []
+        self.lists = []  # Stack of [ordered, next number]
+        self.list_count = 0
+        self.quote_depth = 0
+        self.pre = 0
+        self.code = False
+        self.skip = 0
+        self.link = None
+        self.tables = []  # Stack of [rows, open cell's text or None], innermost last
+
+    def markdown(self):
+        self.flush()
+        parts = []
+        for i, (text, list_number) in enumerate(self.blocks):
+            if i:
+                # Items of one list stay together; everything else is its own paragraph
+                same_list = list_number is not None and list_number == self.blocks[i - 1][1]
+                parts.append('\n' if same_list else '\n\n')
+            parts.append(text)
+        return ''.join(parts) + '\n'
+
+    @property
+    def cell(self):
+        """Text of the innermost open table cell, if any"""
+        for _, cell in reversed(self.tables):
+            if cell is not None:
+                return cell
+        return None
+
+    def write(self, text):
+        cell = self.cell
+        if cell is not None:
+            cell.append(text)
+        else:
+            self.line.append(text)
+
+    def flush(self, prefix=''):
+        """End the current block"""
+        text = ''.join(self.line).strip('\n')
+        self.line = []
+        if not text.strip():
+            return
+        if not self.pre:
+            first, *rest = text.split('\n')
+            text = '\n'.join([first.rstrip()] + [part.strip() for part in rest])
+        quote = '> ' * self.quote_depth
+        if quote:
+            text = '\n'.join(quote + part for part in text.split('\n'))
+        self.blocks.append((prefix + text, self.list_count if self.lists else None))
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in SKIP_TAGS:
+            self.skip += 1
+        elif self.skip:
+            return
+        elif tag in HEADINGS:
+            self.flush()
+            self.write('#' * HEADINGS[tag] + ' ')
+        elif tag in BLOCK_TAGS:
+            if not self.lists:  # Paragraphs inside list items stay on the item's line
+                self.flush()
+        elif tag == 'br':
+            self.write('\\\n')
+        elif tag == 'hr':
+            self.flush()
+            self.blocks.append(('---', False))
+        elif tag in ('strong', 'b'):
+            self.write('**')
+        elif tag in ('em', 'i'):
+            self.write('*')
+        elif tag in ('del', 's', 'strike'):
+            self.write('~~')
+        elif tag == 'code' and not self.pre:
+            self.code = True
+            self.write('`')
+        elif tag == 'pre':
+            self.flush()
+            self.pre += 1
+            self.write('```\n')
+        elif tag == 'a':
+            self.link = attrs.get('href') or ''
+            self.write('[')
+        elif tag == 'img':
+            self.write(f"![{attrs.get('alt') or ''}]({attrs.get('src') or ''})")
+        elif tag == 'blockquote':
+            self.flush()
+            self.quote_depth += 1
+        elif tag in ('ul', 'ol'):
+            self.flush()
+            if not self.lists:
+                self.list_count += 1
+            self.lists.append([tag == 'ol', int(attrs.get('start') or 1)])
+        elif tag == 'li':
+            self.flush()
+            indent = '   ' * max(len(self.lists) - 1, 0)
+            if self.lists and self.lists[-1][0]:
+                marker = f"{self.lists[-1][1]}. "
+                self.lists[-1][1] += 1
+            else:
+                marker = '- '
+            self.write(indent + marker)
+        elif tag == 'table':
+            if self.cell is None:
+                self.flush()
+            self.tables.append([[], None])
+        elif tag == 'tr' and self.tables:
+            self.tables[-1][0].append([])
+        elif tag in ('td', 'th') and self.tables:
+            rows = self.tables[-1][0]
+            if not rows:
+                rows.append([])
+            self.tables[-1][1] = []
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skip = max(self.skip - 1, 0)
+        elif self.skip:
+            return
+        elif tag in HEADINGS or tag in BLOCK_TAGS and not self.lists:
+            self.flush()
+        elif tag in ('strong', 'b'):
+            self.write('**')
+        elif tag in ('em', 'i'):
+            self.write('*')
+        elif tag in ('del', 's', 'strike'):
+            self.write('~~')
+        elif tag == 'code' and not self.pre:
+            self.code = False
+            self.write('`')
+        elif tag == 'pre' and self.pre:
+            self.write('\n```')
+            self.flush()
+            self.pre -= 1
+        elif tag == 'a' and self.link is not None:
+            self.write(f']({self.link})' if self.link else ']')
+            self.link = None
+        elif tag == 'blockquote':
+            self.flush()
+            self.quote_depth = max(self.quote_depth - 1, 0)
+        elif tag in ('ul', 'ol'):
+            self.flush()
+            if self.lists:
+                self.lists.pop()
+        elif tag == 'li':
+            self.flush()
+        elif tag in ('td', 'th') and self.tables and self.tables[-1][1] is not None:
+            rows, cell = self.tables[-1]
+            text = SPACE_RE.sub(' ', ''.join(cell)).strip().replace('|', '\\|')
+            rows[-1].append(text)
+            self.tables[-1][1] = None
+        elif tag == 'table' and self.tables:
+            rows, _ = self.tables.pop()
+            if self.cell is not None:
+                # Markdown tables cannot nest; an inner table becomes text in the outer cell
+                self.write(' ' + ' '.join(text for row in rows for text in row if text) + ' ')
+            else:
+                self.blocks.append((self.table_markdown(rows), False))
+
+    def handle_data(self, data):
+        if self.skip:
+            return
+        if self.pre:
+            self.write(data)
+            return
+        text = SPACE_RE.sub(' ', data)
+        if not ''.join(self.line).strip() and self.cell is None:
+            text = text.lstrip()
+        self.write(text if self.code or self.link is not None else ESCAPE_RE.sub(r'\\\1', text))
+
+    @staticmethod
+    def table_markdown(rows):
+        rows = [row for row in rows if row]
+        if not rows:
+            return ''
+        width = max(len(row) for row in rows)
+        rows = [row + [''] * (width - len(row)) for row in rows]
+        lines = ['| ' + ' | '.join(rows[0]) + ' |', '|' + '---|' * width]
+        lines.extend('| ' + ' | '.join(row) + ' |' for row in rows[1:])
+        return '\n'.join(lines)
@@ -1,4 +1,5 @@
 import os
+import html as html_lib
 from pathlib import Path
 from PyQt5.QtWidgets import QMessageBox
 
@@ -9,53 +10,169 @@ except ImportError:
     PANDOC_AVAILABLE = False
 
 try:
-    from markdown import markdown
+    from markdown import markdown, __version__ as MARKDOWN_VERSION
     MARKDOWN_AVAILABLE = True
 except ImportError:
     MARKDOWN_AVAILABLE = False
 
+from handlers.render_tracer import stage
+from converter.pipeline import PipelineContext, default_pipeline
+
+class ConversionError(Exception):
+    """Raised when no converter could turn the markdown into HTML"""
+
+
 class MarkdownConverter:
     """Handles conversion of markdown to HTML with proper theming"""
     
     def __init__(self, main_window):
         self.main_window = main_window
+        # Optional RenderCache for converted bodies
+        self.cache = None
+        # Optional DiagramRenderer for dot/mermaid/plantuml fences
+        self.diagrams = None
+        # Optional ConversionSandbox; conversions run in its worker processes when set
+        self.sandbox = None
+        # Pre/post-processing stages around the conversion itself
+        self.pipeline = default_pipeline(self)
+        # Extra preview CSS from the active theme
+        self.extra_css = ""
+        self._backend_id = None
+    
+    def convert_markdown_to_html(self, text, trace=None):
+        """Convert markdown to themed HTML, timing each stage on trace if given"""
+        return self.render(text, trace)[1]
+    
+    def render(self, text, trace=None, context=None):
+        """Return (body HTML or None on error, themed page HTML)"""
+        try:
+            body = self.convert_markdown_to_body(text, trace, context)
+        except ConversionError as e:
+            if context is not None:
+                context.error = str(e)
+            return None, self.get_error_template(str(e))
+        with stage(trace, "wrap"):
+            return body, self.wrap_html(body)
+    
+    def convert_markdown_to_body(self, text, trace=None, context=None):
+        """Run the pipeline to an HTML body; context defaults to a live preview render"""
+        if context is None:
+            context = PipelineContext(trace=trace)
+        context.trace = trace or context.trace
+        return self.pipeline.run(
+            text, context,
+            lambda text, tag, finish: self.convert_cached(text, context.trace, tag, finish)
+        )
+    
+    def convert_cached(self, text, trace=None, tag="", finish=None):
+        """Convert and post-process with finish, reusing the render cache when set"""
+        cache = self.cache
+        if cache is None:
+            with stage(trace, "convert"):
+                body, _ = self.convert_isolated(text)
+            return finish(body) if finish else body
+        with stage(trace, "cache"):
+            body = cache.get(cache.key(text, f"{self.backend_id()}+{tag}"))
+        if body is None:
+            with stage(trace, "convert"):
+                body, backend = self.convert_isolated(text)
+            if finish:
+                body = finish(body)
+            # Keyed by the backend that produced it: a fallback's output must not answer for pandoc
+            cache.put(cache.key(text, f"{backend}+{tag}"), body)
+        return body
     
-    def convert_markdown_to_html(self, text):
-        """Convert markdown to HTML using available converters"""
+    def backend_id(self):
+        """Name and version of the preferred converter, part of the cache key"""
+        if self._backend_id is None:
+            backends = self.available_backends()
+            if 'pandoc' in backends:
+                self._backend_id = f"pandoc-{pypandoc.get_pandoc_version()}"
+            elif 'markdown' in backends:
+                self._backend_id = f"markdown-{MARKDOWN_VERSION}"
+            else:
+                self._backend_id = "none"
+        return self._backend_id
+    
+    def convert_isolated(self, text):
+        """(body HTML, backend id) converted in the sandbox when one is set, otherwise in this thread"""
+        if self.sandbox is not None:
+            return self.sandbox.convert(text)
+        return self.convert_uncached(text)
+    
+    def convert_uncached(self, text):
+        """Convert markdown to an HTML body using available converters; returns (body, backend id)"""
         # Try pypandoc first (more powerful)
         if PANDOC_AVAILABLE:
             try:
-                html = pypandoc.convert_text(
-                    text, 'html5',
-                    format='markdown',
-                    extra_args=['--standalone', '--mathjax', '--syntax-highlighting=pygments']
-                )
-                # Apply theme
-                if self.main_window.night_mode:
-                    return self.wrap_with_dark_theme(html)
-                else:
-                    return self.wrap_with_light_theme(html)
+                return self.convert_with_pandoc(text), f"pandoc-{pypandoc.get_pandoc_version()}"
             except Exception as e:
                 print(f"Pandoc conversion failed: {e}")
         
         # Fall back to python-markdown
         if MARKDOWN_AVAILABLE:
             try:
-                extensions = [
-                    'fenced_code', 'codehilite', 'tables', 'toc',
-                    'footnotes', 'meta', 'sane_lists', 'smarty',
-                    'nl2br', 'attr_list', 'def_list', 'abbr', 'md_in_html'
-                ]
-                html = markdown(text, extensions=extensions, output_format='html5')
-                # Apply theme
-                if self.main_window.night_mode:
-                    return self.wrap_with_dark_theme(html)
-                else:
-                    return self.wrap_with_light_theme(html)
+                return self.convert_with_markdown(text), f"markdown-{MARKDOWN_VERSION}"
             except Exception as e:
-                return self.get_error_template(f"Markdown conversion error: {e}")
+                raise ConversionError(f"Markdown conversion error: {e}")
         
-        return self.get_error_template("No markdown converter available! Install 'markdown' or 'pypandoc'")
+        raise ConversionError("No markdown converter available! Install 'markdown' or 'pypandoc'")
+    
+    def convert_with_pandoc(self, text):
+        """Convert with pandoc (raises if pandoc is missing or fails)"""
+        return pypandoc.convert_text(
+            text, 'html5',
+            format='markdown',
+            extra_args=['--standalone', '--mathjax', '--syntax-highlighting=pygments']
+        )
+    
+    def convert_with_markdown(self, text):
+        """Convert with python-markdown"""
+        extensions = [
+            'fenced_code', 'codehilite', 'tables', 'toc',
+            'footnotes', 'meta', 'sane_lists', 'smarty',
+            'nl2br', 'attr_list', 'def_list', 'abbr', 'md_in_html'
+        ]
+        return markdown(text, extensions=extensions, output_format='html5')
+    
+    def available_backends(self):
+        """{name: conversion function} for the converters that are installed"""
+        backends = {}
+        if PANDOC_AVAILABLE:
+            try:
+                pypandoc.get_pandoc_version()
+                backends['pandoc'] = self.convert_with_pandoc
+            except OSError:
+                pass  # pypandoc installed without a pandoc binary
+        if MARKDOWN_AVAILABLE:
+            backends['markdown'] = self.convert_with_markdown
+        return backends
+    
+    def wrap_html(self, html):
+        """Apply the current theme to an HTML body"""
+        if self.main_window.night_mode:
+            page = self.wrap_with_dark_theme(html)
+        else:
+            page = self.wrap_with_light_theme(html)
+        if self.extra_css:
+            page = page.replace("</style>", f"{self.extra_css}\n</style>", 1)
+        return page
+    
+    def theme_css(self):
+        """The stylesheet wrap_html puts in front of bodies for the current theme"""
+        page = self.wrap_html("")
+        return page[page.index("<style>") + len("<style>"):page.index("</style>")]
+    
+    def page_for_body(self, body):
+        """Themed preview page for an already converted body (empty means no content)"""
+        if not body:
+            return self.get_preview_template("Preview will appear here...")
+        return self.wrap_html(body)
+    
+    def page_with_warning(self, body, warning):
+        """Themed page for an older body, flagged as out of date"""
+        notice = f'<div class="render-warning">{html_lib.escape(warning)} Showing the last successful render.</div>\n'
+        return self.wrap_html(notice + body)
     
     def get_light_theme_css(self):
         """Get CSS for light theme"""
@@ -163,6 +280,31 @@ class MarkdownConverter:
         .task-list-item input {
             margin-right: 0.5em;
         }
+        .diagram {
+            text-align: center;
+            margin-bottom: 16px;
+        }
+        .diagram svg {
+            max-width: 100%;
+            height: auto;
+        }
+        .diagram-pending {
+            padding: 2em;
+            color: #6a737d;
+            border: 1px dashed #d1d5da;
+            border-radius: 6px;
+        }
+        .diagram-error {
+            color: #cb2431;
+        }
+        .render-warning {
+            padding: 8px 12px;
+            margin-bottom: 16px;
+            color: #735c0f;
+            background-color: #fffbdd;
+            border: 1px solid #d9d0a5;
+            border-radius: 6px;
+        }
         """
     
     def get_dark_theme_css(self):
@@ -274,6 +416,53 @@ class MarkdownConverter:
         .task-list-item input {
             margin-right: 0.5em;
         }
+        .diagram {
+            text-align: center;
+            margin-bottom: 16px;
+        }
+        .diagram svg {
+            max-width: 100%;
+            height: auto;
+            background-color: #fff;
+            border-radius: 4px;
+        }
+        .diagram-pending {
+            padding: 2em;
+            color: #8b949e;
+            border: 1px dashed #444c56;
+            border-radius: 6px;
+        }
+        .diagram-error {
+            color: #f85149;
+        }
+        .render-warning {
+            padding: 8px 12px;
+            margin-bottom: 16px;
+            color: #e3b341;
+            background-color: #2e2a1f;
+            border: 1px solid #5c4d1f;
+            border-radius: 6px;
+        }
+        """
+    
+    def get_lite_css(self):
+        """CSS subset understood by QTextDocument, for the lite preview"""
+        if self.main_window.night_mode:
+            code_background, border, link = "#2f363d", "#444d56", "#58a6ff"
+        else:
+            code_background, border, link = "#f6f8fa", "#dfe2e5", "#0366d6"
+        return f"""
+        body {{ font-family: 'Segoe UI', Roboto, Helvetica, Arial, sans-serif; font-size: 16px; }}
+        h1 {{ font-size: 2em; }}
+        h2 {{ font-size: 1.5em; }}
+        h3 {{ font-size: 1.25em; }}
+        a {{ color: {link}; text-decoration: none; }}
+        code, pre {{ font-family: Consolas, Monaco, 'Courier New', monospace; background-color: {code_background}; }}
+        pre {{ white-space: pre; }}
+        blockquote {{ margin-left: 16px; }}
+        table {{ border-collapse: collapse; }}
+        th, td {{ border: 1px solid {border}; padding: 4px 8px; }}
+        th {{ font-weight: bold; background-color: {code_background}; }}
         """
     
     def wrap_with_light_theme(self, html):
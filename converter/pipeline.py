@@ -0,0 +1,343 @@
+import os
+import re
+import time
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from handlers.render_tracer import stage as trace_stage
+from handlers.link_checker import FENCE_RE
+
+LIVE = "live"
+EXPORT = "export"
+# Per-block results kept by each blockwise, cacheable stage
+BLOCK_MEMO_ENTRIES = 4096
+
+FRONT_MATTER_RE = re.compile(r'\A---[ \t]*\n(.*?\n)?(?:---|\.\.\.)[ \t]*(?:\n|\Z)', re.S)
+# A top-level "key: value" (or "key:") line of YAML front matter
+FRONT_MATTER_KEY_RE = re.compile(r'^[A-Za-z0-9_"\'][^:\n]*:(?:[ \t]|$)')
+INCLUDE_RE = re.compile(r'^[ \t]*<!--\s*include:\s*(.+?)\s*-->[ \t]*$', re.M)
+MAX_INCLUDE_DEPTH = 4
+MD_LINK_RE = re.compile(r'(\]\()(?!\w+:|/|#)([^)\s]+?)\.(?:md|markdown)((?:#[^)\s]*)?[)\s])')
+BODY_TAG_RE = re.compile(r'<body\b[^>]*>', re.I)
+SCRIPT_RE = re.compile(r'<script\b.*?</script\s*>', re.I | re.S)
+TAG_RE = re.compile(r'<[a-zA-Z][^>]*>')
+EVENT_ATTR_RE = re.compile(r'''\s+on\w+\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>]+)''', re.I)
+JS_URL_RE = re.compile(r'''((?:href|src)\s*=\s*["']?)\s*javascript:''', re.I)
+
+
+class PipelineContext:
+    """Per-conversion options and scratch space shared by the stages"""
+
+    def __init__(self, mode=LIVE, base_dir=None, fmt=None, trace=None, budgets=None):
+        self.mode = mode
+        self.base_dir = base_dir
+        # Export format name, None for the preview
+        self.fmt = fmt
+        self.trace = trace
+        # Latency budgets only apply to live renders unless asked otherwise
+        self.budgets = mode == LIVE if budgets is None else budgets
+        # Names of stages skipped for being over budget
+        self.skipped = []
+        # Message of a failed conversion
+        self.error = None
+        self.data = {}
+
+
+class Stage(ABC):
+    """One step of the pipeline.
+
+    Pre stages transform markdown text, post stages the converted body HTML.
+    A cacheable stage's output depends only on its input: cacheable post
+    stages run before bodies go into the render cache, and blockwise ones
+    are memoized per block. Blockwise stages see one top-level block at a
+    time and never see fenced code. A stage whose predicted time exceeds
+    budget_ms is skipped in live renders.
+    """
+
+    name = ""
+    phase = "pre"
+    cacheable = True
+    blockwise = False
+    budget_ms = None
+
+    def enabled(self, context):
+        return True
+
+    @abstractmethod
+    def run(self, text, context):
+        """Transformed text (pre stages) or body HTML (post stages)"""
+
+
+def is_front_matter(block):
+    """True if block reads as YAML key: value entries rather than markdown between two --- rules"""
+    keys = 0
+    for line in block.split('\n'):
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        if FRONT_MATTER_KEY_RE.match(line):
+            keys += 1
+        elif not (keys and line[0] in ' \t-'):
+            return False  # Only indented values and list items may follow a key
+    return keys > 0
+
+
+class FrontMatterStage(Stage):
+    """Strip a leading YAML front matter block"""
+
+    name = "front-matter"
+
+    def run(self, text, context):
+        match = FRONT_MATTER_RE.match(text)
+        if match is None or not is_front_matter(match.group(1) or ""):
+            return text
+        context.data["front_matter"] = match.group(1) or ""
+        return text[match.end():]
+
+
+class IncludeStage(Stage):
+    """Expand <!-- include: path --> lines with the named file, relative to the document"""
+
+    name = "includes"
+    cacheable = False  # Included files change independently of the text
+    budget_ms = 50
+
+    def enabled(self, context):
+        return context.base_dir is not None
+
+    def run(self, text, context):
+        return self.expand(text, context.base_dir, ())
+
+    def expand(self, text, base_dir, seen):
+        def include(match):
+            path = os.path.normpath(os.path.join(base_dir, match.group(1)))
+            if path in seen or len(seen) >= MAX_INCLUDE_DEPTH:
+                return match.group(0)  # Include cycle or too deep
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    content = file.read()
+            except (OSError, UnicodeDecodeError):
+                return match.group(0)
+            return self.expand(content, os.path.dirname(path), seen + (path,)).rstrip('\n')
+
+        if 'include:' not in text:
+            return text
+        return INCLUDE_RE.sub(include, text)
+
+
+class DiagramExtractStage(Stage):
+    """Swap diagram fences for numbered placeholders (see DiagramFillStage)"""
+
+    name = "diagrams"
+
+    def __init__(self, converter):
+        self.converter = converter
+
+    def enabled(self, context):
+        return self.converter.diagrams is not None
+
+    def run(self, text, context):
+        text, context.data["diagrams"] = self.converter.diagrams.extract(text)
+        return text
+
+
+class DiagramFillStage(Stage):
+    """Put rendered SVG, or pending blocks, where the extracted diagrams were"""
+
+    name = "diagrams"
+    phase = "post"
+    cacheable = False  # Pending diagrams finish later
+
+    def __init__(self, converter):
+        self.converter = converter
+
+    def enabled(self, context):
+        return self.converter.diagrams is not None
+
+    def run(self, body, context):
+        diagrams = context.data.get("diagrams")
+        if not diagrams:
+            return body
+        body = self.converter.diagrams.fill(body, diagrams)
+        if context.mode == EXPORT and self.converter.diagrams.has_pending(body):
+            body = self.converter.diagrams.complete(body)
+        return body
+
+
+class LinkRewriteStage(Stage):
+    """Point relative links to .md files at the .html files an HTML export produces"""
+
+    name = "links"
+    blockwise = True
+
+    def enabled(self, context):
+        return context.mode == EXPORT and context.fmt in ('html', 'html-inline')
+
+    def run(self, text, context):
+        return MD_LINK_RE.sub(r'\1\2.html\3', text)
+
+
+class SanitizeStage(Stage):
+    """Remove scripts, event handler attributes and javascript: URLs from the body"""
+
+    name = "sanitize"
+    phase = "post"
+
+    def run(self, body, context):
+        if '<' not in body:
+            return body
+        # Pandoc's standalone output loads MathJax from its head; only the content is cleaned
+        match = BODY_TAG_RE.search(body)
+        head, content = (body[:match.end()], body[match.end():]) if match else ("", body)
+        content = SCRIPT_RE.sub('', content)
+        content = TAG_RE.sub(self.clean_tag, content)
+        return head + content
+
+    @staticmethod
+    def clean_tag(match):
+        tag = EVENT_ATTR_RE.sub('', match.group(0))
+        return JS_URL_RE.sub(r'\1#', tag)
+
+
+def split_blocks(text):
+    """Split markdown at blank lines into (block, is fenced code) pairs; joining the blocks gives text back"""
+    blocks = []
+    current = []
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        if FENCE_RE.match(line):
+            if not in_fence and current:
+                blocks.append((''.join(current), False))
+                current = []
+            current.append(line)
+            if in_fence:
+                blocks.append((''.join(current), True))
+                current = []
+            in_fence = not in_fence
+        elif not in_fence and not line.strip():
+            current.append(line)
+            blocks.append((''.join(current), False))
+            current = []
+        else:
+            current.append(line)
+    if current:
+        blocks.append((''.join(current), in_fence))
+    return blocks
+
+
+class Pipeline:
+    """Ordered pre and post stages around a markdown converter, timed per stage"""
+
+    def __init__(self, stages=()):
+        self.stages = []
+        self.lock = threading.Lock()
+        # stage name -> milliseconds per input character, from recent runs
+        self.rates = {}
+        self.memos = {}
+        for stage in stages:
+            self.register(stage)
+
+    def register(self, stage, before=None):
+        """Add a stage, optionally in front of the stage named before"""
+        names = [s.name for s in self.stages]
+        if before in names:
+            self.stages.insert(names.index(before), stage)
+        else:
+            self.stages.append(stage)
+
+    def unregister(self, name):
+        self.stages = [s for s in self.stages if s.name != name]
+
+    def same_for_export(self, fmt):
+        """True if an export to fmt runs the same stages as the preview"""
+        live = PipelineContext(LIVE, base_dir="")
+        export = PipelineContext(EXPORT, base_dir="", fmt=fmt)
+        return all(s.enabled(live) == s.enabled(export) for s in self.stages)
+
+    def run(self, text, context, convert):
+        """Body HTML for text.
+
+        convert(text, tag, finish) turns markdown into a body and must pass it
+        through finish() before caching it under a key that includes tag.
+        """
+        for stage in self.active("pre", context):
+            if self.within_budget(stage, len(text), context):
+                text = self.run_stage(stage, text, context)
+        post = self.active("post", context)
+        cached = [s for s in post if s.cacheable and self.within_budget(s, len(text), context)]
+
+        def finish(body):
+            for stage in cached:
+                body = self.run_stage(stage, body, context)
+            return body
+
+        body = convert(text, ",".join(s.name for s in cached), finish)
+        for stage in post:
+            if not stage.cacheable and self.within_budget(stage, len(body), context):
+                body = self.run_stage(stage, body, context)
+        return body
+
+    def active(self, phase, context):
+        return [s for s in self.stages if s.phase == phase and s.enabled(context)]
+
+    def within_budget(self, stage, size, context):
+        """False, noting the skip on context, if the stage is predicted to overrun its budget"""
+        if stage.budget_ms is None or not context.budgets:
+            return True
+        with self.lock:
+            rate = self.rates.get(stage.name, 0.0)
+        if rate * size <= stage.budget_ms:
+            return True
+        context.skipped.append(stage.name)
+        return False
+
+    def run_stage(self, stage, text, context):
+        size = len(text)
+        start = time.perf_counter()
+        with trace_stage(context.trace, stage.name):
+            if stage.blockwise:
+                text = self.run_blockwise(stage, text, context)
+            else:
+                text = stage.run(text, context)
+        if size:
+            rate = (time.perf_counter() - start) * 1000 / size
+            # Render and export jobs run stages on several pool threads
+            with self.lock:
+                previous = self.rates.get(stage.name)
+                self.rates[stage.name] = rate if previous is None else (previous + rate) / 2
+        return text
+
+    def run_blockwise(self, stage, text, context):
+        """Run a stage per block, reusing memoized results of unchanged blocks"""
+        memo = self.memos.setdefault(stage.name, OrderedDict()) if stage.cacheable else None
+        output = []
+        for block, is_code in split_blocks(text):
+            if is_code:
+                output.append(block)
+                continue
+            if memo is not None:
+                with self.lock:
+                    result = memo.get(block)
+                    if result is not None:
+                        memo.move_to_end(block)
+                if result is None:
+                    result = stage.run(block, context)
+                    with self.lock:
+                        memo[block] = result
+                        if len(memo) > BLOCK_MEMO_ENTRIES:
+                            memo.popitem(last=False)
+            else:
+                result = stage.run(block, context)
+            output.append(result)
+        return ''.join(output)
+
+
+def default_pipeline(converter):
+    return Pipeline([
+        FrontMatterStage(),
+        IncludeStage(),
+        DiagramExtractStage(converter),
+        LinkRewriteStage(),
+        SanitizeStage(),
+        DiagramFillStage(converter),
+    ])
@@ -0,0 +1,130 @@
+import os
+import time
+import zlib
+import hashlib
+import threading
+
+from utils import get_app_data_dir
+
+# Bump when the conversion options change so old entries are no longer hit
+CACHE_FORMAT = 1
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class RenderCache:
+    """Size-capped on-disk cache of rendered body HTML, evicting least recently used entries.
+
+    Entries are zlib-compressed files named by a hash of the markdown text,
+    the converter backend and its version; a file's mtime is its last use.
+    """
+
+    def __init__(self, folder=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.folder = folder or get_app_data_dir("render_cache")
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # key -> (size, last used); read from disk on first use
+        self.entries = None
+        self.total = 0
+
+    @staticmethod
+    def key(text, backend):
+        digest = hashlib.sha256(f"{CACHE_FORMAT}\0{backend}\0".encode('utf-8'))
+        digest.update(text.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.folder, key[:2], key + '.html.z')
+
+    def load_index(self):
+        """Scan the cache folder once; callers hold the lock. An unreadable folder counts as empty"""
+        if self.entries is not None:
+            return
+        self.entries = {}
+        self.total = 0
+        try:
+            prefixes = os.listdir(self.folder)
+        except OSError as e:
+            print(f"Could not read render cache folder: {e}")
+            return
+        for prefix in prefixes:
+            subfolder = os.path.join(self.folder, prefix)
+            if not os.path.isdir(subfolder):
+                continue
+            try:
+                with os.scandir(subfolder) as files:
+                    for entry in files:
+                        if entry.name.endswith('.html.z'):
+                            stat = entry.stat()
+                            self.entries[entry.name[:-len('.html.z')]] = (stat.st_size, stat.st_mtime)
+                            self.total += stat.st_size
+            except OSError:
+                continue  # Removed or unreadable meanwhile; its entries are simply not counted
+
+    def get(self, key):
+        """Cached body HTML for key, or None"""
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                body = zlib.decompress(file.read()).decode('utf-8')
+            os.utime(path)
+        except (OSError, zlib.error, UnicodeDecodeError):
+            return None
+        with self.lock:
+            if self.entries is not None and key in self.entries:
+                self.entries[key] = (self.entries[key][0], time.time())
+        return body
+
+    def put(self, key, body):
+        """Store body HTML, then evict old entries if over the size cap"""
+        data = zlib.compress(body.encode('utf-8'), 6)
+        if len(data) > self.max_bytes:
+            return
+        path = self.path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Could not write render cache entry: {e}")
+            return
+        with self.lock:
+            self.load_index()
+            previous = self.entries.get(key)
+            if previous is not None:
+                self.total -= previous[0]
+            self.entries[key] = (len(data), time.time())
+            self.total += len(data)
+            if self.total > self.max_bytes:
+                self.evict(int(self.max_bytes * 0.9))
+
+    def evict(self, target):
+        """Delete least recently used entries until the total is at most target; callers hold the lock"""
+        for key, (size, _) in sorted(self.entries.items(), key=lambda item: item[1][1]):
+            if self.total <= target:
+                break
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+            del self.entries[key]
+            self.total -= size
+
+    def clear(self):
+        """Delete every entry; returns the number of bytes freed"""
+        with self.lock:
+            self.load_index()
+            freed = self.total
+            self.evict(0)
+            for prefix in os.listdir(self.folder):
+                try:
+                    os.rmdir(os.path.join(self.folder, prefix))
+                except OSError:
+                    pass  # Not empty or not a folder
+            return freed
+
+    def size(self):
+        with self.lock:
+            self.load_index()
+            return self.total
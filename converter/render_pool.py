@@ -0,0 +1,79 @@
+import time
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+class RenderSignals(QObject):
+    """Signals used by render jobs to report back to the GUI thread"""
+    rendered = pyqtSignal(object, int, object, str, object, object)
+
+
+class RenderJob(QRunnable):
+    """Converts one markdown snapshot to HTML on a pool thread"""
+
+    def __init__(self, converter, key, revision, text, trace, signals, queued_at, context):
+        super().__init__()
+        self.queued_at = queued_at
+        self.converter = converter
+        self.key = key
+        self.revision = revision
+        self.text = text
+        self.trace = trace
+        self.signals = signals
+        self.context = context
+
+    def run(self):
+        body, html = None, ""
+        try:
+            if self.trace is not None:
+                self.trace.add("queue", self.queued_at, time.perf_counter())
+            body, html = self.converter.render(self.text, self.trace, self.context)
+        except Exception as e:
+            # Anything escaping QRunnable.run aborts the application; report it like a failed conversion
+            error = f"Rendering failed: {e}"
+            if self.context is not None:
+                self.context.error = error
+            html = self.converter.get_error_template(error)
+        finally:
+            # Always report back, or the key would stay in flight and never render again
+            self.signals.rendered.emit(self.key, self.revision, body, html, self.trace, self.context)
+
+
+class RenderPool(QObject):
+    """Worker pool shared by all tabs; keeps at most one job in flight per document"""
+
+    rendered = pyqtSignal(object, int, object, str, object, object)
+
+    def __init__(self, converter, max_workers=2, parent=None):
+        super().__init__(parent)
+        self.converter = converter
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.signals = RenderSignals()
+        self.signals.rendered.connect(self.on_rendered)
+        self.in_flight = set()
+        # key -> (revision, text, trace, queued_at, context) waiting for the in-flight job of the same key
+        self.pending = {}
+
+    def render(self, key, revision, text, trace=None, queued_at=None, context=None):
+        """Queue a render; a newer request for a busy key replaces the queued one"""
+        queued_at = queued_at or time.perf_counter()
+        if key in self.in_flight:
+            self.pending[key] = (revision, text, trace, queued_at, context)
+            return
+        self.in_flight.add(key)
+        self.pool.start(RenderJob(self.converter, key, revision, text, trace, self.signals, queued_at, context))
+
+    def on_rendered(self, key, revision, body, html, trace, context):
+        """Forward a finished render and start the queued follow-up, if any"""
+        self.in_flight.discard(key)
+        queued = self.pending.pop(key, None)
+        if queued is not None:
+            self.render(key, *queued)
+        self.rendered.emit(key, revision, body, html, trace, context)
+
+    def discard(self, key):
+        """Forget queued work for a closed document"""
+        self.pending.pop(key, None)
+
+    def wait_for_done(self, msecs=3000):
+        """Let running jobs finish before shutdown"""
+        self.pool.waitForDone(msecs)
@@ -0,0 +1,222 @@
+"""Markdown conversion in supervised worker processes.
+
+The worker side runs as `python -m converter.sandbox`, reading length-prefixed
+JSON requests on stdin and answering on stdout.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import struct
+import threading
+import subprocess
+
+from converter.markdown_converter import ConversionError
+from utils import get_process_rss
+
+DEFAULT_TIMEOUT_S = 10
+DEFAULT_MAX_RSS_MB = 1024
+# How often running conversions are checked against the limits
+POLL_INTERVAL = 0.05
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ConversionAborted(ConversionError):
+    """Raised when a conversion hit the time or memory limit, or its process died"""
+
+
+def write_message(stream, message):
+    data = json.dumps(message).encode('ascii')
+    stream.write(struct.pack('>I', len(data)) + data)
+    stream.flush()
+
+
+def read_message(stream):
+    """The next message, or None at end of stream"""
+    header = stream.read(4)
+    if len(header) < 4:
+        return None
+    data = stream.read(struct.unpack('>I', header)[0])
+    return json.loads(data.decode('ascii'))
+
+
+class SandboxWorker:
+    """One conversion process, in its own process group so pandoc children die with it"""
+
+    def __init__(self):
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [PACKAGE_ROOT, env.get("PYTHONPATH")]))
+        if os.name == 'posix':
+            options = {"start_new_session": True}
+        else:
+            options = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'converter.sandbox'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env, **options
+        )
+        self.deadline = None
+        # Why the supervisor killed this worker, if it did
+        self.killed_for = None
+
+    def request(self, text):
+        """Send text and wait for the reply; None if the process died first"""
+        write_message(self.process.stdin, {"text": text})
+        return read_message(self.process.stdout)
+
+    def kill(self):
+        try:
+            if os.name == 'posix':
+                os.killpg(self.process.pid, signal.SIGKILL)
+            else:
+                # Windows has no process groups to signal; taskkill /T takes pandoc children along
+                subprocess.run(['taskkill', '/F', '/T', '/PID', str(self.process.pid)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
+                self.process.kill()
+        except (OSError, subprocess.SubprocessError):
+            pass  # Already gone
+        self.process.wait()
+
+    def stop(self):
+        """Ask the worker to exit, killing it if it does not"""
+        try:
+            self.process.stdin.close()
+            self.process.wait(1)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+
+class ConversionSandbox:
+    """Runs conversions in worker processes that are killed and replaced when they
+    exceed a wall-clock timeout or a resident memory cap.
+
+    The memory cap needs get_process_rss, which works on Linux and macOS; on
+    Windows only the timeout applies.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT_S, max_rss_mb=DEFAULT_MAX_RSS_MB, max_workers=2):
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.idle = []
+        self.busy = set()
+        self.wake = threading.Event()
+        self.supervisor = None
+        self.restarts = 0
+
+    def warm_up(self):
+        """Start a worker ahead of the first conversion"""
+        with self.lock:
+            if self.idle:
+                return
+        self.release(SandboxWorker())
+
+    def acquire(self):
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+        return SandboxWorker()
+
+    def release(self, worker):
+        with self.lock:
+            if len(self.idle) < self.max_workers:
+                self.idle.append(worker)
+                return
+        worker.stop()
+
+    def convert(self, text):
+        """(body HTML, backend id) for text; raises ConversionError, or ConversionAborted when the worker was killed"""
+        worker = self.acquire()
+        worker.deadline = time.monotonic() + self.timeout
+        with self.lock:
+            self.busy.add(worker)
+            if self.supervisor is None:
+                self.supervisor = threading.Thread(target=self.supervise, daemon=True)
+                self.supervisor.start()
+        self.wake.set()
+        try:
+            reply = worker.request(text)
+        except (OSError, ValueError):
+            reply = None
+        finally:
+            with self.lock:
+                self.busy.discard(worker)
+        if reply is None:
+            reason = worker.killed_for or "The conversion process exited unexpectedly"
+            self.replace(worker)
+            raise ConversionAborted(reason)
+        if worker.killed_for:
+            # Stopped by the supervisor just as it replied; the reply itself is complete
+            self.replace(worker)
+        else:
+            self.release(worker)
+        if reply["ok"]:
+            return reply["body"], reply["backend"]
+        raise ConversionError(reply["error"])
+
+    def replace(self, worker):
+        """Kill a worker and start a fresh one now, so the next conversion does not wait for it"""
+        worker.kill()
+        with self.lock:
+            self.restarts += 1
+        self.release(SandboxWorker())
+
+    def stop_busy(self, worker, reason):
+        """Kill worker unless it has finished its conversion meanwhile"""
+        with self.lock:
+            if worker not in self.busy:
+                return
+            worker.killed_for = reason
+            worker.kill()
+
+    def supervise(self):
+        """Kill workers over their deadline or memory cap; sleeps while none are busy"""
+        while True:
+            with self.lock:
+                busy = list(self.busy)
+                if not busy:
+                    self.wake.clear()
+            if not busy:
+                self.wake.wait()
+                continue
+            now = time.monotonic()
+            for worker in busy:
+                if now > worker.deadline:
+                    self.stop_busy(worker, f"Conversion took longer than {self.timeout:g} s and was stopped.")
+                    continue
+                rss = get_process_rss(worker.process.pid)
+                if rss is not None and rss > self.max_rss_mb * 1024 * 1024:
+                    self.stop_busy(worker, f"Conversion used more than {self.max_rss_mb} MB of memory and was stopped.")
+            time.sleep(POLL_INTERVAL)
+
+    def shutdown(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for worker in idle:
+            worker.stop()
+
+
+def serve(stdin, stdout):
+    """Worker loop: convert each request with the in-process converter"""
+    from converter.markdown_converter import MarkdownConverter
+    converter = MarkdownConverter(None)
+    while True:
+        request = read_message(stdin)
+        if request is None:
+            return
+        try:
+            body, backend = converter.convert_uncached(request["text"])
+            reply = {"ok": True, "body": body, "backend": backend}
+        except ConversionError as e:
+            reply = {"ok": False, "error": str(e)}
+        except MemoryError:
+            reply = {"ok": False, "error": "Out of memory"}
+        write_message(stdout, reply)
+
+
+if __name__ == "__main__":
+    # Replies own the real stdout; anything the converters print goes to stderr
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    serve(sys.stdin.buffer, replies)
@@ -0,0 +1,170 @@
+import re
+from bisect import bisect_left, bisect_right
+from PyQt5.QtCore import QObject
+
+from handlers.link_checker import FENCE_RE
+
+WORD_RE = re.compile(r"\w+(?:['’-]\w+)*")
+HEADING_RE = re.compile(r'^ {0,3}(#{1,6})(?:\s|$)')
+WORDS_PER_MINUTE = 230
+# Blocks per chunk; edits touch one or two chunks, queries add up chunk totals
+CHUNK_LINES = 256
+
+
+def line_counts(line):
+    """(words, characters, heading level or 0, is a fence line) for one line"""
+    heading = HEADING_RE.match(line)
+    return (
+        len(WORD_RE.findall(line)),
+        len(line),
+        len(heading.group(1)) if heading else 0,
+        bool(FENCE_RE.match(line)),
+    )
+
+
+class StatsChunk:
+    """Counts of a run of consecutive blocks, with their totals and local heading and fence offsets"""
+
+    __slots__ = ('counts', 'words', 'chars', 'headings', 'fences')
+
+    def __init__(self, counts):
+        self.counts = counts
+        self.words = sum(c[0] for c in counts)
+        self.chars = sum(c[1] for c in counts)
+        self.headings = [i for i, c in enumerate(counts) if c[2]]
+        self.fences = [i for i, c in enumerate(counts) if c[3]]
+
+
+def make_chunks(counts):
+    """Split counts into chunks of about CHUNK_LINES"""
+    pieces = max(1, -(-len(counts) // CHUNK_LINES))
+    size = -(-len(counts) // pieces) or 1
+    return [StatsChunk(counts[i:i + size]) for i in range(0, max(len(counts), 1), size)]
+
+
+class DocumentStats(QObject):
+    """Word, character and section counts kept per block and updated from the tracker's deltas.
+
+    Blocks are grouped into chunks that carry their own totals, so inserting
+    or removing lines rebuilds one or two chunks instead of shifting every
+    later position, and a section's word count adds up whole chunks.
+    """
+
+    def __init__(self, tracker, parent=None):
+        super().__init__(parent)
+        self.tracker = tracker
+        self.rebuild()
+        tracker.blocks_changed.connect(self.on_blocks_changed)
+
+    def rebuild(self):
+        self.chunks = make_chunks([line_counts(line) for line in self.tracker.lines])
+        self.total_words = sum(chunk.words for chunk in self.chunks)
+        self.total_chars = sum(chunk.chars for chunk in self.chunks)
+        self.update_index()
+
+    def update_index(self):
+        """First block and number of fence lines before each chunk"""
+        self.starts = []
+        self.fences_before = []
+        start = fences = 0
+        for chunk in self.chunks:
+            self.starts.append(start)
+            self.fences_before.append(fences)
+            start += len(chunk.counts)
+            fences += len(chunk.fences)
+        self.line_count = start
+
+    def locate(self, block):
+        """Index of the chunk holding block"""
+        return max(bisect_right(self.starts, block) - 1, 0)
+
+    def on_blocks_changed(self, first, old_last, new_last):
+        i = self.locate(first)
+        j = self.locate(old_last)
+        # Fold a small result into its neighbour so chunks do not shrink away
+        size = sum(len(chunk.counts) for chunk in self.chunks[i:j + 1]) + new_last - old_last
+        if size < CHUNK_LINES // 2 and j + 1 < len(self.chunks):
+            j += 1
+        counts = [c for chunk in self.chunks[i:j + 1] for c in chunk.counts]
+        offset = self.starts[i]
+        old = counts[first - offset:old_last - offset + 1]
+        new = [line_counts(line) for line in self.tracker.lines[first:new_last + 1]]
+        self.total_words += sum(c[0] for c in new) - sum(c[0] for c in old)
+        self.total_chars += sum(c[1] for c in new) - sum(c[1] for c in old)
+        counts[first - offset:old_last - offset + 1] = new
+        self.chunks[i:j + 1] = make_chunks(counts)
+        self.update_index()
+
+    @property
+    def characters(self):
+        """Characters including line breaks"""
+        return self.total_chars + max(0, self.line_count - 1)
+
+    @property
+    def reading_minutes(self):
+        return self.total_words / WORDS_PER_MINUTE
+
+    def in_fence(self, block):
+        """True if block lies inside a fenced code block"""
+        i = self.locate(block)
+        fences = self.fences_before[i] + bisect_left(self.chunks[i].fences, block - self.starts[i])
+        return fences % 2 == 1
+
+    def level(self, block):
+        i = self.locate(block)
+        return self.chunks[i].counts[block - self.starts[i]][2]
+
+    def outline(self):
+        """Block numbers of the headings outside fenced code, in order"""
+        blocks = []
+        for chunk, start, fences in zip(self.chunks, self.starts, self.fences_before):
+            for local in chunk.headings:
+                if (fences + bisect_left(chunk.fences, local)) % 2 == 0:
+                    blocks.append(start + local)
+        return blocks
+
+    def words_between(self, start, end):
+        """Words in blocks start..end-1"""
+        i = self.locate(start)
+        j = self.locate(end - 1)
+        first = self.chunks[i].counts
+        if i == j:
+            return sum(c[0] for c in first[start - self.starts[i]:end - self.starts[i]])
+        last = self.chunks[j].counts
+        return (sum(c[0] for c in first[start - self.starts[i]:])
+                + sum(chunk.words for chunk in self.chunks[i + 1:j])
+                + sum(c[0] for c in last[:end - self.starts[j]]))
+
+    def section(self, block):
+        """(heading text, words) of the section containing block, or None before the first heading"""
+        # The nearest heading at or before block that is not inside a fence
+        start = None
+        i = self.locate(block)
+        limit = block - self.starts[i] + 1
+        while start is None and i >= 0:
+            chunk = self.chunks[i]
+            for local in reversed(chunk.headings[:bisect_left(chunk.headings, limit)]):
+                if not self.in_fence(self.starts[i] + local):
+                    start = self.starts[i] + local
+                    break
+            i -= 1
+            limit = len(self.chunks[i].counts) if i >= 0 else 0
+        if start is None:
+            return None
+        level = self.level(start)
+
+        # The section runs until the next heading of the same or a higher level
+        end = self.line_count
+        i = self.locate(start)
+        after = start - self.starts[i] + 1
+        while i < len(self.chunks) and end == self.line_count:
+            chunk = self.chunks[i]
+            for local in chunk.headings[bisect_left(chunk.headings, after):]:
+                candidate = self.starts[i] + local
+                if chunk.counts[local][2] <= level and not self.in_fence(candidate):
+                    end = candidate
+                    break
+            i += 1
+            after = 0
+        title = self.tracker.lines[start].strip().strip('#').strip()
+        return title, self.words_between(start, end)
@@ -0,0 +1,77 @@
+import os
+import time
+from PyQt5.QtGui import QTextCursor
+
+from editor.markdown_text_edit import MarkdownTextEdit
+from editor.document_tracker import DocumentTracker
+from editor.document_stats import DocumentStats
+from editor.undo_history import UndoHistory
+from editor.link_completer import LinkCompleter
+from editor.find_replace import Utf16Mapper
+from handlers.merge import changed_region
+from handlers.link_checker import LinkProblems
+
+class DocumentTab:
+    """One open document: its editor plus per-document file and render state"""
+
+    def __init__(self, main_window):
+        self.editor = MarkdownTextEdit(main_window)
+        # Line mirror and change feed; readers share its text instead of calling toPlainText()
+        self.tracker = DocumentTracker(self.editor.document(), self.editor)
+        self.stats = DocumentStats(self.tracker, self.editor)
+        # Blocks edited since the preview last converted this document
+        self.preview_dirty = self.tracker.subscribe()
+        self.links = LinkProblems(self.tracker, self.stats, self.editor)
+        budget_mb = main_window.settings.value("undoBudgetMB", 32, type=int)
+        self.history = UndoHistory(self.editor, self.tracker, budget_mb * 1024 * 1024, self.editor)
+        self.editor.history = self.history
+        self.editor.link_completer = LinkCompleter(self, main_window)
+        self.current_file = None
+        self.is_modified = False
+        # Content as last loaded from / saved to disk; the base for three-way merges
+        self.saved_text = ""
+        # Last rendered preview HTML and its unthemed body (reused by exports);
+        # dropped for background tabs under memory pressure
+        self.html = None
+        self.body_html = None
+        # Last body that converted successfully; shown, flagged, when a later conversion fails
+        self.last_good_body = None
+        # False while body_html lacks pipeline stages skipped for the live latency budget
+        self.body_complete = True
+        # Bumped on every render request so late results from the pool can be discarded
+        self.render_revision = 0
+        # (key, added, removed, html) of the last "Show Changes" diff; the key covers both sides
+        self.diff = None
+        self.last_active = time.monotonic()
+
+    @property
+    def title(self):
+        """Tab label with a modification marker"""
+        name = os.path.basename(self.current_file) if self.current_file else "Untitled"
+        return f"{name} •" if self.is_modified else name
+
+    def is_blank(self) -> bool:
+        """True for an untouched Untitled tab that can be reused when opening a file"""
+        return self.current_file is None and not self.is_modified and self.editor.document().isEmpty()
+
+    def evict(self, keep_last_good=False):
+        """Drop cached render output; it is re-rendered on activation"""
+        self.html = None
+        self.body_html = None
+        if not keep_last_good:
+            self.last_good_body = None
+
+    def replace_text(self, new_text):
+        """Replace the buffer contents, editing only the span that actually differs"""
+        old_text = self.tracker.text()
+        start, old_end, new_end = changed_region(old_text, new_text)
+        if start == old_end == new_end:
+            return
+        mapper = Utf16Mapper(old_text)
+        # A separate cursor keeps the user's cursor and scroll position in place
+        cursor = QTextCursor(self.editor.document())
+        cursor.beginEditBlock()
+        cursor.setPosition(mapper.to_qt(start))
+        cursor.setPosition(mapper.to_qt(old_end), QTextCursor.KeepAnchor)
+        cursor.insertText(new_text[start:new_end])
+        cursor.endEditBlock()
@@ -0,0 +1,123 @@
+import weakref
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+def utf16_length(text):
+    """Length of text in UTF-16 code units, the unit of QTextDocument positions"""
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-16-le', 'surrogatepass')) // 2
+
+
+class DirtyRanges:
+    """Block ranges one consumer has not seen yet, shifted as lines are inserted and removed"""
+
+    def __init__(self, line_count):
+        # Sorted, disjoint [first, last] block ranges changed since the last take()
+        self.ranges = [[0, line_count - 1]]
+
+    def __bool__(self):
+        return bool(self.ranges)
+
+    def take(self):
+        """Return and clear the block ranges changed since the last call"""
+        ranges, self.ranges = self.ranges, []
+        return [tuple(r) for r in ranges]
+
+    def mark(self, first, old_last, new_last):
+        """Add a changed range, shifting and merging the ranges already recorded"""
+        delta = new_last - old_last
+        merged_first, merged_last = first, new_last
+        dirty = []
+        for start, end in self.ranges:
+            if end < first - 1:
+                dirty.append([start, end])
+            elif start > old_last + 1:
+                dirty.append([start + delta, end + delta])
+            else:
+                merged_first = min(merged_first, start)
+                merged_last = max(merged_last, end + delta if end > old_last else new_last)
+        dirty.append([merged_first, merged_last])
+        dirty.sort()
+        self.ranges = dirty
+
+
+class DocumentTracker(QObject):
+    """Mirrors a QTextDocument's lines from contentsChange and records what changed.
+
+    Consumers either connect to blocks_changed or subscribe() and take the
+    dirty block ranges accumulated since they last asked, instead of copying
+    the whole text.
+    """
+
+    # first block, last block before the edit, last block after it
+    blocks_changed = pyqtSignal(int, int, int)
+    # first block, its lines before the edit, its lines after it (emitted first)
+    lines_replaced = pyqtSignal(int, object, object)
+
+    def __init__(self, document, parent=None):
+        super().__init__(parent)
+        self.document = document
+        self.lines = []
+        block = document.firstBlock()
+        while block.isValid():
+            self.lines.append(block.text())
+            block = block.next()
+        # Bumped on every text change (not on format-only changes)
+        self.revision = 0
+        # Each consumer's own dirty ranges; dropped when the consumer drops its subscription
+        self.subscriptions = weakref.WeakSet()
+        self._text = None
+        document.contentsChange.connect(self.on_contents_change)
+
+    @property
+    def line_count(self):
+        return len(self.lines)
+
+    def text(self):
+        """The full text, joined once per revision and shared by all readers"""
+        if self._text is None:
+            text = '\n'.join(self.lines)
+            # Soft line breaks (Shift+Enter) read as newlines, as in toPlainText()
+            self._text = text.replace('\u2028', '\n') if '\u2028' in text else text
+        return self._text
+
+    def subscribe(self):
+        """Dirty ranges for one consumer, starting with the whole document"""
+        subscription = DirtyRanges(len(self.lines))
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def on_contents_change(self, position, removed, added):
+        block = self.document.findBlock(position)
+        if not block.isValid():
+            block = self.document.lastBlock()
+        first = block.blockNumber()
+
+        # Walk the old lines to find where the removed span ended
+        old_last = first
+        remaining = position - block.position() + removed
+        while old_last < len(self.lines) - 1 and remaining > utf16_length(self.lines[old_last]):
+            remaining -= utf16_length(self.lines[old_last]) + 1
+            old_last += 1
+
+        end_block = self.document.findBlock(position + added)
+        if not end_block.isValid():
+            end_block = self.document.lastBlock()
+        new_last = max(first, end_block.blockNumber())
+
+        new_lines = []
+        block = self.document.findBlockByNumber(first)
+        for _ in range(new_last - first + 1):
+            new_lines.append(block.text())
+            block = block.next()
+        old_lines = self.lines[first:old_last + 1]
+        if new_lines == old_lines:
+            return  # Formatting only
+        self.lines[first:old_last + 1] = new_lines
+        self.lines_replaced.emit(first, old_lines, new_lines)
+        self.revision += 1
+        self._text = None
+        for subscription in self.subscriptions:
+            subscription.mark(first, old_last, new_last)
+        self.blocks_changed.emit(first, old_last, new_last)
@@ -0,0 +1,325 @@
+import re
+from bisect import bisect_left, bisect_right
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QLineEdit, QCheckBox, QPushButton, QLabel, QTextEdit
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
+from PyQt5.QtGui import QColor, QTextCharFormat, QTextCursor
+
+MATCH_BATCH_SIZE = 5000
+
+
+def compile_pattern(text, use_regex, match_case):
+    """Build the search regex, raising re.error for invalid patterns"""
+    flags = re.MULTILINE if match_case else re.MULTILINE | re.IGNORECASE
+    return re.compile(text if use_regex else re.escape(text), flags)
+
+
+class Utf16Mapper:
+    """Maps Python string indices to QTextDocument (UTF-16) positions"""
+
+    def __init__(self, text):
+        self.astral = [i for i, ch in enumerate(text) if ord(ch) > 0xFFFF] if not text.isascii() else []
+
+    def to_qt(self, index):
+        if not self.astral:
+            return index
+        return index + bisect_left(self.astral, index)
+
+
+class FindWorker(QThread):
+    """Scans a text snapshot and streams match positions back in batches"""
+
+    matches_found = pyqtSignal(int, list)
+    search_finished = pyqtSignal(int, int)
+
+    def __init__(self, generation, text, pattern, parent=None):
+        super().__init__(parent)
+        self.generation = generation
+        self.text = text
+        self.pattern = pattern
+
+    def run(self):
+        mapper = Utf16Mapper(self.text)
+        batch = []
+        total = 0
+        for match in self.pattern.finditer(self.text):
+            if match.end() == match.start():
+                continue  # Skip empty regex matches
+            start = mapper.to_qt(match.start())
+            batch.append((start, mapper.to_qt(match.end()) - start))
+            if len(batch) >= MATCH_BATCH_SIZE:
+                if self.isInterruptionRequested():
+                    return
+                self.matches_found.emit(self.generation, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.matches_found.emit(self.generation, batch)
+            total += len(batch)
+        self.search_finished.emit(self.generation, total)
+
+
+class FindReplaceBar(QWidget):
+    """Find/replace bar that searches off the GUI thread and highlights visible matches"""
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.generation = 0
+        self.worker = None
+        self.starts = []
+        self.lengths = []
+        self.pattern = None
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(4, 2, 4, 2)
+
+        self.find_input = QLineEdit()
+        self.find_input.setPlaceholderText("Find")
+        self.find_input.textChanged.connect(self.schedule_search)
+        self.find_input.returnPressed.connect(self.find_next)
+        layout.addWidget(self.find_input)
+
+        self.replace_input = QLineEdit()
+        self.replace_input.setPlaceholderText("Replace")
+        self.replace_input.returnPressed.connect(self.replace_current)
+        layout.addWidget(self.replace_input)
+
+        self.regex_check = QCheckBox("Regex")
+        self.regex_check.toggled.connect(self.schedule_search)
+        layout.addWidget(self.regex_check)
+
+        self.case_check = QCheckBox("Match case")
+        self.case_check.toggled.connect(self.schedule_search)
+        layout.addWidget(self.case_check)
+
+        buttons = [
+            ("Previous", self.find_previous),
+            ("Next", self.find_next),
+            ("Replace", self.replace_current),
+            ("Replace All", self.replace_all),
+            ("✕", self.close_bar),
+        ]
+        for label, callback in buttons:
+            button = QPushButton(label)
+            button.clicked.connect(callback)
+            layout.addWidget(button)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        # Re-run the search when typing stops or the document changes
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.timeout.connect(self.start_search)
+
+        self.match_format = QTextCharFormat()
+        self.match_format.setBackground(QColor(255, 210, 0, 110))
+        self.current_format = QTextCharFormat()
+        self.current_format.setBackground(QColor(255, 140, 0, 200))
+
+        self.hide()
+
+    @property
+    def editor(self):
+        return self.main_window.editor
+
+    def connect_editor(self, editor):
+        """Keep highlights in sync with an editor's scrolling and edits"""
+        editor.textChanged.connect(self.on_document_changed)
+        editor.verticalScrollBar().valueChanged.connect(self.update_highlights)
+        editor.cursorPositionChanged.connect(self.update_highlights)
+
+    def open_bar(self, replace=False):
+        """Show the bar, seeded with the current selection"""
+        selected = self.editor.textCursor().selectedText()
+        if selected and '\u2029' not in selected:
+            self.find_input.setText(selected)
+        self.show()
+        (self.replace_input if replace and self.find_input.text() else self.find_input).setFocus()
+        self.find_input.selectAll()
+        self.start_search()
+
+    def close_bar(self):
+        """Hide the bar and clear all highlights"""
+        self.cancel_search()
+        self.starts, self.lengths = [], []
+        self.editor.setExtraSelections([])
+        self.hide()
+        self.editor.setFocus()
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape:
+            self.close_bar()
+        else:
+            super().keyPressEvent(event)
+
+    def on_document_changed(self):
+        """Matches are stale after an edit; search again once typing pauses"""
+        if self.isVisible() and self.find_input.text():
+            self.search_timer.start(250)
+
+    def schedule_search(self):
+        self.search_timer.start(150)
+
+    def cancel_search(self):
+        """Invalidate and stop any running worker"""
+        self.generation += 1
+        if self.worker is not None:
+            if self.worker.isRunning():
+                self.worker.requestInterruption()
+                self.worker.finished.connect(self.worker.deleteLater)
+            else:
+                self.worker.deleteLater()
+            self.worker = None
+
+    def stop(self):
+        """Stop running searches, including cancelled ones still winding down, before the window goes away"""
+        self.cancel_search()
+        for worker in self.findChildren(FindWorker):
+            worker.requestInterruption()
+            worker.wait()
+
+    def start_search(self):
+        """Snapshot the document and scan it in a worker thread"""
+        self.search_timer.stop()
+        self.cancel_search()
+        self.starts, self.lengths = [], []
+        self.update_highlights()
+
+        needle = self.find_input.text()
+        if not needle:
+            self.pattern = None
+            self.status_label.clear()
+            return
+        try:
+            self.pattern = compile_pattern(needle, self.regex_check.isChecked(), self.case_check.isChecked())
+        except re.error as e:
+            self.pattern = None
+            self.status_label.setText(f"Invalid regex: {e}")
+            return
+
+        self.status_label.setText("Searching...")
+        self.worker = FindWorker(self.generation, self.editor.toPlainText(), self.pattern, self)
+        self.worker.matches_found.connect(self.on_matches_found)
+        self.worker.search_finished.connect(self.on_search_finished)
+        self.worker.start()
+
+    def on_matches_found(self, generation, batch):
+        """Append a streamed batch of (start, length) matches"""
+        if generation != self.generation:
+            return
+        for start, length in batch:
+            self.starts.append(start)
+            self.lengths.append(length)
+        self.status_label.setText(f"{len(self.starts)} matches...")
+        self.update_highlights()
+
+    def on_search_finished(self, generation, total):
+        if generation == self.generation:
+            self.status_label.setText(f"{total} match{'es' if total != 1 else ''}")
+
+    def update_highlights(self):
+        """Show extra selections for the matches inside the viewport only"""
+        if not self.isVisible():
+            return
+        editor = self.editor
+        if not self.starts:
+            editor.setExtraSelections([])
+            return
+        viewport = editor.viewport().rect()
+        first = editor.cursorForPosition(viewport.topLeft()).block().position()
+        last_block = editor.cursorForPosition(viewport.bottomRight()).block()
+        last = last_block.position() + last_block.length()
+
+        current = editor.textCursor()
+        selections = []
+        for i in range(bisect_left(self.starts, first), bisect_right(self.starts, last)):
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = QTextCursor(editor.document())
+            selection.cursor.setPosition(self.starts[i])
+            selection.cursor.setPosition(self.starts[i] + self.lengths[i], QTextCursor.KeepAnchor)
+            is_current = (current.selectionStart() == self.starts[i]
+                          and current.selectionEnd() == self.starts[i] + self.lengths[i])
+            selection.format = self.current_format if is_current else self.match_format
+            selections.append(selection)
+        editor.setExtraSelections(selections)
+
+    def select_match(self, index):
+        """Select match number index in the editor"""
+        cursor = self.editor.textCursor()
+        cursor.setPosition(self.starts[index])
+        cursor.setPosition(self.starts[index] + self.lengths[index], QTextCursor.KeepAnchor)
+        self.editor.setTextCursor(cursor)
+        self.editor.centerCursor()
+        self.status_label.setText(f"{index + 1} of {len(self.starts)}")
+
+    def find_next(self):
+        if not self.isVisible():
+            self.open_bar()
+            return
+        if not self.starts:
+            return
+        index = bisect_left(self.starts, self.editor.textCursor().selectionEnd())
+        self.select_match(index % len(self.starts))
+
+    def find_previous(self):
+        if not self.starts:
+            return
+        index = bisect_left(self.starts, self.editor.textCursor().selectionStart()) - 1
+        self.select_match(index % len(self.starts))
+
+    def replace_current(self):
+        """Replace the selected match and move to the next one"""
+        cursor = self.editor.textCursor()
+        if self.pattern is None or not cursor.hasSelection():
+            self.find_next()
+            return
+        selected = cursor.selectedText().replace('\u2029', '\n')
+        match = self.pattern.fullmatch(selected)
+        if match is None:
+            self.find_next()
+            return
+        cursor.insertText(match.expand(self.replacement_template()))
+        self.find_next()
+
+    def replacement_template(self):
+        """Replacement string with backreferences only in regex mode"""
+        replacement = self.replace_input.text()
+        return replacement if self.regex_check.isChecked() else replacement.replace('\\', '\\\\')
+
+    def replace_all(self):
+        """Replace every match as a single undoable edit"""
+        if self.pattern is None:
+            return
+        self.cancel_search()
+        text = self.editor.toPlainText()
+        template = self.replacement_template()
+
+        pieces = []
+        first = last = None
+        count = 0
+        for match in self.pattern.finditer(text):
+            if match.end() == match.start():
+                continue
+            if first is None:
+                first = match.start()
+            else:
+                pieces.append(text[last:match.start()])
+            pieces.append(match.expand(template))
+            last = match.end()
+            count += 1
+        if not count:
+            self.status_label.setText("No matches")
+            return
+
+        # One insertText over the span covering all matches keeps undo and layout cheap
+        mapper = Utf16Mapper(text)
+        cursor = self.editor.textCursor()
+        cursor.beginEditBlock()
+        cursor.setPosition(mapper.to_qt(first))
+        cursor.setPosition(mapper.to_qt(last), QTextCursor.KeepAnchor)
+        cursor.insertText(''.join(pieces))
+        cursor.endEditBlock()
+
+        self.main_window.status_bar.showMessage(f"Replaced {count} match{'es' if count != 1 else ''}", 3000)
+        self.start_search()
@@ -0,0 +1,96 @@
+import os
+import re
+from PyQt5.QtCore import QObject, QStringListModel, Qt
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtWidgets import QCompleter
+
+from editor.document_tracker import utf16_length
+from handlers.completion_index import heading_anchors
+from utils import MARKDOWN_EXTENSIONS, IMAGE_EXTENSIONS
+
+# [text]( or ![alt]( followed by the target typed so far, up to the cursor
+LINK_CONTEXT_RE = re.compile(r'(!?)\[[^\]]*\]\(\s*<?([^)\s>]*)$')
+MAX_SUGGESTIONS = 50
+
+
+class LinkCompleter(QObject):
+    """Suggests link targets, image paths and heading anchors while a link target is typed"""
+
+    def __init__(self, tab, main_window):
+        super().__init__(tab.editor)
+        self.tab = tab
+        self.editor = tab.editor
+        self.main_window = main_window
+        self.model = QStringListModel(self)
+        self.completer = QCompleter(self.model, self)
+        self.completer.setWidget(self.editor)
+        # Suggestions are already filtered by the index
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.completer.activated[str].connect(self.insert_completion)
+        # What the suggestions replace: the target typed so far
+        self.prefix = ""
+        # path -> (mtime_ns, anchors) of other documents completed after "file.md#"
+        self.anchor_cache = {}
+
+    def popup_visible(self):
+        return self.completer.popup().isVisible()
+
+    def update(self):
+        """Show suggestions if the cursor is in a link target, hide them otherwise"""
+        cursor = self.editor.textCursor()
+        match = None
+        if not cursor.hasSelection():
+            match = LINK_CONTEXT_RE.search(cursor.block().text()[:cursor.positionInBlock()])
+        suggestions = self.suggestions(match.group(2), bool(match.group(1))) if match else []
+        if not suggestions:
+            self.completer.popup().hide()
+            return
+        self.prefix = match.group(2)
+        self.model.setStringList(suggestions)
+        popup = self.completer.popup()
+        popup.setCurrentIndex(self.model.index(0, 0))
+        rect = self.editor.cursorRect()
+        rect.setWidth(popup.sizeHintForColumn(0) + popup.verticalScrollBar().sizeHint().width())
+        self.completer.complete(rect)
+
+    def suggestions(self, typed, is_image):
+        if '#' in typed:
+            file_part, anchor = typed.split('#', 1)
+            return [f"{file_part}#{name}" for name in self.anchors(file_part)
+                    if name.startswith(anchor.lower())][:MAX_SUGGESTIONS]
+        extensions = IMAGE_EXTENSIONS if is_image else MARKDOWN_EXTENSIONS + IMAGE_EXTENSIONS
+        current_file = self.tab.current_file
+        base_dir = os.path.dirname(os.path.abspath(current_file)) if current_file else None
+        paths = self.main_window.completion_index.complete(typed, base_dir, extensions, MAX_SUGGESTIONS)
+        image_handler = self.main_window.image_handler
+        return [image_handler.get_relative_image_path(path, current_file).replace(os.sep, '/') for path in paths]
+
+    def anchors(self, file_part):
+        """Heading anchors of this document, or of the document file_part names"""
+        if not file_part:
+            lines = self.tab.tracker.lines
+            return [name for name, _ in heading_anchors(lines[block] for block in self.tab.stats.outline())]
+        if not self.tab.current_file or not file_part.lower().endswith(MARKDOWN_EXTENSIONS):
+            return []
+        path = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(self.tab.current_file)), file_part))
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return []
+        cached = self.anchor_cache.get(path)
+        if cached is None or cached[0] != mtime:
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as file:
+                    cached = (mtime, [name for name, _ in heading_anchors(file.read().split('\n'))])
+            except OSError:
+                return []
+            self.anchor_cache[path] = cached
+        return cached[1]
+
+    def insert_completion(self, text):
+        """Replace the typed target with the chosen suggestion"""
+        cursor = self.editor.textCursor()
+        cursor.movePosition(QTextCursor.Left, QTextCursor.KeepAnchor, utf16_length(self.prefix))
+        cursor.insertText(text)
+        self.editor.setTextCursor(cursor)
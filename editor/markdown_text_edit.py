@@ -1,7 +1,37 @@
 import os
 import sys
-from PyQt5.QtWidgets import QPlainTextEdit
-from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QPlainTextEdit, QWidget, QToolTip
+from PyQt5.QtCore import Qt, QRect, QSize, QEvent
+from PyQt5.QtGui import QFont, QPainter, QColor, QKeySequence
+
+from editor.paste_handler import PasteHandler, LARGE_PASTE_CHARS, fence_code, has_rich_structure
+
+GUTTER_WIDTH = 14
+
+class LinkGutter(QWidget):
+    """Narrow margin left of the editor that marks lines with broken links"""
+    
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.setMouseTracking(True)
+    
+    def sizeHint(self):
+        return QSize(GUTTER_WIDTH, 0)
+    
+    def paintEvent(self, event):
+        self.editor.paint_gutter(event)
+    
+    def event(self, event):
+        if event.type() == QEvent.ToolTip:
+            block = self.editor.cursorForPosition(event.pos()).block()
+            targets = self.editor.link_problems.get(block.blockNumber())
+            if targets:
+                QToolTip.showText(event.globalPos(), "Broken link: " + ", ".join(targets), self)
+            else:
+                QToolTip.hideText()
+            return True
+        return super().event(event)
 
 class MarkdownTextEdit(QPlainTextEdit):
     """Custom text edit that handles image pasting"""
@@ -19,20 +49,131 @@ class MarkdownTextEdit(QPlainTextEdit):
         font.setPointSize(11)
         font.setFamily("Consolas, Monaco, 'Courier New', monospace")
         self.setFont(font)
+        
+        # Gutter for broken link markers
+        self.link_problems = {}
+        self.gutter = LinkGutter(self)
+        self.setViewportMargins(GUTTER_WIDTH, 0, 0, 0)
+        self.updateRequest.connect(self.update_gutter)
+        
+        # Bounded UndoHistory set by DocumentTab; Qt's own undo stack is disabled
+        self.history = None
+        self.paste_handler = PasteHandler(self)
+        # LinkCompleter set by DocumentTab
+        self.link_completer = None
+
+    def undo(self):
+        if self.history is not None:
+            self.history.undo()
+        else:
+            super().undo()
+
+    def redo(self):
+        if self.history is not None:
+            self.history.redo()
+        else:
+            super().redo()
+
+    def contextMenuEvent(self, event):
+        """Standard menu, with Undo and Redo acting on the bounded history"""
+        menu = self.createStandardContextMenu(event.pos())
+        if self.history is not None:
+            handlers = {"edit-undo": (self.undo, self.history.can_undo()),
+                        "edit-redo": (self.redo, self.history.can_redo())}
+            for action in menu.actions():
+                if action.objectName() in handlers:
+                    slot, enabled = handlers[action.objectName()]
+                    # Drop the connection to Qt's disabled undo stack
+                    action.triggered.disconnect()
+                    action.triggered.connect(slot)
+                    action.setEnabled(enabled)
+        menu.exec_(event.globalPos())
+        menu.deleteLater()
+
+    def keyPressEvent(self, event):
+        """Route the undo/redo shortcuts to the bounded history and keys to link completion"""
+        completer = self.link_completer
+        if (completer is not None and completer.popup_visible()
+                and event.key() in (Qt.Key_Enter, Qt.Key_Return, Qt.Key_Tab, Qt.Key_Backtab, Qt.Key_Escape)):
+            # Left to the completer's popup
+            event.ignore()
+            return
+        if event.matches(QKeySequence.Undo):
+            self.undo()
+        elif event.matches(QKeySequence.Redo):
+            self.redo()
+        else:
+            super().keyPressEvent(event)
+            if completer is not None and (event.text() or completer.popup_visible()):
+                completer.update()
+
+    def set_link_problems(self, problems):
+        """Set {block_number: [broken targets]} and repaint the gutter"""
+        if problems != self.link_problems:
+            self.link_problems = problems
+            self.gutter.update()
+
+    def update_gutter(self, rect, dy):
+        """Keep the gutter in step with scrolling and repaints"""
+        if dy:
+            self.gutter.scroll(0, dy)
+        else:
+            self.gutter.update(0, rect.y(), self.gutter.width(), rect.height())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        contents = self.contentsRect()
+        self.gutter.setGeometry(QRect(contents.left(), contents.top(), GUTTER_WIDTH, contents.height()))
+
+    def paint_gutter(self, event):
+        """Draw a red dot next to every visible line with a broken link"""
+        painter = QPainter(self.gutter)
+        painter.fillRect(event.rect(), self.palette().base())
+        if not self.link_problems:
+            return
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(215, 58, 73))
+        
+        block = self.firstVisibleBlock()
+        top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
+        bottom_limit = event.rect().bottom()
+        while block.isValid() and top <= bottom_limit:
+            height = self.blockBoundingRect(block).height()
+            if block.isVisible() and block.blockNumber() in self.link_problems:
+                line_height = self.fontMetrics().height()
+                size = 8
+                painter.drawEllipse(int((GUTTER_WIDTH - size) / 2), int(top + (line_height - size) / 2), size, size)
+            top += height
+            block = block.next()
 
     def insertFromMimeData(self, mime_data):
-        """Override paste to handle images"""
+        """Override paste to handle images, rich text, code blocks and very large text"""
         if mime_data.hasImage():
             image = mime_data.imageData()
             if not image.isNull():
                 # Save image and insert markdown
                 saved_path = self.parent_window.image_handler.save_clipboard_image(image)
                 if saved_path:
+                    self.parent_window.completion_index.add(os.path.abspath(saved_path))
                     alt_name = os.path.splitext(os.path.basename(saved_path))[0]
                     markdown_image = f"![{alt_name}]({saved_path})\n"
                     self.textCursor().insertText(markdown_image)
                 return
         
-        # Default text paste behavior
+        paste_as_code = self.parent_window.paste_as_code
+        if mime_data.hasHtml() and self.parent_window.paste_rich_text and not paste_as_code:
+            html = mime_data.html()
+            if has_rich_structure(html):
+                self.parent_window.status_bar.showMessage("Converting pasted text to Markdown...", 2000)
+                self.paste_handler.paste_html(html, mime_data.text())
+                return
 
-        super().insertFromMimeData(mime_data)
+        text = mime_data.text() if mime_data.hasText() else ""
+        if paste_as_code and text:
+            self.paste_handler.insert_text(fence_code(text, self.textCursor().atBlockStart()))
+        elif text and len(text) >= LARGE_PASTE_CHARS:
+            self.paste_handler.insert_text(text)
+        else:
+            # Default text paste behavior
+            super().insertFromMimeData(mime_data)
@@ -0,0 +1,108 @@
+import re
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QTextCursor
+
+from converter.html_to_markdown import html_to_markdown
+
+# Pastes at least this long are inserted without repaints or per-edit signals
+LARGE_PASTE_CHARS = 256 * 1024
+# Clipboard HTML worth converting; plain text wrapped in <span>s and <p>s is pasted as text
+RICH_TAG_RE = re.compile(r'<(?:h[1-6]|ul|ol|table|a|strong|b|em|i|img|blockquote|pre|code)\b', re.I)
+BACKTICK_RUN_RE = re.compile(r'`{3,}')
+
+
+def fence_code(text, at_block_start=True):
+    """Wrap text in a code fence longer than any backtick run inside it"""
+    longest = max((len(run) for run in BACKTICK_RUN_RE.findall(text)), default=2)
+    fence = '`' * (longest + 1)
+    prefix = '' if at_block_start else '\n'
+    body = text.rstrip('\n')
+    return f"{prefix}{fence}\n{body}\n{fence}\n"
+
+
+def has_rich_structure(html):
+    return RICH_TAG_RE.search(html) is not None
+
+
+class HtmlPasteSignals(QObject):
+    converted = pyqtSignal(int, str)
+    failed = pyqtSignal(int, str)
+
+
+class HtmlPasteJob(QRunnable):
+    """Converts pasted HTML to Markdown on a pool thread"""
+
+    def __init__(self, job_id, html, signals):
+        super().__init__()
+        self.job_id = job_id
+        self.html = html
+        self.signals = signals
+
+    def run(self):
+        try:
+            markdown = html_to_markdown(self.html)
+        except Exception as e:
+            # An exception escaping QRunnable.run aborts the application; paste plain text instead
+            self.signals.failed.emit(self.job_id, str(e))
+            return
+        self.signals.converted.emit(self.job_id, markdown)
+
+
+class PasteHandler(QObject):
+    """Inserts pastes into one editor: large text as a single unrepainted edit,
+    rich HTML converted to Markdown off the GUI thread"""
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.signals = HtmlPasteSignals(self)
+        self.signals.converted.connect(self.on_converted)
+        self.signals.failed.connect(self.on_failed)
+        self.next_id = 0
+        # job id -> (cursor at the paste point, plain text to paste if conversion fails)
+        self.pending = {}
+
+    def insert_text(self, text, cursor=None):
+        """Insert text at cursor (default: the editor's) and move the editor's cursor after it"""
+        editor = self.editor
+        if cursor is None:
+            cursor = editor.textCursor()
+        if len(text) < LARGE_PASTE_CHARS:
+            cursor.insertText(text)
+        else:
+            # Listeners (preview, find highlights, link check, status bar) hear about it once, afterwards
+            viewport = editor.viewport()
+            editor.blockSignals(True)
+            viewport.setUpdatesEnabled(False)
+            try:
+                cursor.beginEditBlock()
+                cursor.insertText(text)
+                cursor.endEditBlock()
+            finally:
+                editor.blockSignals(False)
+                viewport.setUpdatesEnabled(True)
+            editor.textChanged.emit()
+        editor.setTextCursor(cursor)
+        editor.ensureCursorVisible()
+
+    def paste_html(self, html, fallback_text):
+        """Replace the selection with the Markdown form of html once it is converted"""
+        cursor = self.editor.textCursor()
+        cursor.removeSelectedText()
+        self.next_id += 1
+        # The cursor moves with edits made while the conversion runs
+        self.pending[self.next_id] = (QTextCursor(cursor), fallback_text)
+        self.pool.start(HtmlPasteJob(self.next_id, html, self.signals))
+
+    def on_converted(self, job_id, markdown):
+        cursor, _ = self.pending.pop(job_id, (None, None))
+        if cursor is not None:
+            self.insert_text(markdown, cursor)
+
+    def on_failed(self, job_id, message):
+        print(f"HTML paste conversion failed: {message}")
+        cursor, fallback_text = self.pending.pop(job_id, (None, None))
+        if cursor is not None and fallback_text:
+            self.insert_text(fallback_text, cursor)
@@ -1,5 +1,6 @@
-from PyQt5.QtCore import QUrl
-from PyQt5.QtWebEngineWidgets import QWebEngineView
+import json
+from PyQt5.QtCore import QUrl, QThread, QCoreApplication, pyqtSignal
+from PyQt5.QtGui import QTextDocument
 from PyQt5.QtWidgets import QTextBrowser
 
 try:
@@ -7,24 +8,76 @@ try:
     WEB_ENGINE_AVAILABLE = True
 except ImportError:
     WEB_ENGINE_AVAILABLE = False
-    from PyQt5.QtWidgets import QTextBrowser
 
 from pathlib import Path
 
+
+class LiteDocumentBuilder(QThread):
+    """Parses markdown into a QTextDocument off the GUI thread for the lite preview"""
+
+    document_ready = pyqtSignal(object)
+
+    def __init__(self, text, css, base_url, parent=None):
+        super().__init__(parent)
+        self.text = text
+        self.css = css
+        self.base_url = base_url
+
+    def run(self):
+        # Not attached to a widget yet, so parsing does no layout
+        document = QTextDocument()
+        document.setDefaultStyleSheet(self.css)
+        document.setBaseUrl(self.base_url)
+        document.setMarkdown(self.text)
+        document.moveToThread(QCoreApplication.instance().thread())
+        self.document_ready.emit(document)
+
+
 class PreviewHandler:
     """Handles the preview pane functionality"""
     
-    def __init__(self, main_window):
+    def __init__(self, main_window, lite=False):
         self.main_window = main_window
+        # Lite mode renders natively in a QTextBrowser instead of a Chromium process
+        self.lite = lite or not WEB_ENGINE_AVAILABLE
+        # Lite documents are built one at a time; only the newest waiting text is kept
+        self.builder = None
+        self.pending_markdown = None
+        # Bumped whenever the lite preview is given new content; stale documents are dropped
+        self.generation = 0
         self.create_widget()
         
     def create_widget(self):
-        """Create the preview widget based on available libraries"""
-        if WEB_ENGINE_AVAILABLE:
+        """Create the preview widget for the current mode"""
+        if not self.lite:
             self.widget = QWebEngineView()
+            self.widget.loadFinished.connect(self.main_window.render_tracer.load_finished)
         else:
             self.widget = QTextBrowser()
             self.widget.setOpenExternalLinks(True)
+            self.apply_lite_style()
+    
+    def set_lite_mode(self, lite) -> bool:
+        """Swap the preview widget at runtime; returns True if the mode changed"""
+        lite = lite or not WEB_ENGINE_AVAILABLE
+        if lite == self.lite:
+            return False
+        old_widget = self.widget
+        self.lite = lite
+        self.create_widget()
+        splitter = old_widget.parentWidget()
+        if splitter is not None:
+            sizes = splitter.sizes()
+            splitter.replaceWidget(splitter.indexOf(old_widget), self.widget)
+            splitter.setSizes(sizes)
+        # Deleting the web view lets its renderer process go
+        old_widget.deleteLater()
+        return True
+    
+    def apply_lite_style(self):
+        """Trimmed stylesheet for HTML shown in lite mode; colors come from the palette"""
+        if self.lite:
+            self.widget.document().setDefaultStyleSheet(self.main_window.converter.get_lite_css())
     
     def update_preview(self, markdown_text):
         """Update the preview pane with rendered HTML"""
@@ -32,8 +85,77 @@ class PreviewHandler:
             html = self.main_window.converter.get_preview_template("Preview will appear here...")
         else:
             html = self.main_window.converter.convert_markdown_to_html(markdown_text)
-        
-        if WEB_ENGINE_AVAILABLE:
-            self.widget.setHtml(html, baseUrl=QUrl.fromLocalFile(str(Path.cwd())))
+        self.show_html(html)
+    
+    def base_url(self):
+        """Resolve relative links against the document's folder (cwd for unsaved documents)"""
+        current_file = self.main_window.current_file
+        folder = Path(current_file).resolve().parent if current_file else Path.cwd()
+        # Trailing slash so the folder itself is the base, not its parent
+        return QUrl.fromLocalFile(folder.as_posix() + '/')
+    
+    def show_html(self, html) -> bool:
+        """Display already rendered HTML; returns True if loading finishes asynchronously"""
+        if not self.lite:
+            self.widget.setHtml(html, baseUrl=self.base_url())
+            return True
         else:
-            self.widget.setHtml(html)
\ No newline at end of file
+            self.generation += 1
+            self.pending_markdown = None
+            self.widget.document().setBaseUrl(self.base_url())
+            self.widget.setHtml(html)
+            return False
+    
+    def set_theme_css(self, css) -> bool:
+        """Swap the stylesheet of the loaded page in place; False if the widget cannot"""
+        if self.lite:
+            return False
+        script = f"(function(css){{var s=document.querySelector('style');if(s)s.textContent=css;}})({json.dumps(css)})"
+        self.widget.page().runJavaScript(script)
+        return True
+    
+    def show_markdown(self, markdown_text, shown=None):
+        """Lite mode: render with Qt's own markdown support, skipping HTML conversion.
+
+        The document is parsed in a background thread; shown() is called once it is displayed.
+        """
+        self.generation += 1
+        if self.builder is not None and self.builder.isRunning():
+            self.pending_markdown = (markdown_text, shown)
+            return
+        generation = self.generation
+        self.builder = LiteDocumentBuilder(markdown_text, self.main_window.converter.get_lite_css(),
+                                           self.base_url(), self.main_window)
+        self.builder.document_ready.connect(lambda document: self.on_document_ready(document, shown, generation))
+        self.builder.finished.connect(self.build_pending)
+        self.builder.start()
+
+    def on_document_ready(self, document, shown, generation):
+        """Swap the parsed document into the lite preview, keeping the scroll position"""
+        if not self.lite or generation != self.generation:
+            document.deleteLater()  # Mode switched, or superseded by newer content
+            return
+        scroll_bar = self.widget.verticalScrollBar()
+        position = scroll_bar.value()
+        old_document = self.widget.document()
+        # The widget deletes its own initial document; earlier lite documents are ours to delete
+        owned = old_document.parent() is self.widget
+        self.widget.setDocument(document)
+        document.setParent(self.widget)
+        if owned:
+            old_document.deleteLater()
+        scroll_bar.setValue(position)
+        if shown is not None:
+            shown()
+
+    def build_pending(self):
+        if self.pending_markdown is not None:
+            markdown_text, shown = self.pending_markdown
+            self.pending_markdown = None
+            self.show_markdown(markdown_text, shown)
+
+    def stop(self):
+        """Wait for a running lite build, e.g. on shutdown"""
+        self.pending_markdown = None
+        if self.builder is not None and self.builder.isRunning():
+            self.builder.wait()
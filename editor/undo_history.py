@@ -0,0 +1,181 @@
+import time
+import zlib
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QTextCursor
+
+from editor.document_tracker import utf16_length
+from handlers.merge import changed_region
+
+DEFAULT_BUDGET_BYTES = 32 * 1024 * 1024
+# Newest entries stay uncompressed so undoing recent typing is instant
+RAW_ENTRIES = 64
+# Typing in one line within this many seconds undoes as one step
+COALESCE_SECONDS = 1.0
+# Rough per-line cost of a str on top of its characters
+LINE_OVERHEAD = 50
+
+
+def pack_lines(lines):
+    return zlib.compress('\n'.join(lines).encode('utf-8', 'surrogatepass'), 1)
+
+
+def unpack_lines(data):
+    return zlib.decompress(data).decode('utf-8', 'surrogatepass').split('\n')
+
+
+class UndoEntry:
+    """One undo step: block first's lines before (old) and after (new) the edit"""
+
+    __slots__ = ('first', 'old', 'new', 'time', 'packed')
+
+    def __init__(self, first, old, new):
+        self.first = first
+        self.old = old
+        self.new = new
+        self.time = time.monotonic()
+        self.packed = False
+
+    def compress(self):
+        if not self.packed:
+            self.old = pack_lines(self.old)
+            self.new = pack_lines(self.new)
+            self.packed = True
+
+    def lines(self):
+        """(old lines, new lines)"""
+        if self.packed:
+            return unpack_lines(self.old), unpack_lines(self.new)
+        return self.old, self.new
+
+    @property
+    def size(self):
+        """Approximate bytes held"""
+        if self.packed:
+            return len(self.old) + len(self.new)
+        return sum(len(line) + LINE_OVERHEAD for line in self.old) + sum(len(line) + LINE_OVERHEAD for line in self.new)
+
+
+class UndoHistory(QObject):
+    """Undo/redo built from the tracker's line deltas, replacing Qt's unbounded undo stack.
+
+    Adjacent typing in one line is coalesced, entries past the newest few are
+    zlib-compressed and the oldest are dropped once the memory budget is hit.
+    """
+
+    changed = pyqtSignal()
+
+    def __init__(self, editor, tracker, budget_bytes=DEFAULT_BUDGET_BYTES, parent=None):
+        super().__init__(parent)
+        self.editor = editor
+        self.budget_bytes = budget_bytes
+        self.undo_stack = []
+        self.redo_stack = []
+        self.total = 0
+        # Set while undo/redo edit the document, so those edits are not recorded
+        self.applying = False
+        # Typing after an undo or redo starts a new step
+        self.sealed = False
+        editor.setUndoRedoEnabled(False)
+        tracker.lines_replaced.connect(self.on_lines_replaced)
+
+    @property
+    def memory(self):
+        return self.total
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def clear(self):
+        self.undo_stack = []
+        self.redo_stack = []
+        self.total = 0
+        self.changed.emit()
+
+    def on_lines_replaced(self, first, old, new):
+        if self.applying:
+            return
+        for entry in self.redo_stack:
+            self.total -= entry.size
+        self.redo_stack = []
+        top = self.undo_stack[-1] if self.undo_stack else None
+        if top is not None and not self.sealed and self.coalesces(top, first, old, new):
+            self.total -= top.size
+            top.new = new
+            top.time = time.monotonic()
+            self.total += top.size
+        else:
+            entry = UndoEntry(first, old, new)
+            self.undo_stack.append(entry)
+            self.sealed = False
+            self.total += entry.size
+            if len(self.undo_stack) > RAW_ENTRIES:
+                old_entry = self.undo_stack[-RAW_ENTRIES - 1]
+                if not old_entry.packed:
+                    self.total -= old_entry.size
+                    old_entry.compress()
+                    self.total += old_entry.size
+        self.trim()
+        self.changed.emit()
+
+    @staticmethod
+    def coalesces(top, first, old, new):
+        """True for more typing in the line the top entry already covers"""
+        return (not top.packed and top.first == first and len(top.new) == len(top.old) == 1
+                and len(old) == len(new) == 1 and top.new[0] == old[0]
+                and abs(len(new[0]) - len(old[0])) <= 1
+                and time.monotonic() - top.time < COALESCE_SECONDS)
+
+    def trim(self):
+        """Drop the oldest entries until the history fits the budget"""
+        dropped = 0
+        while self.total > self.budget_bytes and dropped < len(self.undo_stack) - 1:
+            self.total -= self.undo_stack[dropped].size
+            dropped += 1
+        if dropped:
+            del self.undo_stack[:dropped]
+
+    def set_budget(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.trim()
+        self.changed.emit()
+
+    def undo(self):
+        if self.undo_stack:
+            entry = self.undo_stack.pop()
+            old, new = entry.lines()
+            self.apply(entry.first, new, old)
+            self.redo_stack.append(entry)
+            self.sealed = True
+            self.changed.emit()
+
+    def redo(self):
+        if self.redo_stack:
+            entry = self.redo_stack.pop()
+            old, new = entry.lines()
+            self.apply(entry.first, old, new)
+            self.undo_stack.append(entry)
+            self.sealed = True
+            self.changed.emit()
+
+    def apply(self, first, current, replacement):
+        """Replace the current lines at block first and put the cursor after the changed part"""
+        document = self.editor.document()
+        start_block = document.findBlockByNumber(first)
+        end_block = document.findBlockByNumber(first + len(current) - 1)
+        current_text = '\n'.join(current)
+        replacement_text = '\n'.join(replacement)
+        start = start_block.position()
+        cursor = QTextCursor(document)
+        cursor.setPosition(start)
+        cursor.setPosition(end_block.position() + end_block.length() - 1, QTextCursor.KeepAnchor)
+        self.applying = True
+        try:
+            cursor.insertText(replacement_text)
+        finally:
+            self.applying = False
+        _, _, changed_end = changed_region(current_text, replacement_text)
+        cursor.setPosition(start + utf16_length(replacement_text[:changed_end]))
+        self.editor.setTextCursor(cursor)
@@ -0,0 +1,282 @@
+import os
+import re
+import threading
+from PyQt5.QtCore import QThread, pyqtSignal
+from markdown.extensions.toc import slugify, unique
+
+from handlers.link_checker import FENCE_RE
+from handlers.workspace_scanner import scan_directory
+from utils import MARKDOWN_EXTENSIONS, IMAGE_EXTENSIONS
+
+HEADING_TEXT_RE = re.compile(r'^ {0,3}#{1,6}\s+(.*?)(?:\s+#+)?\s*$')
+
+
+class TrieNode:
+    __slots__ = ('label', 'children', 'values')
+
+    def __init__(self, label=''):
+        self.label = label
+        self.children = None  # first character of the child's label -> child
+        self.values = None
+
+
+class PrefixTrie:
+    """Radix trie from lower-cased keys to sets of values, with bounded prefix queries.
+
+    Edges carry whole key fragments, so the node count stays proportional
+    to the number of keys rather than their total length.
+    """
+
+    def __init__(self):
+        self.root = TrieNode()
+        self.size = 0
+
+    def insert(self, key, value):
+        node = self.root
+        i = 0
+        while i < len(key):
+            child = node.children.get(key[i]) if node.children else None
+            if child is None:
+                child = TrieNode(key[i:])
+                if node.children is None:
+                    node.children = {}
+                node.children[key[i]] = child
+                node = child
+                break
+            label = child.label
+            common = 0
+            limit = min(len(label), len(key) - i)
+            while common < limit and label[common] == key[i + common]:
+                common += 1
+            if common < len(label):
+                # Split the edge where the new key leaves it
+                middle = TrieNode(label[:common])
+                child.label = label[common:]
+                middle.children = {child.label[0]: child}
+                node.children[key[i]] = middle
+                child = middle
+            node = child
+            i += common
+        if node.values is None:
+            node.values = set()
+        if value not in node.values:
+            node.values.add(value)
+            self.size += 1
+
+    def remove(self, key, value):
+        path = [self.root]
+        node = self.root
+        i = 0
+        while i < len(key):
+            child = node.children.get(key[i]) if node.children else None
+            if child is None or not key.startswith(child.label, i):
+                return
+            node = child
+            path.append(node)
+            i += len(child.label)
+        if not node.values or value not in node.values:
+            return
+        node.values.discard(value)
+        self.size -= 1
+        if node.values:
+            return
+        node.values = None
+        # Prune empty leaves, then merge a remaining single-child node into its child
+        while len(path) > 1 and node.values is None and not node.children:
+            path.pop()
+            parent = path[-1]
+            del parent.children[node.label[0]]
+            if not parent.children:
+                parent.children = None
+            node = parent
+        if len(path) > 1 and node.values is None and node.children and len(node.children) == 1:
+            (only,) = node.children.values()
+            only.label = node.label + only.label
+            path[-2].children[node.label[0]] = only
+
+    def complete(self, prefix, limit=50):
+        """Up to limit values whose key starts with prefix, in key order"""
+        node = self.root
+        i = 0
+        while i < len(prefix):
+            child = node.children.get(prefix[i]) if node.children else None
+            if child is None:
+                return []
+            rest = prefix[i:]
+            if rest.startswith(child.label):
+                i += len(child.label)
+            elif not child.label.startswith(rest):
+                return []
+            else:
+                i = len(prefix)
+            node = child
+        results = []
+        stack = [node]
+        while stack and len(results) < limit:
+            node = stack.pop()
+            if node.values:
+                results.extend(sorted(node.values)[:limit - len(results)])
+            if node.children:
+                stack.extend(node.children[c] for c in sorted(node.children, reverse=True))
+        return results
+
+
+def is_completable(name):
+    return name.lower().endswith(MARKDOWN_EXTENSIONS + IMAGE_EXTENSIONS)
+
+
+def iter_completable_files(root):
+    """Absolute paths of the markdown files and images below root"""
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        listing = scan_directory(folder)
+        if listing is None:
+            continue
+        folders, files = listing
+        stack.extend(os.path.join(folder, name) for name in folders)
+        for name in files:
+            yield os.path.join(folder, name)
+
+
+class CompletionIndex:
+    """Markdown files and images of the workspace and the image folder, by path and by file name"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.roots = ()
+        self.files = set()
+        # Folder -> paths of its indexed files, so one folder's listing is compared without a full scan
+        self.folders = {}
+        # Lower-cased absolute path -> path, for typed relative paths
+        self.paths = PrefixTrie()
+        # Lower-cased file name -> path, for typing just a name
+        self.names = PrefixTrie()
+        # ('add' or 'remove', path) lists of the builds in progress, replayed onto their results
+        self.journals = []
+
+    def build(self, roots, should_stop=lambda: False):
+        """Fresh (files, folders, paths trie, names trie, journal) for roots; runs off the GUI thread"""
+        journal = []
+        with self.lock:
+            self.journals.append(journal)
+        built = CompletionIndex()
+        for root in roots:
+            for path in iter_completable_files(root):
+                if should_stop():
+                    with self.lock:
+                        self.journals.remove(journal)
+                    return None
+                built.insert_path(path)
+        return built.files, built.folders, built.paths, built.names, journal
+
+    def replace(self, roots, built):
+        """Swap in a build, then redo the changes made while it was listing the folders"""
+        with self.lock:
+            self.roots = roots
+            self.files, self.folders, self.paths, self.names, journal = built
+            if journal in self.journals:
+                self.journals.remove(journal)
+            for action, path in journal:
+                if action == 'add':
+                    self.insert_path(path)
+                else:
+                    self.discard_path(path)
+
+    def insert_path(self, path):
+        """Index path; the caller holds the lock"""
+        if path in self.files:
+            return
+        self.files.add(path)
+        self.folders.setdefault(os.path.dirname(path), set()).add(path)
+        self.paths.insert(path.lower(), path)
+        self.names.insert(os.path.basename(path).lower(), path)
+
+    def discard_path(self, path):
+        """Drop path from the index; the caller holds the lock"""
+        if path not in self.files:
+            return
+        self.files.discard(path)
+        folder = os.path.dirname(path)
+        self.folders[folder].discard(path)
+        if not self.folders[folder]:
+            del self.folders[folder]
+        self.paths.remove(path.lower(), path)
+        self.names.remove(os.path.basename(path).lower(), path)
+
+    def add(self, path):
+        if not is_completable(path):
+            return
+        with self.lock:
+            for journal in self.journals:
+                journal.append(('add', path))
+            self.insert_path(path)
+
+    def remove(self, path):
+        with self.lock:
+            for journal in self.journals:
+                journal.append(('remove', path))
+            self.discard_path(path)
+
+    def update_folder(self, folder, listing):
+        """Apply a fresh listing of one folder (from the workspace tree's scanner)"""
+        if listing is None or not any(folder == root or folder.startswith(os.path.join(root, ''))
+                                      for root in self.roots):
+            return
+        _, names = listing
+        current = {os.path.join(folder, name) for name in names}
+        with self.lock:
+            known = set(self.folders.get(folder, ()))
+        for path in known - current:
+            self.remove(path)
+        for path in current - known:
+            self.add(path)
+
+    def complete(self, typed, base_dir, extensions, limit=50):
+        """Paths matching what was typed, either as a path relative to base_dir or as a file name"""
+        typed_path = typed.replace('/', os.sep)
+        results = []
+        with self.lock:
+            if base_dir is not None or os.path.isabs(typed_path):
+                prefix = os.path.normpath(os.path.join(base_dir or '', typed_path))
+                if typed_path.endswith(os.sep) or not typed:
+                    prefix = os.path.join(prefix, '')
+                results = self.paths.complete(prefix.lower(), limit * 4)
+            if os.sep not in typed_path and typed:
+                results += self.names.complete(typed_path.lower(), limit * 4)
+        matches = [path for path in dict.fromkeys(results) if path.lower().endswith(extensions)]
+        return matches[:limit]
+
+
+class CompletionIndexBuilder(QThread):
+    """Background thread that lists the completion roots and builds fresh tries"""
+
+    index_built = pyqtSignal(object, object)
+
+    def __init__(self, index, roots, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.roots = roots
+
+    def run(self):
+        built = self.index.build(self.roots, should_stop=self.isInterruptionRequested)
+        if built is not None:
+            self.index_built.emit(self.roots, built)
+
+
+def heading_anchors(lines):
+    """(anchor, heading text) of the headings in markdown lines, as the toc extension names them"""
+    anchors = []
+    used = set()
+    in_fence = False
+    for line in lines:
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence or not line.lstrip().startswith('#'):
+            continue
+        match = HEADING_TEXT_RE.match(line)
+        if match and match.group(1):
+            text = match.group(1)
+            anchors.append((unique(slugify(text, '-'), used), text))
+    return anchors
@@ -0,0 +1,251 @@
+"""Linear-space Myers diff over lines, with word-level refinement of changed lines.
+
+Sequences are interned to integers first, lines that occur on only one side
+are set aside (they can never match), and the rest is split recursively at
+the middle snake, so memory stays O(N + M) however large the documents are.
+"""
+import re
+import html as html_lib
+from itertools import islice
+
+# Edit distance at which one sub-problem gives up and is reported as a plain replacement
+MAX_EDIT_COST = 1000
+CONTEXT_LINES = 3
+# Changed lines longer than this are not refined word by word
+MAX_WORD_DIFF_CHARS = 2000
+TOKEN_RE = re.compile(r'\w+|\s+|[^\w\s]')
+# Rounds of the middle snake search between checks of should_stop
+STOP_CHECK_INTERVAL = 16
+
+
+class DiffCancelled(Exception):
+    """Raised when should_stop() asks a running diff to give up"""
+
+
+def intern_sequences(a, b):
+    """Map the items of a and b to small integers so comparisons are cheap"""
+    ids = {}
+    return [ids.setdefault(x, len(ids)) for x in a], [ids.setdefault(x, len(ids)) for x in b]
+
+
+def middle_snake(a, a0, a1, b, b0, b1, max_cost, should_stop=None):
+    """Split point (x, y) of an optimal path through a[a0:a1] vs b[b0:b1]; None past max_cost"""
+    n = a1 - a0
+    m = b1 - b0
+    max_d = (n + m + 1) // 2
+    offset = max_d + 1
+    size = 2 * offset + 1
+    forward = [-1] * size
+    backward = [-1] * size
+    forward[offset + 1] = 0
+    backward[offset + 1] = 0
+    delta = n - m
+    # With an odd delta the paths meet while extending forward, otherwise backward
+    odd = delta % 2 != 0
+    k1_start = k1_end = k2_start = k2_end = 0
+    for d in range(min(max_d, max_cost) + 1):
+        if should_stop is not None and d % STOP_CHECK_INTERVAL == 0 and should_stop():
+            raise DiffCancelled()
+        for k1 in range(-d + k1_start, d + 1 - k1_end, 2):
+            i = offset + k1
+            if k1 == -d or (k1 != d and forward[i - 1] < forward[i + 1]):
+                x1 = forward[i + 1]
+            else:
+                x1 = forward[i - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[a0 + x1] == b[b0 + y1]:
+                x1 += 1
+                y1 += 1
+            forward[i] = x1
+            if x1 > n:
+                k1_end += 2
+            elif y1 > m:
+                k1_start += 2
+            elif odd:
+                j = offset + delta - k1
+                if 0 <= j < size and backward[j] != -1 and x1 >= n - backward[j]:
+                    return x1, y1
+        for k2 in range(-d + k2_start, d + 1 - k2_end, 2):
+            i = offset + k2
+            if k2 == -d or (k2 != d and backward[i - 1] < backward[i + 1]):
+                x2 = backward[i + 1]
+            else:
+                x2 = backward[i - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[a1 - x2 - 1] == b[b1 - y2 - 1]:
+                x2 += 1
+                y2 += 1
+            backward[i] = x2
+            if x2 > n:
+                k2_end += 2
+            elif y2 > m:
+                k2_start += 2
+            elif not odd:
+                j = offset + delta - k2
+                if 0 <= j < size and forward[j] != -1:
+                    x1 = forward[j]
+                    if x1 >= n - x2:
+                        return x1, x1 - (j - offset)
+    return None
+
+
+def matching_pairs(a, b, max_cost=MAX_EDIT_COST, should_stop=None):
+    """Sorted (i, j) index pairs with a[i] == b[j] along a shortest edit script"""
+    pairs = []
+    # Explicit stack instead of recursion; sub-problems are pushed right half first
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        a0, a1, b0, b1 = stack.pop()
+        while a0 < a1 and b0 < b1 and a[a0] == b[b0]:
+            pairs.append((a0, b0))
+            a0 += 1
+            b0 += 1
+        tail = []
+        while a0 < a1 and b0 < b1 and a[a1 - 1] == b[b1 - 1]:
+            a1 -= 1
+            b1 -= 1
+            tail.append((a1, b1))
+        if a0 < a1 and b0 < b1:
+            split = middle_snake(a, a0, a1, b, b0, b1, max_cost, should_stop)
+            if split is not None:
+                x, y = split
+                # The tail's pairs come after everything inside, so defer them too
+                stack.append((a1, a1 + len(tail), b1, b1 + len(tail)))
+                stack.append((a0 + x, a1, b0 + y, b1))
+                stack.append((a0, a0 + x, b0, b0 + y))
+                continue
+        pairs.extend(reversed(tail))
+    return pairs
+
+
+def diff_sequences(a, b, max_cost=MAX_EDIT_COST, should_stop=None):
+    """difflib-style opcodes (tag, i1, i2, j1, j2) turning sequence a into b.
+
+    Raises DiffCancelled once should_stop() returns True.
+    """
+    a_ids, b_ids = intern_sequences(a, b)
+    # Items present on one side only are always edits; leaving them out shrinks the search
+    in_b = set(b_ids)
+    in_a = set(a_ids)
+    a_keep = [i for i, x in enumerate(a_ids) if x in in_b]
+    b_keep = [j for j, x in enumerate(b_ids) if x in in_a]
+    pairs = matching_pairs([a_ids[i] for i in a_keep], [b_ids[j] for j in b_keep], max_cost, should_stop)
+
+    opcodes = []
+    i = j = 0
+    for x, y in pairs + [(len(a_keep), len(b_keep))]:
+        i2 = a_keep[x] if x < len(a_keep) else len(a)
+        j2 = b_keep[y] if y < len(b_keep) else len(b)
+        if i < i2 and j < j2:
+            opcodes.append(('replace', i, i2, j, j2))
+        elif i < i2:
+            opcodes.append(('delete', i, i2, j, j))
+        elif j < j2:
+            opcodes.append(('insert', i, i, j, j2))
+        if i2 < len(a) and j2 < len(b):
+            if opcodes and opcodes[-1][0] == 'equal':
+                tag, i1, _, j1, _ = opcodes.pop()
+                opcodes.append(('equal', i1, i2 + 1, j1, j2 + 1))
+            else:
+                opcodes.append(('equal', i2, i2 + 1, j2, j2 + 1))
+        i, j = i2 + 1, j2 + 1
+    return opcodes
+
+
+def group_opcodes(opcodes, context=CONTEXT_LINES):
+    """Split opcodes into hunks of changes with up to context equal lines around them"""
+    if all(op[0] == 'equal' for op in opcodes):
+        return []
+    codes = list(opcodes)
+    tag, i1, i2, j1, j2 = codes[0]
+    if tag == 'equal':
+        codes[0] = tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2
+    tag, i1, i2, j1, j2 = codes[-1]
+    if tag == 'equal':
+        codes[-1] = tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context)
+    hunks = []
+    hunk = []
+    for tag, i1, i2, j1, j2 in codes:
+        # A long unchanged run ends one hunk and starts the next
+        if tag == 'equal' and i2 - i1 > 2 * context:
+            hunk.append((tag, i1, i1 + context, j1, j1 + context))
+            hunks.append(hunk)
+            hunk = []
+            i1, j1 = i2 - context, j2 - context
+        hunk.append((tag, i1, i2, j1, j2))
+    if hunk and not (len(hunk) == 1 and hunk[0][0] == 'equal'):
+        hunks.append(hunk)
+    return hunks
+
+
+def word_diff(old_line, new_line):
+    """(old HTML, new HTML) for one changed line with the changed words marked"""
+    if len(old_line) + len(new_line) > MAX_WORD_DIFF_CHARS:
+        return html_lib.escape(old_line), html_lib.escape(new_line)
+    old_tokens = TOKEN_RE.findall(old_line)
+    new_tokens = TOKEN_RE.findall(new_line)
+    old_parts = []
+    new_parts = []
+    for tag, i1, i2, j1, j2 in diff_sequences(old_tokens, new_tokens):
+        old_text = html_lib.escape(''.join(old_tokens[i1:i2]))
+        new_text = html_lib.escape(''.join(new_tokens[j1:j2]))
+        if tag == 'equal':
+            old_parts.append(old_text)
+            new_parts.append(new_text)
+        else:
+            if old_text:
+                old_parts.append(f'<span class="word-del">{old_text}</span>')
+            if new_text:
+                new_parts.append(f'<span class="word-add">{new_text}</span>')
+    return ''.join(old_parts), ''.join(new_parts)
+
+
+class TextDiff:
+    """Line diff of two texts, with counts and an HTML rendering of its hunks"""
+
+    def __init__(self, old_text, new_text, should_stop=None):
+        self.old_lines = old_text.split('\n')
+        self.new_lines = new_text.split('\n')
+        self.opcodes = diff_sequences(self.old_lines, self.new_lines, should_stop=should_stop)
+        self.added = sum(j2 - j1 for tag, i1, i2, j1, j2 in self.opcodes if tag in ('insert', 'replace'))
+        self.removed = sum(i2 - i1 for tag, i1, i2, j1, j2 in self.opcodes if tag in ('delete', 'replace'))
+
+    @property
+    def identical(self):
+        return not self.added and not self.removed
+
+    def to_html(self, max_rows=5000):
+        """Table rows of the hunks, cut off after max_rows rows"""
+        # Rows are generated lazily so changes past the cut-off are never word-diffed
+        rows = list(islice(self.rows(), max_rows + 1))
+        if len(rows) > max_rows:
+            rows[max_rows:] = ['<tr class="hunk"><td colspan="3">More changes not shown</td></tr>']
+        return '<table class="diff">' + ''.join(rows) + '</table>'
+
+    def rows(self):
+        """Table rows of the hunks, one at a time"""
+        for hunk in group_opcodes(self.opcodes):
+            _, i1, _, j1, _ = hunk[0]
+            yield f'<tr class="hunk"><td colspan="3">@@ -{i1 + 1} +{j1 + 1} @@</td></tr>'
+            for tag, i1, i2, j1, j2 in hunk:
+                if tag == 'equal':
+                    for offset in range(i2 - i1):
+                        yield self.row("same", i1 + offset + 1, j1 + offset + 1,
+                                       html_lib.escape(self.old_lines[i1 + offset]))
+                    continue
+                old = self.old_lines[i1:i2]
+                new = self.new_lines[j1:j2]
+                paired = min(len(old), len(new)) if tag == 'replace' else 0
+                # Filled while the removed lines are emitted, reused for the added ones
+                marked = []
+                for k, line in enumerate(old):
+                    if k < paired:
+                        marked.append(word_diff(line, new[k]))
+                    yield self.row("del", i1 + k + 1, "", marked[k][0] if k < paired else html_lib.escape(line))
+                for k, line in enumerate(new):
+                    yield self.row("add", "", j1 + k + 1, marked[k][1] if k < paired else html_lib.escape(line))
+
+    @staticmethod
+    def row(kind, old_number, new_number, text):
+        return (f'<tr class="{kind}"><td class="num">{old_number}</td><td class="num">{new_number}</td>'
+                f'<td><pre>{text or " "}</pre></td></tr>')
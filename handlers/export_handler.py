@@ -0,0 +1,264 @@
+import os
+import subprocess
+import threading
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QUrl, pyqtSignal
+
+try:
+    import pypandoc
+    PANDOC_AVAILABLE = True
+except ImportError:
+    PANDOC_AVAILABLE = False
+
+try:
+    from PyQt5.QtWebEngineWidgets import QWebEnginePage
+    WEB_ENGINE_AVAILABLE = True
+except ImportError:
+    WEB_ENGINE_AVAILABLE = False
+
+from converter.markdown_converter import ConversionError
+from converter.pipeline import PipelineContext, EXPORT
+from handlers.html_inliner import write_inlined_html
+
+# format key -> (menu label, file filter, extension)
+EXPORT_FORMATS = {
+    "pdf": ("PDF", "PDF Files (*.pdf)", ".pdf"),
+    "docx": ("Word Document (DOCX)", "Word Documents (*.docx)", ".docx"),
+    "epub": ("EPUB", "EPUB Books (*.epub)", ".epub"),
+    "html": ("Standalone HTML", "HTML Files (*.html *.htm)", ".html"),
+    "html-inline": ("Self-contained HTML", "HTML Files (*.html *.htm)", ".html"),
+}
+
+
+class ExportCancelled(Exception):
+    """Raised inside a job when the user cancelled it"""
+
+
+class ExportJob(QRunnable):
+    """One export of a document; body_html is reused from the preview when available"""
+
+    def __init__(self, job_id, fmt, output_path, markdown_text, body_html, base_dir, converter, signals,
+                 recompress_images=False):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.job_id = job_id
+        self.fmt = fmt
+        self.output_path = output_path
+        self.markdown_text = markdown_text
+        self.body_html = body_html
+        self.base_dir = base_dir
+        self.converter = converter
+        self.signals = signals
+        self.recompress_images = recompress_images
+        self.cancelled = threading.Event()
+        self.process = None
+
+    @property
+    def title(self):
+        return os.path.splitext(os.path.basename(self.output_path))[0]
+
+    def cancel(self):
+        self.cancelled.set()
+        process = self.process
+        if process is not None and process.poll() is None:
+            process.kill()
+
+    def check_cancelled(self):
+        if self.cancelled.is_set():
+            raise ExportCancelled()
+
+    def body(self):
+        """Cached body HTML, or a fresh conversion when the preview had none"""
+        if self.body_html is None:
+            # Export mode runs every stage regardless of the preview's latency budgets
+            context = PipelineContext(EXPORT, base_dir=self.base_dir, fmt=self.fmt)
+            self.body_html = self.converter.convert_markdown_to_body(self.markdown_text, context=context)
+        diagrams = self.converter.diagrams
+        if diagrams is not None and diagrams.has_pending(self.body_html):
+            self.body_html = diagrams.complete(self.body_html)
+        return self.body_html
+
+    def run(self):
+        self.signals.job_started.emit(self.job_id)
+        try:
+            self.check_cancelled()
+            if self.fmt == "html":
+                self.export_html()
+            elif self.fmt == "html-inline":
+                self.export_inlined_html()
+            elif self.fmt == "pdf":
+                # Conversion and diagrams only; printing needs the GUI thread
+                self.body()
+            else:
+                self.export_with_pandoc()
+            self.check_cancelled()
+        except ExportCancelled:
+            self.remove_partial_output()
+            self.signals.job_cancelled.emit(self.job_id)
+        except (ConversionError, OSError, RuntimeError, subprocess.SubprocessError) as e:
+            self.remove_partial_output()
+            self.signals.job_failed.emit(self.job_id, str(e))
+        except Exception as e:
+            # Anything escaping QRunnable.run aborts the application; report it as a failed export
+            self.remove_partial_output()
+            self.signals.job_failed.emit(self.job_id, f"{type(e).__name__}: {e}")
+        else:
+            if self.fmt == "pdf":
+                self.signals.pdf_body_ready.emit(self.job_id)
+            else:
+                self.signals.job_finished.emit(self.job_id, self.output_path)
+
+    def export_html(self):
+        """Write the themed page around the body HTML"""
+        html = self.converter.wrap_html(self.body())
+        self.check_cancelled()
+        with open(self.output_path, 'w', encoding='utf-8') as file:
+            file.write(html)
+
+    def export_inlined_html(self):
+        """Write the themed page with local images and stylesheets embedded"""
+        html = self.converter.wrap_html(self.body())
+        self.check_cancelled()
+        write_inlined_html(html, self.output_path, self.base_dir,
+                           recompress=self.recompress_images, should_stop=self.cancelled.is_set)
+
+    def export_with_pandoc(self):
+        """Convert the body HTML with a pandoc process that cancel() can kill"""
+        if not PANDOC_AVAILABLE:
+            raise RuntimeError("pandoc (pypandoc) is required for this export format")
+        body = self.body()
+        self.check_cancelled()
+        command = [
+            pypandoc.get_pandoc_path(), '--from', 'html', '--to', self.fmt,
+            '--standalone', '--output', self.output_path,
+            '--resource-path', self.base_dir, '--metadata', f'title={self.title}',
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE, cwd=self.base_dir)
+        _, errors = self.process.communicate(body.encode('utf-8'))
+        self.check_cancelled()
+        if self.process.returncode != 0:
+            raise RuntimeError(errors.decode('utf-8', 'replace').strip() or f"pandoc exited with {self.process.returncode}")
+
+    def remove_partial_output(self):
+        try:
+            os.remove(self.output_path)
+        except OSError:
+            pass
+
+
+class ExportSignals(QObject):
+    job_started = pyqtSignal(int)
+    job_finished = pyqtSignal(int, str)
+    job_failed = pyqtSignal(int, str)
+    job_cancelled = pyqtSignal(int)
+    pdf_body_ready = pyqtSignal(int)
+
+
+class ExportQueue(QObject):
+    """Runs exports off the GUI thread with limited concurrency and cancellation"""
+
+    progress_changed = pyqtSignal(int, int)
+    job_done = pyqtSignal(str, bool)
+
+    def __init__(self, converter, max_concurrent=2, parent=None):
+        super().__init__(parent)
+        self.converter = converter
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_concurrent)
+        self.signals = ExportSignals(self)
+        self.signals.job_finished.connect(self.on_job_finished)
+        self.signals.job_failed.connect(self.on_job_failed)
+        self.signals.job_cancelled.connect(self.on_job_cancelled)
+        self.signals.pdf_body_ready.connect(self.on_pdf_body_ready)
+        self.next_id = 0
+        self.jobs = {}
+        self.total = 0
+        self.done = 0
+        # PDF jobs convert in the pool, then print through a web page on the GUI thread, one at a time
+        self.pdf_queue = []
+        self.pdf_page = None
+        self.recompress_images = False
+
+    def submit(self, fmt, output_path, markdown_text, body_html, base_dir):
+        """Queue an export; returns its job id"""
+        self.next_id += 1
+        job = ExportJob(self.next_id, fmt, output_path, markdown_text, body_html, base_dir,
+                        self.converter, self.signals, self.recompress_images)
+        self.jobs[job.job_id] = job
+        self.total += 1
+        self.progress_changed.emit(self.done, self.total)
+        if fmt == "pdf" and not WEB_ENGINE_AVAILABLE:
+            self.on_job_failed(job.job_id, "PDF export needs PyQtWebEngine")
+        else:
+            self.pool.start(job)
+        return job.job_id
+
+    def cancel_all(self):
+        """Cancel queued and running exports"""
+        for job in list(self.jobs.values()):
+            job.cancel()
+            if self.pool.tryTake(job) or job in self.pdf_queue:
+                if job in self.pdf_queue:
+                    self.pdf_queue.remove(job)
+                self.on_job_cancelled(job.job_id)
+
+    def on_pdf_body_ready(self, job_id):
+        """A PDF job's body was converted in the pool; queue it for printing"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        if job.cancelled.is_set():
+            self.on_job_cancelled(job_id)
+            return
+        self.pdf_queue.append(job)
+        self.start_next_pdf()
+
+    def start_next_pdf(self):
+        """Print the next queued PDF unless one is already printing"""
+        if self.pdf_page is not None or not self.pdf_queue:
+            return
+        job = self.pdf_queue.pop(0)
+        self.pdf_page = QWebEnginePage(self)
+        self.pdf_page.loadFinished.connect(lambda ok: self.pdf_page.printToPdf(job.output_path))
+        self.pdf_page.pdfPrintingFinished.connect(lambda path, ok: self.on_pdf_printed(job, ok))
+        self.pdf_page.setHtml(self.converter.wrap_html(job.body_html),
+                              QUrl.fromLocalFile(os.path.join(job.base_dir, '')))
+
+    def on_pdf_printed(self, job, ok):
+        self.pdf_page.deleteLater()
+        self.pdf_page = None
+        if job.cancelled.is_set():
+            job.remove_partial_output()
+            self.on_job_cancelled(job.job_id)
+        elif ok:
+            self.on_job_finished(job.job_id, job.output_path)
+        else:
+            self.on_job_failed(job.job_id, "printing to PDF failed")
+        self.start_next_pdf()
+
+    def _complete(self, job_id):
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            return None
+        self.done += 1
+        self.progress_changed.emit(self.done, self.total)
+        if not self.jobs:
+            self.total = self.done = 0
+        return job
+
+    def on_job_finished(self, job_id, output_path):
+        if self._complete(job_id):
+            self.job_done.emit(f"Exported {os.path.basename(output_path)}", True)
+
+    def on_job_failed(self, job_id, error):
+        job = self._complete(job_id)
+        if job:
+            self.job_done.emit(f"Export of {os.path.basename(job.output_path)} failed: {error}", False)
+
+    def on_job_cancelled(self, job_id):
+        job = self._complete(job_id)
+        if job:
+            self.job_done.emit(f"Export of {os.path.basename(job.output_path)} cancelled", True)
+
+    def wait_for_done(self, msecs=3000):
+        self.cancel_all()
+        self.pool.waitForDone(msecs)
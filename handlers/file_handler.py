@@ -1,4 +1,5 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtWidgets import QMessageBox
 from PyQt5.QtCore import QMimeData, QUrl
 
@@ -46,22 +47,42 @@ class FileHandler:
         path = path.replace('%5B', '[').replace('%5D', ']')
         return path.strip()
     
+    def read_file(self, file_path: str) -> str:
+        """Read a file as UTF-8; raises OSError or UnicodeDecodeError"""
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return file.read()
+
+    def read_files(self, file_paths: list[str]) -> list[tuple]:
+        """Read several files in parallel; returns (path, content, error) in input order"""
+        def read(file_path):
+            try:
+                return file_path, self.read_file(file_path), None
+            except Exception as e:
+                return file_path, None, e
+
+        if len(file_paths) <= 1:
+            return [read(file_path) for file_path in file_paths]
+        with ThreadPoolExecutor(max_workers=min(8, len(file_paths))) as executor:
+            return list(executor.map(read, file_paths))
+
+    def show_load_error(self, file_path: str, error: Exception):
+        """Show a user-friendly popup for a failed read"""
+        if isinstance(error, FileNotFoundError):
+            QMessageBox.critical(None, "File Not Found", f"The file '{file_path}' could not be found.")
+        elif isinstance(error, UnicodeDecodeError):
+            QMessageBox.critical(None, "Encoding Error", f"The file '{file_path}' could not be decoded with UTF-8 encoding.")
+        else:
+            QMessageBox.critical(None, "Error", f"An error occurred while opening the file: {str(error)}")
+
     def load_file(self, file_path: str, editor_widget) -> bool:
         """Read file with UTF-8 encoding, handle FileNotFoundError and UnicodeDecodeError with user-friendly error popups, populate editor on success"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                editor_widget.setPlainText(content)
-                return True
-        except FileNotFoundError:
-            QMessageBox.critical(None, "File Not Found", f"The file '{file_path}' could not be found.")
-            return False
-        except UnicodeDecodeError:
-            QMessageBox.critical(None, "Encoding Error", f"The file '{file_path}' could not be decoded with UTF-8 encoding.")
-            return False
+            content = self.read_file(file_path)
         except Exception as e:
-            QMessageBox.critical(None, "Error", f"An error occurred while opening the file: {str(e)}")
+            self.show_load_error(file_path, e)
             return False
+        editor_widget.setPlainText(content)
+        return True
     
     def save_file(self, file_path: str, content: str) -> bool:
         """Write content with error handling and status messages"""
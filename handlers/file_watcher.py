@@ -0,0 +1,96 @@
+import os
+import hashlib
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+DEBOUNCE_MS = 200
+
+
+def content_hash(content: str) -> str:
+    """Hash used to tell a real content change from a touch"""
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def stat_signature(file_path):
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class FileWatcher(QObject):
+    """Watches open files and reports real external changes after a debounce"""
+
+    file_changed = pyqtSignal(str, str)
+    file_removed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_event)
+        # path -> (stat signature, content hash) of the version the editor knows
+        self.known = {}
+        self.pending = set()
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.timeout.connect(self.check_pending)
+
+    def watch(self, file_path, content):
+        """Start watching (or re-baseline) a file whose content the editor now matches"""
+        file_path = os.path.abspath(file_path)
+        self.known[file_path] = (stat_signature(file_path), content_hash(content))
+        if file_path not in self.watcher.files() and os.path.exists(file_path):
+            self.watcher.addPath(file_path)
+
+    def unwatch(self, file_path):
+        """Stop watching a file"""
+        file_path = os.path.abspath(file_path)
+        self.known.pop(file_path, None)
+        self.pending.discard(file_path)
+        if file_path in self.watcher.files():
+            self.watcher.removePath(file_path)
+
+    def on_file_event(self, file_path):
+        """Collect bursts of events (git checkout, atomic saves) into one check"""
+        self.pending.add(os.path.abspath(file_path))
+        self.debounce_timer.start(DEBOUNCE_MS)
+
+    def check_pending(self):
+        for file_path in list(self.pending):
+            self.check(file_path)
+        self.pending.clear()
+
+    def has_changed(self, file_path) -> bool:
+        """Cheap stat-only test used before overwriting a file"""
+        file_path = os.path.abspath(file_path)
+        known = self.known.get(file_path)
+        return known is not None and stat_signature(file_path) != known[0]
+
+    def check(self, file_path):
+        """Stat the file once; only read and hash it when the stat changed"""
+        known = self.known.get(file_path)
+        if known is None:
+            return
+        signature = stat_signature(file_path)
+
+        # Editors that save by rename drop the inotify watch; re-arm it
+        if signature is not None and file_path not in self.watcher.files():
+            self.watcher.addPath(file_path)
+
+        if signature == known[0]:
+            return
+        if signature is None:
+            self.known[file_path] = (None, known[1])
+            self.file_removed.emit(file_path)
+            return
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                content = file.read()
+        except (OSError, UnicodeDecodeError):
+            return
+
+        digest = content_hash(content)
+        self.known[file_path] = (signature, digest)
+        if digest != known[1]:
+            self.file_changed.emit(file_path, content)
@@ -0,0 +1,132 @@
+import os
+import re
+import base64
+import mimetypes
+from html import unescape
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import Qt, QBuffer, QByteArray, QIODevice
+from PyQt5.QtGui import QImage
+
+from handlers.link_checker import local_path
+
+# src of <img>, href of <link rel="stylesheet">
+IMAGE_SRC_RE = re.compile(r'(<img\b[^>]*?\bsrc\s*=\s*)(["\'])([^"\']+)\2', re.IGNORECASE)
+STYLESHEET_RE = re.compile(r'<link\b[^>]*?\brel\s*=\s*["\']stylesheet["\'][^>]*>', re.IGNORECASE)
+HREF_RE = re.compile(r'\bhref\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+
+# PNGs larger than this are re-encoded when recompression is on
+RECOMPRESS_MIN_BYTES = 512 * 1024
+# ...and scaled down to at most this width
+RECOMPRESS_MAX_WIDTH = 1920
+# base64 is written in slices of this many characters
+WRITE_CHUNK = 1024 * 1024
+
+
+def encode_image(path, recompress=False):
+    """Read an image file and return (mime type, base64 bytes)"""
+    with open(path, 'rb') as file:
+        data = file.read()
+    mime = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    if recompress and mime == 'image/png' and len(data) > RECOMPRESS_MIN_BYTES:
+        data = recompress_png(data)
+    return mime, base64.b64encode(data)
+
+
+def recompress_png(data):
+    """Scale down and re-encode a PNG at maximum compression; keep the original if that is smaller"""
+    image = QImage.fromData(data, 'PNG')
+    if image.isNull():
+        return data
+    if image.width() > RECOMPRESS_MAX_WIDTH:
+        image = image.scaledToWidth(RECOMPRESS_MAX_WIDTH, Qt.SmoothTransformation)
+    array = QByteArray()
+    buffer = QBuffer(array)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, 'PNG', 0)
+    buffer.close()
+    smaller = bytes(array)
+    return smaller if smaller and len(smaller) < len(data) else data
+
+
+def inline_stylesheets(html, base_dir):
+    """Replace <link rel="stylesheet"> to local files with <style> blocks"""
+    def replace(match):
+        href = HREF_RE.search(match.group(0))
+        path = local_path(unescape(href.group(1)), base_dir) if href else None
+        if path is None:
+            return match.group(0)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                return f"<style>\n{file.read()}\n</style>"
+        except (OSError, UnicodeDecodeError):
+            # Unreadable or not UTF-8: keep the link rather than embed mangled CSS
+            return match.group(0)
+    return STYLESHEET_RE.sub(replace, html)
+
+
+def write_inlined_html(html, output_path, base_dir, jobs=4, recompress=False, should_stop=None):
+    """Write html to output_path with local images embedded as data URIs.
+
+    Images are read and encoded on a thread pool, at most a few ahead of
+    the writer, and streamed to the file in document order. Returns the
+    number of images inlined.
+    """
+    html = inline_stylesheets(html, base_dir)
+
+    # Split the page into text segments around the image sources
+    segments = []
+    images = []
+    sources = []
+    position = 0
+    for match in IMAGE_SRC_RE.finditer(html):
+        path = local_path(unescape(match.group(3)), base_dir)
+        if path is None or not os.path.isfile(path):
+            continue
+        segments.append(html[position:match.start(3)])
+        images.append(path)
+        sources.append(match.group(3))
+        position = match.end(3)
+    segments.append(html[position:])
+
+    inlined = 0
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor, \
+            open(output_path, 'w', encoding='utf-8') as file:
+        # Each distinct image is encoded once; futures are dropped once no longer needed
+        remaining = {}
+        for path in images:
+            remaining[path] = remaining.get(path, 0) + 1
+        futures = {}
+        pending = deque(dict.fromkeys(images))
+
+        def fill():
+            while pending and len(futures) < jobs * 2:
+                path = pending.popleft()
+                futures[path] = executor.submit(encode_image, path, recompress)
+
+        fill()
+        for segment, path, source in zip(segments, images, sources):
+            if should_stop is not None and should_stop():
+                for future in futures.values():
+                    future.cancel()
+                return inlined
+            file.write(segment)
+            if path not in futures:
+                pending.remove(path)
+                futures[path] = executor.submit(encode_image, path, recompress)
+            try:
+                mime, encoded = futures[path].result()
+            except OSError:
+                # Unreadable after all: keep the original reference
+                file.write(source)
+            else:
+                file.write(f"data:{mime};base64,")
+                for start in range(0, len(encoded), WRITE_CHUNK):
+                    file.write(encoded[start:start + WRITE_CHUNK].decode('ascii'))
+                inlined += 1
+            remaining[path] -= 1
+            if not remaining[path]:
+                del futures[path]
+            fill()
+        file.write(segments[-1])
+    return inlined
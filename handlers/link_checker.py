@@ -0,0 +1,261 @@
+import os
+import re
+import sys
+import argparse
+import threading
+from urllib.parse import unquote
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from utils import iter_markdown_files
+
+# [text](target "title"), ![alt](target), <img src="target">, [id]: target
+INLINE_LINK_RE = re.compile(r'!?\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+["\'(][^)]*)?\)')
+HTML_SRC_RE = re.compile(r'<(?:img|a)\b[^>]*?\b(?:src|href)\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+REFERENCE_RE = re.compile(r'^\s{0,3}\[[^\]]+\]:\s*<?(\S+?)>?(?:\s+.*)?$')
+EXTERNAL_RE = re.compile(r'^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//|#)')
+FENCE_RE = re.compile(r'^\s*(```|~~~)')
+# Whether names ignore case when a folder's path has no letters to probe with
+CASE_INSENSITIVE_DEFAULT = sys.platform in ('win32', 'darwin')
+
+
+def extract_link_targets(line):
+    """Return (target, column) for every link or image target on a line"""
+    targets = []
+    for regex in (INLINE_LINK_RE, HTML_SRC_RE, REFERENCE_RE):
+        for match in regex.finditer(line):
+            targets.append((match.group(1), match.start(1)))
+    return targets
+
+
+def local_path(target, base_dir):
+    """Resolve a link target to a local file path, or None for URLs and anchors"""
+    if EXTERNAL_RE.match(target):
+        return None
+    target = unquote(target.split('#', 1)[0].split('?', 1)[0])
+    if not target:
+        return None
+    if os.path.isabs(target):
+        return os.path.normpath(target)
+    return os.path.normpath(os.path.join(base_dir, target))
+
+
+def ignores_case(folder):
+    """True if folder's filesystem matches names case-insensitively (macOS and Windows by default)"""
+    swapped = folder.swapcase()
+    if swapped == folder:
+        return CASE_INSENSITIVE_DEFAULT
+    try:
+        return os.path.samefile(folder, swapped)
+    except OSError:
+        return False
+
+
+class DirectoryCache:
+    """Caches directory listings, revalidated by the directory's mtime"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # folder -> (mtime_ns, set of entry names, casefolded if the folder ignores case)
+        self.listings = {}
+
+    def exists(self, path) -> bool:
+        folder, name = os.path.split(path)
+        if not name:
+            return os.path.isdir(folder)
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+        except OSError:
+            return False
+        with self.lock:
+            cached = self.listings.get(folder)
+        if cached is None or cached[0] != mtime:
+            try:
+                names = os.listdir(folder)
+            except OSError:
+                return False
+            fold = ignores_case(folder)
+            cached = (mtime, {n.casefold() for n in names} if fold else set(names), fold)
+            with self.lock:
+                self.listings[folder] = cached
+        return (name.casefold() if cached[2] else name) in cached[1]
+
+
+def check_lines(lines, base_dir, cache, first_line=0, in_fence=False):
+    """Return {line_index: [broken targets]} for the given lines.
+
+    in_fence says whether lines start inside a fenced code block.
+    """
+    problems = {}
+    for index, line in enumerate(lines, first_line):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence or ('](' not in line and ']:' not in line and '=' not in line):
+            continue
+        for target, _ in extract_link_targets(line):
+            path = local_path(target, base_dir)
+            if path is not None and not cache.exists(path):
+                problems.setdefault(index, []).append(target)
+    return problems
+
+
+def check_file(file_path, cache):
+    """Check every link in one markdown file"""
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+            lines = file.read().split('\n')
+    except OSError as e:
+        return {0: [f"<unreadable: {e}>"]}
+    return check_lines(lines, os.path.dirname(os.path.abspath(file_path)), cache)
+
+
+def check_folder(root, jobs=8):
+    """Check all markdown files below root in parallel; returns {path: problems}"""
+    cache = DirectoryCache()
+    paths = [path for path, _ in iter_markdown_files(root)]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(lambda path: (path, check_file(path, cache)), paths)
+        return {path: problems for path, problems in results if problems}
+
+
+class LinkProblems(QObject):
+    """One document's broken links by block, and the blocks edited since they were checked"""
+
+    def __init__(self, tracker, stats, parent=None):
+        super().__init__(parent)
+        self.tracker = tracker
+        self.stats = stats
+        # block -> [broken targets], shifted along with the lines
+        self.problems = {}
+        self.dirty = tracker.subscribe()
+        # Set when a fence line changes (every later block may flip in or out of code),
+        # the document's folder changes or the files its links name may have changed
+        self.check_all = True
+        self.base_dir = None
+        # Bumped on every edit or recheck so results of older snapshots can be discarded
+        self.generation = 0
+        tracker.lines_replaced.connect(self.on_lines_replaced)
+
+    def recheck(self):
+        self.check_all = True
+        self.generation += 1
+
+    def on_lines_replaced(self, first, old_lines, new_lines):
+        old_last = first + len(old_lines) - 1
+        delta = len(new_lines) - len(old_lines)
+        self.problems = {block + delta if block > old_last else block: targets
+                         for block, targets in self.problems.items() if not first <= block <= old_last}
+        if any(FENCE_RE.match(line) for line in old_lines + new_lines):
+            self.check_all = True
+        self.generation += 1
+
+    def snapshot(self, base_dir):
+        """(first block, lines, starts inside a fence) runs to check, or [] if nothing changed"""
+        if base_dir != self.base_dir:
+            self.check_all = True
+        if self.check_all:
+            return [(0, self.tracker.text().split('\n'), False)]
+        lines = self.tracker.lines
+        return [(first, lines[first:last + 1], self.stats.in_fence(first)) for first, last in self.dirty.ranges]
+
+    def apply(self, generation, base_dir, runs, problems):
+        """Replace the problems of the checked runs, unless the document changed since snapshot()"""
+        if generation != self.generation:
+            return False  # The blocks stay dirty and the pending timer checks again
+        if self.check_all:
+            self.problems = {}
+        for first, lines, _ in runs:
+            for block in range(first, first + len(lines)):
+                self.problems.pop(block, None)
+        self.problems.update(problems)
+        self.dirty.take()
+        self.check_all = False
+        self.base_dir = base_dir
+        return True
+
+
+class LinkCheckWorker(QThread):
+    """Checks snapshots of a document's changed lines off the GUI thread"""
+
+    check_finished = pyqtSignal(object, int, str, object, dict)
+
+    def __init__(self, tab, generation, runs, base_dir, cache, parent=None):
+        super().__init__(parent)
+        self.tab = tab
+        self.generation = generation
+        self.runs = runs
+        self.base_dir = base_dir
+        self.cache = cache
+
+    def run(self):
+        problems = {}
+        for first, lines, in_fence in self.runs:
+            problems.update(check_lines(lines, self.base_dir, self.cache, first, in_fence))
+        self.check_finished.emit(self.tab, self.generation, self.base_dir, self.runs, problems)
+
+
+class LinkChecker(QObject):
+    """Re-checks the edited blocks of the active document shortly after edits and marks the gutter"""
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.cache = DirectoryCache()
+        self.worker = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.check_current)
+
+    def schedule(self, delay=800, recheck=False):
+        """Check the current tab after delay; recheck also revisits unedited blocks,
+        whose targets may have been created or deleted meanwhile"""
+        if recheck and self.main_window.current_tab is not None:
+            self.main_window.current_tab.links.recheck()
+        self.timer.start(delay)
+
+    def check_current(self):
+        """Snapshot the current tab and check it in a worker"""
+        if self.worker is not None and self.worker.isRunning():
+            self.schedule(200)  # One check at a time; try again shortly
+            return
+        tab = self.main_window.current_tab
+        if tab is None:
+            return
+        base_dir = os.path.dirname(os.path.abspath(tab.current_file)) if tab.current_file else os.getcwd()
+        runs = tab.links.snapshot(base_dir)
+        if not runs:
+            return
+        self.worker = LinkCheckWorker(tab, tab.links.generation, runs, base_dir, self.cache, self)
+        self.worker.check_finished.connect(self.on_check_finished)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker.start()
+
+    def on_check_finished(self, tab, generation, base_dir, runs, problems):
+        self.worker = None
+        if tab.editor not in self.main_window.documents:
+            return
+        if tab.links.apply(generation, base_dir, runs, problems):
+            tab.editor.set_link_problems(dict(tab.links.problems))
+
+
+def main(argv=None):
+    """Headless entry point: python -m handlers.link_checker DOCS_DIR"""
+    parser = argparse.ArgumentParser(description="Report broken relative links and images in markdown files")
+    parser.add_argument("root", help="folder to check recursively")
+    parser.add_argument("-j", "--jobs", type=int, default=8, help="parallel file checks")
+    args = parser.parse_args(argv)
+
+    results = check_folder(args.root, args.jobs)
+    broken = 0
+    for path in sorted(results):
+        for line, targets in sorted(results[path].items()):
+            for target in targets:
+                print(f"{os.path.relpath(path, args.root)}:{line + 1}: broken link '{target}'")
+                broken += 1
+    print(f"{broken} broken link{'s' if broken != 1 else ''} found", file=sys.stderr)
+    return 1 if broken else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
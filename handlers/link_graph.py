@@ -0,0 +1,289 @@
+import os
+import re
+import pickle
+import hashlib
+import threading
+from urllib.parse import quote
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from handlers.link_checker import INLINE_LINK_RE, HTML_SRC_RE, REFERENCE_RE, FENCE_RE, local_path
+from utils import get_app_data_dir, iter_markdown_files, MARKDOWN_EXTENSIONS
+
+GRAPH_VERSION = 1
+# [[Note]], [[Note#Heading]], [[Note|shown text]]
+WIKI_LINK_RE = re.compile(r'\[\[([^\]|#\n]+)((?:#[^\]|\n]*)?(?:\|[^\]\n]*)?)\]\]')
+# `code`, ``code with ` inside``
+CODE_SPAN_RE = re.compile(r'(`+)(?!`).*?(?<!`)\1(?!`)')
+SNIPPET_CHARS = 120
+
+
+def wiki_key(name):
+    """Graph key a [[name]] link points at; files are reachable under their lower-case stem"""
+    return "wiki:" + name.strip().lower()
+
+
+def file_keys(path):
+    """Graph keys under which other files can link to path"""
+    keys = [path]
+    if path.lower().endswith(MARKDOWN_EXTENSIONS):
+        keys.append(wiki_key(os.path.splitext(os.path.basename(path))[0]))
+    return keys
+
+
+def iter_link_lines(lines):
+    """Yield (index, line) for lines outside fenced code that may contain links"""
+    in_fence = False
+    for index, line in enumerate(lines):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+            continue
+        if not in_fence and ('](' in line or ']:' in line or '[[' in line or '=' in line):
+            yield index, line
+
+
+def code_spans(line):
+    """(start, end) of the inline code spans on a line"""
+    if '`' not in line:
+        return []
+    return [match.span() for match in CODE_SPAN_RE.finditer(line)]
+
+
+def in_code(position, spans):
+    return any(start <= position < end for start, end in spans)
+
+
+def extract_links(content, base_dir):
+    """(1-based line, graph key, snippet) for every local or wiki link in a document"""
+    links = []
+    for index, line in iter_link_lines(content.split('\n')):
+        keys = []
+        spans = code_spans(line)
+        for regex in (INLINE_LINK_RE, HTML_SRC_RE, REFERENCE_RE):
+            for match in regex.finditer(line):
+                path = local_path(match.group(1), base_dir)
+                if path is not None and not in_code(match.start(1), spans):
+                    keys.append(path)
+        keys.extend(wiki_key(match.group(1)) for match in WIKI_LINK_RE.finditer(line)
+                    if not in_code(match.start(), spans))
+        snippet = line.strip()[:SNIPPET_CHARS]
+        for key in dict.fromkeys(keys):
+            links.append((index + 1, key, snippet))
+    return links
+
+
+class LinkGraph:
+    """Outgoing links of every markdown file in a workspace, with the reverse index for backlinks"""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.lock = threading.Lock()
+        # path -> (mtime_ns, size) of the indexed version
+        self.files = {}
+        # path -> [(line, key, snippet)]
+        self.outgoing = {}
+        # key (a file path or wiki:name) -> {source path: [(line, snippet)]}
+        self.incoming = {}
+        # Set when in-memory changes have not been saved yet
+        self.dirty = False
+
+    @property
+    def graph_path(self):
+        """Location of the on-disk graph for this workspace"""
+        digest = hashlib.sha1(self.root.encode('utf-8')).hexdigest()
+        return os.path.join(get_app_data_dir("link_graph"), f"{digest}.pickle")
+
+    def load(self) -> bool:
+        """Load a previously saved graph; returns False if none is usable"""
+        try:
+            with open(self.graph_path, 'rb') as file:
+                data = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False
+        if data.get('version') != GRAPH_VERSION or data.get('root') != self.root:
+            return False
+        with self.lock:
+            self.files = data['files']
+            self.outgoing = data['outgoing']
+            self.incoming = {}
+            for path, links in self.outgoing.items():
+                self._add_incoming(path, links)
+        return True
+
+    def save(self):
+        """Persist the graph atomically; the reverse index is rebuilt on load"""
+        with self.lock:
+            data = {
+                'version': GRAPH_VERSION,
+                'root': self.root,
+                'files': self.files,
+                'outgoing': self.outgoing,
+            }
+            tmp_path = self.graph_path + '.tmp'
+            with open(tmp_path, 'wb') as file:
+                pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+            self.dirty = False
+        os.replace(tmp_path, self.graph_path)
+
+    def update(self, should_stop=lambda: False) -> int:
+        """Re-parse files whose mtime or size changed; returns number of files touched"""
+        seen = set()
+        touched = 0
+        for path, stat in iter_markdown_files(self.root):
+            if should_stop():
+                return touched
+            seen.add(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if self.files.get(path) == signature:
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as file:
+                    content = file.read()
+            except OSError:
+                continue
+            self.index_file(path, content, signature)
+            touched += 1
+
+        # Forget files that were deleted since the last run
+        for path in set(self.files) - seen:
+            self.remove_file(path)
+            touched += 1
+        return touched
+
+    def contains(self, path):
+        return os.path.abspath(path).startswith(os.path.join(self.root, ''))
+
+    def index_file(self, path, content, signature=None):
+        """Replace one file's outgoing links, e.g. after it was saved"""
+        links = extract_links(content, os.path.dirname(path))
+        if signature is None:
+            try:
+                stat = os.stat(path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                signature = None
+        with self.lock:
+            self._remove_incoming(path)
+            self.outgoing[path] = links
+            self._add_incoming(path, links)
+            self.files[path] = signature
+            self.dirty = True
+
+    def remove_file(self, path):
+        with self.lock:
+            self._remove_incoming(path)
+            self.outgoing.pop(path, None)
+            self.files.pop(path, None)
+            self.dirty = True
+
+    def _add_incoming(self, path, links):
+        """Caller holds the lock"""
+        for line, key, snippet in links:
+            self.incoming.setdefault(key, {}).setdefault(path, []).append((line, snippet))
+
+    def _remove_incoming(self, path):
+        """Caller holds the lock"""
+        for key in {key for _, key, _ in self.outgoing.get(path, ())}:
+            sources = self.incoming.get(key)
+            if sources is not None:
+                sources.pop(path, None)
+                if not sources:
+                    del self.incoming[key]
+
+    def backlinks(self, path):
+        """Sorted (source path, line, snippet) of links to path from other files"""
+        path = os.path.abspath(path)
+        results = []
+        with self.lock:
+            for key in file_keys(path):
+                for source, hits in self.incoming.get(key, {}).items():
+                    if source != path:
+                        results.extend((source, line, snippet) for line, snippet in hits)
+        return sorted(set(results))
+
+    def linking_files(self, path):
+        """Files with at least one link to path"""
+        return sorted({source for source, _, _ in self.backlinks(path)})
+
+
+def relative_target(path, base_dir, like):
+    """Link text for path as seen from base_dir, absolute if the old target (like) was.
+
+    Percent-encoded if the old target was, or if the path contains spaces,
+    which would end an inline link.
+    """
+    text = path if os.path.isabs(like) else os.path.relpath(path, base_dir).replace(os.sep, '/')
+    if '%' in like or re.search(r'\s', text):
+        text = quote(text, safe='/:\\')
+    return text
+
+
+def retarget_links(content, base_dir, old_path, new_path, new_base_dir=None):
+    """Point links in content that resolve to old_path at new_path.
+
+    new_base_dir is the document's own folder after a move; relative links
+    to other files are then rewritten so they keep resolving. Returns the
+    new content and the number of links changed.
+    """
+    old_stem = os.path.splitext(os.path.basename(old_path))[0]
+    new_stem = os.path.splitext(os.path.basename(new_path))[0]
+    new_base_dir = new_base_dir or base_dir
+    lines = content.split('\n')
+    changed = 0
+    spans = []
+
+    def replace_target(match):
+        nonlocal changed
+        target = match.group(1)
+        path = local_path(target, base_dir)
+        if path is None or in_code(match.start(1), spans):
+            return match.group(0)
+        fragment = target[len(target.split('#', 1)[0]):]
+        if path == old_path:
+            new_target = relative_target(new_path, new_base_dir, target) + fragment
+        elif new_base_dir != base_dir and not os.path.isabs(target):
+            new_target = relative_target(path, new_base_dir, target) + fragment
+        else:
+            return match.group(0)
+        if new_target == target:
+            return match.group(0)
+        changed += 1
+        start = match.start(1) - match.start(0)
+        return match.group(0)[:start] + new_target + match.group(0)[start + len(target):]
+
+    def replace_wiki(match):
+        nonlocal changed
+        if (match.group(1).strip().lower() != old_stem.lower() or old_stem == new_stem
+                or in_code(match.start(), spans)):
+            return match.group(0)
+        changed += 1
+        return f"[[{new_stem}{match.group(2)}]]"
+
+    for index, line in iter_link_lines(lines):
+        # Recomputed after each pass, since replacements move the spans
+        for regex in (INLINE_LINK_RE, HTML_SRC_RE, REFERENCE_RE):
+            spans = code_spans(line)
+            line = regex.sub(replace_target, line)
+        spans = code_spans(line)
+        lines[index] = WIKI_LINK_RE.sub(replace_wiki, line)
+    return '\n'.join(lines), changed
+
+
+class LinkGraphBuilder(QThread):
+    """Background thread that loads the saved graph and refreshes it by mtime"""
+
+    graph_updated = pyqtSignal(int)
+
+    def __init__(self, graph, parent=None):
+        super().__init__(parent)
+        self.graph = graph
+
+    def run(self):
+        if not self.graph.files:
+            self.graph.load()
+        touched = self.graph.update(should_stop=self.isInterruptionRequested)
+        if touched and not self.isInterruptionRequested():
+            try:
+                self.graph.save()
+            except OSError as e:
+                print(f"Could not save link graph: {e}")
+        self.graph_updated.emit(touched)
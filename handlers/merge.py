@@ -0,0 +1,91 @@
+from difflib import SequenceMatcher
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    """Length of the common prefix, found by bisecting on slice comparisons"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[low:mid] == b[low:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def common_suffix_length(a: str, b: str, limit: int) -> int:
+    """Length of the common suffix, never overlapping the first limit characters"""
+    low, high = 0, min(len(a), len(b)) - limit
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[len(a) - mid:len(a) - low] == b[len(b) - mid:len(b) - low]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def changed_region(old: str, new: str):
+    """Return (start, old_end, new_end) of the single span that differs"""
+    prefix = common_prefix_length(old, new)
+    suffix = common_suffix_length(old, new, prefix)
+    return prefix, len(old) - suffix, len(new) - suffix
+
+
+def _sync_regions(base, ours, theirs):
+    """Base ranges that are unchanged on both sides, with their positions in each"""
+    ours_matches = SequenceMatcher(None, base, ours, autojunk=False).get_matching_blocks()
+    theirs_matches = SequenceMatcher(None, base, theirs, autojunk=False).get_matching_blocks()
+    regions = []
+    i = j = 0
+    while i < len(ours_matches) and j < len(theirs_matches):
+        o_base, o_start, o_len = ours_matches[i]
+        t_base, t_start, t_len = theirs_matches[j]
+        start = max(o_base, t_base)
+        end = min(o_base + o_len, t_base + t_len)
+        if start < end:
+            regions.append((start, end,
+                            o_start + start - o_base, o_start + end - o_base,
+                            t_start + start - t_base, t_start + end - t_base))
+        if o_base + o_len < t_base + t_len:
+            i += 1
+        else:
+            j += 1
+    regions.append((len(base), len(base), len(ours), len(ours), len(theirs), len(theirs)))
+    return regions
+
+
+def merge3(base: str, ours: str, theirs: str):
+    """Line-based three-way merge; returns (merged_text, conflict_count)"""
+    base_lines = base.splitlines(keepends=True)
+    our_lines = ours.splitlines(keepends=True)
+    their_lines = theirs.splitlines(keepends=True)
+
+    merged = []
+    conflicts = 0
+    b = o = t = 0
+    for b_start, b_end, o_start, o_end, t_start, t_end in _sync_regions(base_lines, our_lines, their_lines):
+        base_chunk = base_lines[b:b_start]
+        our_chunk = our_lines[o:o_start]
+        their_chunk = their_lines[t:t_start]
+        if our_chunk == their_chunk or their_chunk == base_chunk:
+            merged.extend(our_chunk)
+        elif our_chunk == base_chunk:
+            merged.extend(their_chunk)
+        else:
+            conflicts += 1
+            merged.append("<<<<<<< editor\n")
+            merged.extend(_terminated(our_chunk))
+            merged.append("=======\n")
+            merged.extend(_terminated(their_chunk))
+            merged.append(">>>>>>> disk\n")
+        merged.extend(base_lines[b_start:b_end])
+        b, o, t = b_end, o_end, t_end
+    return ''.join(merged), conflicts
+
+
+def _terminated(lines):
+    """Make sure a conflict side ends with a newline before the next marker"""
+    if lines and not lines[-1].endswith('\n'):
+        return lines[:-1] + [lines[-1] + '\n']
+    return lines
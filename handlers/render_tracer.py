@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from PyQt5.QtCore import QObject, pyqtSignal
+
+HISTORY_SIZE = 200
+
+
+def stage(trace, name):
+    """Time a block as a stage of trace; a no-op when trace is None"""
+    return trace.stage(name) if trace is not None else nullcontext()
+
+
+class RenderTrace:
+    """Stage timings of one preview refresh, possibly recorded from several threads"""
+
+    def __init__(self, render_id):
+        self.render_id = render_id
+        # (name, start, end, thread id) with perf_counter timestamps
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter())
+
+    def add(self, name, start, end):
+        self.stages.append((name, start, end, threading.get_ident()))
+
+    @property
+    def total_ms(self):
+        """Wall time from the first stage start to the last stage end"""
+        if not self.stages:
+            return 0.0
+        return (max(s[2] for s in self.stages) - min(s[1] for s in self.stages)) * 1000
+
+    def stage_ms(self):
+        """{stage name: milliseconds}"""
+        timings = {}
+        for name, start, end, _ in self.stages:
+            timings[name] = timings.get(name, 0.0) + (end - start) * 1000
+        return timings
+
+
+class RenderTracer(QObject):
+    """Collects per-stage preview timings, a live summary and an opt-in trace log"""
+
+    trace_finished = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.epoch = time.perf_counter()
+        self.next_id = 0
+        self.totals = deque(maxlen=HISTORY_SIZE)
+        self.last_trace = None
+        self.recording = False
+        self.recorded = []
+        # Trace waiting for the web view's loadFinished
+        self.pending_load = None
+
+    def start(self) -> RenderTrace:
+        self.next_id += 1
+        return RenderTrace(self.next_id)
+
+    def widget_updated(self, trace, waits_for_load):
+        """Called after setHtml; finish now unless the widget loads asynchronously"""
+        if waits_for_load:
+            self.pending_load = (trace, time.perf_counter())
+        else:
+            self.finish(trace)
+
+    def load_finished(self, ok=True):
+        """Record the web engine's load stage of the last refresh"""
+        if self.pending_load is None:
+            return
+        trace, started = self.pending_load
+        self.pending_load = None
+        trace.add("load", started, time.perf_counter())
+        self.finish(trace)
+
+    def finish(self, trace):
+        self.last_trace = trace
+        self.totals.append(trace.total_ms)
+        if self.recording:
+            self.recorded.append(trace)
+        self.trace_finished.emit(trace)
+
+    def summary(self):
+        """(last, p95) total latency in milliseconds, or None before the first render"""
+        if not self.totals:
+            return None
+        ordered = sorted(self.totals)
+        p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+        return self.totals[-1], p95
+
+    def set_recording(self, enabled):
+        self.recording = enabled
+        if enabled:
+            self.recorded = []
+
+    def export(self, file_path):
+        """Write recorded traces as JSONL, or Chrome trace format for .json files"""
+        if file_path.lower().endswith('.json'):
+            events = []
+            for trace in self.recorded:
+                for name, start, end, thread_id in trace.stages:
+                    events.append({
+                        "name": name, "cat": "render", "ph": "X",
+                        "ts": round((start - self.epoch) * 1e6, 1),
+                        "dur": round((end - start) * 1e6, 1),
+                        "pid": os.getpid(), "tid": thread_id,
+                        "args": {"render": trace.render_id},
+                    })
+            with open(file_path, 'w', encoding='utf-8') as file:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+        else:
+            with open(file_path, 'w', encoding='utf-8') as file:
+                for trace in self.recorded:
+                    record = {
+                        "render": trace.render_id,
+                        "total_ms": round(trace.total_ms, 3),
+                        "stages": {name: round(ms, 3) for name, ms in trace.stage_ms().items()},
+                    }
+                    file.write(json.dumps(record) + "\n")
+        return len(self.recorded)
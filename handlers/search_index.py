@@ -0,0 +1,250 @@
+import os
+import re
+import time
+import pickle
+import hashlib
+import threading
+from array import array
+from bisect import bisect_right
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from utils import get_app_data_dir, iter_markdown_files
+
+INDEX_VERSION = 1
+TOKEN_RE = re.compile(r"\w+")
+QUERY_RE = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return [token.lower() for token in TOKEN_RE.findall(text)]
+
+
+class SearchIndex:
+    """Positional inverted index over the markdown files of a workspace folder"""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.lock = threading.Lock()
+        # path -> (mtime_ns, size) of the indexed version
+        self.files = {}
+        # term -> {path: array of token positions}
+        self.postings = {}
+        # path -> terms occurring in the file, used to drop stale postings
+        self.file_terms = {}
+        # path -> token position at which each line starts
+        self.line_starts = {}
+
+    @property
+    def index_path(self):
+        """Location of the on-disk index for this workspace"""
+        digest = hashlib.sha1(self.root.encode('utf-8')).hexdigest()
+        return os.path.join(get_app_data_dir("search_index"), f"{digest}.pickle")
+
+    def load(self) -> bool:
+        """Load a previously saved index; returns False if none is usable"""
+        try:
+            with open(self.index_path, 'rb') as file:
+                data = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False
+        if data.get('version') != INDEX_VERSION or data.get('root') != self.root:
+            return False
+        with self.lock:
+            self.files = data['files']
+            self.postings = data['postings']
+            self.file_terms = data['file_terms']
+            self.line_starts = data['line_starts']
+        return True
+
+    def save(self):
+        """Persist the index atomically next to the other app data"""
+        with self.lock:
+            data = {
+                'version': INDEX_VERSION,
+                'root': self.root,
+                'files': self.files,
+                'postings': self.postings,
+                'file_terms': self.file_terms,
+                'line_starts': self.line_starts,
+            }
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'wb') as file:
+                pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.index_path)
+
+    def update(self, should_stop=lambda: False) -> int:
+        """Re-index files whose mtime or size changed; returns number of files touched"""
+        seen = set()
+        touched = 0
+        for path, stat in iter_markdown_files(self.root):
+            if should_stop():
+                return touched
+            seen.add(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if self.files.get(path) == signature:
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as file:
+                    content = file.read()
+            except OSError:
+                continue
+            self.index_file(path, content, signature)
+            touched += 1
+
+        # Forget files that were deleted since the last run
+        for path in set(self.files) - seen:
+            with self.lock:
+                self._remove_file(path)
+            touched += 1
+        return touched
+
+    def index_file(self, path, content, signature):
+        """Tokenize one file and replace its postings"""
+        file_postings = {}
+        line_starts = array('I')
+        position = 0
+        for line in content.split('\n'):
+            line_starts.append(position)
+            for token in TOKEN_RE.findall(line):
+                positions = file_postings.get(token.lower())
+                if positions is None:
+                    positions = file_postings[token.lower()] = array('I')
+                positions.append(position)
+                position += 1
+
+        with self.lock:
+            self._remove_file(path)
+            for term, positions in file_postings.items():
+                self.postings.setdefault(term, {})[path] = positions
+            self.file_terms[path] = list(file_postings)
+            self.line_starts[path] = line_starts
+            self.files[path] = signature
+
+    def _remove_file(self, path):
+        """Drop all postings of a file (caller holds the lock)"""
+        for term in self.file_terms.pop(path, ()):
+            paths = self.postings.get(term)
+            if paths is not None:
+                paths.pop(path, None)
+                if not paths:
+                    del self.postings[term]
+        self.line_starts.pop(path, None)
+        self.files.pop(path, None)
+
+    def search(self, query, limit=200):
+        """Answer a query of bare terms and "quoted phrases"; returns (path, line, hits)"""
+        clauses = []
+        for phrase, term in QUERY_RE.findall(query):
+            tokens = tokenize(phrase or term)
+            if tokens:
+                clauses.append(tokens)
+        if not clauses:
+            return []
+
+        with self.lock:
+            # Intersect candidate files starting from the rarest term
+            candidates = None
+            for term in sorted({t for clause in clauses for t in clause},
+                               key=lambda t: len(self.postings.get(t, ()))):
+                paths = set(self.postings.get(term, ()))
+                candidates = paths if candidates is None else candidates & paths
+                if not candidates:
+                    return []
+
+            results = []
+            for path in candidates:
+                hit_positions = None
+                for clause in clauses:
+                    positions = self._match_clause(path, clause)
+                    if not positions:
+                        hit_positions = None
+                        break
+                    hit_positions = positions if hit_positions is None else hit_positions | positions
+                if not hit_positions:
+                    continue
+                starts = self.line_starts[path]
+                lines = {}
+                for position in hit_positions:
+                    line = bisect_right(starts, position)
+                    lines[line] = lines.get(line, 0) + 1
+                for line, hits in lines.items():
+                    results.append((path, line, hits))
+
+        results.sort(key=lambda r: (-r[2], r[0], r[1]))
+        return results[:limit]
+
+    def _match_clause(self, path, tokens):
+        """Start positions in path where the token sequence occurs"""
+        first = self.postings[tokens[0]][path]
+        if len(tokens) == 1:
+            return set(first)
+        following = [set(self.postings[token][path]) for token in tokens[1:]]
+        return {
+            start for start in first
+            if all(start + offset + 1 in positions for offset, positions in enumerate(following))
+        }
+
+
+class IndexBuilder(QThread):
+    """Background thread that loads the saved index and refreshes it by mtime"""
+
+    indexing_finished = pyqtSignal(int)
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+
+    def run(self):
+        if not self.index.files:
+            self.index.load()
+        touched = self.index.update(should_stop=self.isInterruptionRequested)
+        if touched and not self.isInterruptionRequested():
+            try:
+                self.index.save()
+            except OSError as e:
+                print(f"Could not save search index: {e}")
+        self.indexing_finished.emit(touched)
+
+
+class SearchWorker(QThread):
+    """Background thread that runs one query and reads the snippets of its result lines"""
+
+    # generation, [(path, line, hits, snippet)], milliseconds for search and snippets
+    search_finished = pyqtSignal(int, list, float)
+
+    def __init__(self, index, query, generation, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.query = query
+        self.generation = generation
+
+    def run(self):
+        started = time.perf_counter()
+        matches = self.index.search(self.query)
+        wanted = {}
+        for path, line, _ in matches:
+            wanted.setdefault(path, set()).add(line)
+        snippets = {}
+        for path, lines in wanted.items():
+            if self.isInterruptionRequested():
+                return
+            snippets[path] = read_lines(path, lines)
+        results = [(path, line, hits, snippets[path].get(line, "")) for path, line, hits in matches]
+        self.search_finished.emit(self.generation, results, (time.perf_counter() - started) * 1000)
+
+
+def read_lines(path, line_numbers):
+    """Return {line number: stripped text} of some (1-based) lines of a file for result snippets"""
+    found = {}
+    last = max(line_numbers)
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            for number, line in enumerate(file, 1):
+                if number in line_numbers:
+                    found[number] = line.strip()
+                if number == last:
+                    break
+    except OSError:
+        pass
+    return found
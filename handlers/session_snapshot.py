@@ -0,0 +1,79 @@
+import os
+import json
+import time
+import hashlib
+
+from utils import get_app_data_dir
+
+# Larger previews are not worth keeping for startup
+MAX_PREVIEW_CHARS = 8 * 1024 * 1024
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+class SessionSnapshot:
+    """Last session's files, cursors and preview, read at startup before anything else loads"""
+
+    def __init__(self, folder=None):
+        self.folder = folder or get_app_data_dir("snapshot")
+        self.session_path = os.path.join(self.folder, "session.json")
+        self.preview_path = os.path.join(self.folder, "preview.html")
+        # path -> (text hash, theme id, preview HTML) still waiting to be shown
+        self.previews = {}
+
+    def icon_path(self, night_mode):
+        return os.path.join(self.folder, f"icon-{'dark' if night_mode else 'light'}.png")
+
+    def load(self):
+        """The saved session dict, or None"""
+        try:
+            with open(self.session_path, 'r', encoding='utf-8') as file:
+                session = json.load(file)
+        except (OSError, ValueError):
+            return None
+        preview = session.get("preview")
+        if preview:
+            try:
+                with open(self.preview_path, 'r', encoding='utf-8') as file:
+                    self.previews[preview["path"]] = (preview["hash"], preview["theme"], file.read())
+            except (OSError, KeyError, TypeError):
+                pass
+        return session
+
+    def cached_preview(self, path, text, theme):
+        """The saved preview HTML of path if it was rendered from exactly this text and theme (once)"""
+        entry = self.previews.pop(path, None)
+        if entry is not None and entry[:2] == (text_hash(text), theme):
+            return entry[2]
+        return None
+
+    def save(self, files, current, preview=None):
+        """Write the session; files are dicts with path, cursor and scroll.
+
+        preview is (path, text, theme id, html) of the current tab, or None.
+        """
+        session = {"saved": time.strftime("%Y-%m-%dT%H:%M:%S"), "files": files, "current": current}
+        try:
+            if preview is not None and len(preview[3]) <= MAX_PREVIEW_CHARS:
+                path, text, theme, html = preview
+                with open(self.preview_path, 'w', encoding='utf-8') as file:
+                    file.write(html)
+                session["preview"] = {"path": path, "hash": text_hash(text), "theme": theme}
+            with open(self.session_path, 'w', encoding='utf-8') as file:
+                json.dump(session, file, indent=1)
+        except OSError as e:
+            print(f"Could not save session snapshot: {e}")
+
+    def log_startup(self, interactive_ms, preview_ms=None, files=0):
+        """Append a time-to-interactive line to logs/startup.log"""
+        line = f"{time.strftime('%Y-%m-%dT%H:%M:%S')}\tinteractive {interactive_ms:.0f} ms"
+        if preview_ms is not None:
+            line += f"\tpreview {preview_ms:.0f} ms"
+        line += f"\tfiles {files}\n"
+        try:
+            with open(os.path.join(get_app_data_dir("logs"), "startup.log"), 'a', encoding='utf-8') as file:
+                file.write(line)
+        except OSError as e:
+            print(f"Could not write startup log: {e}")
@@ -0,0 +1,93 @@
+import os
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from utils import MARKDOWN_EXTENSIONS, IMAGE_EXTENSIONS
+
+WORKSPACE_EXTENSIONS = MARKDOWN_EXTENSIONS + IMAGE_EXTENSIONS
+
+
+def scan_directory(folder):
+    """(subfolder names, file names) of one folder, sorted, skipping hidden entries
+    and files that are neither markdown nor images; None if it cannot be read"""
+    folders = []
+    files = []
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith('.'):
+                    continue  # Skip .git, .venv and other hidden entries
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        folders.append(name)
+                    elif name.lower().endswith(WORKSPACE_EXTENSIONS):
+                        files.append(name)
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    folders.sort(key=str.lower)
+    files.sort(key=str.lower)
+    return folders, files
+
+
+class ScanSignals(QObject):
+    scanned = pyqtSignal(int, str, object)
+
+
+class ScanJob(QRunnable):
+    """Lists one folder on a pool thread"""
+
+    def __init__(self, generation, folder, signals):
+        super().__init__()
+        self.generation = generation
+        self.folder = folder
+        self.signals = signals
+
+    def run(self):
+        self.signals.scanned.emit(self.generation, self.folder, scan_directory(self.folder))
+
+
+class WorkspaceScanner(QObject):
+    """Scans workspace folders in the background, one folder per request.
+
+    Results carry the generation they were requested in; bumping it (on a
+    root change) makes late results from the old workspace easy to drop.
+    """
+
+    scanned = pyqtSignal(str, object)
+
+    def __init__(self, parent=None, max_workers=2):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers)
+        self.signals = ScanSignals(self)
+        self.signals.scanned.connect(self.on_scanned)
+        self.generation = 0
+        # Folders with a scan queued or running; repeated requests are merged
+        self.in_flight = set()
+        # In-flight folders that changed again after their scan was requested
+        self.stale = set()
+
+    def reset(self):
+        """Forget queued scans and ignore results of running ones"""
+        self.pool.clear()
+        self.generation += 1
+        self.in_flight.clear()
+        self.stale.clear()
+
+    def scan(self, folder):
+        if folder in self.in_flight:
+            self.stale.add(folder)
+            return
+        self.in_flight.add(folder)
+        self.pool.start(ScanJob(self.generation, folder, self.signals))
+
+    def on_scanned(self, generation, folder, listing):
+        if generation != self.generation:
+            return
+        self.in_flight.discard(folder)
+        if folder in self.stale:
+            self.stale.discard(folder)
+            self.scan(folder)
+        self.scanned.emit(folder, listing)
@@ -1,34 +1,102 @@
 import os
 import sys
+import time
+import threading
+# Startup is timed from here, before the Qt imports
+STARTED_AT = time.perf_counter()
 from pathlib import Path
-from PyQt5.QtWidgets import QMainWindow, QSplitter, QMessageBox, QApplication, QFileDialog, QInputDialog
+from PyQt5.QtWidgets import QMainWindow, QSplitter, QMessageBox, QApplication, QFileDialog, QInputDialog, QWidget, QVBoxLayout, QTabWidget
 from PyQt5.QtCore import Qt, QTimer, QSettings
 from PyQt5.QtGui import QIcon, QPalette, QColor, QPainter, QPen, QFont, QKeySequence
 
 # Local imports
-from editor.markdown_text_edit import MarkdownTextEdit
-from editor.preview_handler import PreviewHandler
+from editor.document_tab import DocumentTab
+from editor.preview_handler import PreviewHandler, WEB_ENGINE_AVAILABLE
+from editor.find_replace import FindReplaceBar
 from handlers.file_handler import FileHandler
 from handlers.image_handler import ImageHandler
+from handlers.file_watcher import FileWatcher
+from handlers.merge import merge3
+from handlers.link_checker import LinkChecker
+from handlers.render_tracer import RenderTracer
+from handlers.export_handler import ExportQueue, EXPORT_FORMATS
+from handlers.session_snapshot import SessionSnapshot
+from handlers.link_graph import retarget_links
+from handlers.completion_index import CompletionIndex, CompletionIndexBuilder
 from ui.toolbar import setup_toolbar
 from ui.menu import setup_menu
-from ui.statusbar import setup_statusbar, update_status_bar
+from ui.statusbar import (setup_statusbar, update_status_bar, update_render_stats, update_export_progress,
+                          update_document_stats, update_undo_stats)
+from ui.search_panel import SearchPanel
+from ui.workspace_tree import WorkspaceTree
+from ui.backlinks_panel import BacklinksPanel
+from ui.diff_view import DiffDialog
 from theme.theme_manager import ThemeManager
 from converter.markdown_converter import MarkdownConverter
+from converter.render_pool import RenderPool
+from converter.render_cache import RenderCache
+from converter.diagram_renderer import DiagramRenderer
+from converter.pipeline import PipelineContext
+from converter.sandbox import ConversionSandbox
+from utils import get_available_memory
+
+# Rendered HTML kept for background tabs before the least recently used are evicted
+MAX_CACHED_HTML_CHARS = 32 * 1024 * 1024
+# Below this much free system memory, background tabs drop their HTML entirely
+LOW_MEMORY_BYTES = 256 * 1024 * 1024
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.current_file = None
-        self.is_modified = False
+        self.documents = {}  # editor widget -> DocumentTab
         self.settings = QSettings("MyApp", "Markdown Editor")
         self.night_mode = self.settings.value("nightMode", False, type=bool)
+        self.lite_preview = self.settings.value("litePreview", False, type=bool) or not WEB_ENGINE_AVAILABLE
+        self.workspace_root = self.settings.value("workspaceRoot", "")
+        self.paste_as_code = self.settings.value("pasteAsCode", False, type=bool)
+        self.paste_rich_text = self.settings.value("pasteRichText", True, type=bool)
+        # Until the first event loop turn, previews wait and the web engine is not started
+        self.starting_up = True
+        self.snapshot = SessionSnapshot()
         
         # Initialize handlers
         self.file_handler = FileHandler()
         self.image_handler = ImageHandler(self.settings)
+        self.file_watcher = FileWatcher(self)
+        self.file_watcher.file_changed.connect(self.on_file_changed_externally)
+        self.file_watcher.file_removed.connect(self.on_file_removed_externally)
+        self.link_checker = LinkChecker(self)
         self.theme_manager = ThemeManager(self)
         self.converter = MarkdownConverter(self)
+        cache_mb = self.settings.value("renderCacheMB", 256, type=int)
+        self.converter.cache = RenderCache(max_bytes=cache_mb * 1024 * 1024)
+        self.converter.diagrams = DiagramRenderer(parent=self)
+        self.converter.sandbox = ConversionSandbox(
+            timeout=self.settings.value("conversionTimeoutS", 10, type=int),
+            max_rss_mb=self.settings.value("conversionMemoryMB", 1024, type=int)
+        )
+        # Diagrams finishing close together are swapped in with one preview update
+        self.diagram_timer = QTimer(self)
+        self.diagram_timer.setSingleShot(True)
+        self.diagram_timer.setInterval(100)
+        self.diagram_timer.timeout.connect(self.refresh_diagrams)
+        self.converter.diagrams.diagram_ready.connect(self.diagram_timer.start)
+        # Stages skipped to keep live renders fast run once typing pauses
+        self.deferred_timer = QTimer(self)
+        self.deferred_timer.setSingleShot(True)
+        self.deferred_timer.setInterval(1000)
+        self.deferred_timer.timeout.connect(self.render_deferred_stages)
+        self.render_tracer = RenderTracer(self)
+        self.render_tracer.trace_finished.connect(lambda trace: update_render_stats(self))
+        self.debounce_started = None
+        self.render_pool = RenderPool(self.converter, parent=self)
+        self.render_pool.rendered.connect(self.on_rendered)
+        self.export_queue = ExportQueue(self.converter, parent=self)
+        # Running "Show Changes" diffs, stopped on close
+        self.diff_workers = set()
+        self.export_queue.progress_changed.connect(lambda done, total: update_export_progress(self, done, total))
+        self.export_queue.job_done.connect(self.on_export_done)
+        self.export_queue.recompress_images = self.settings.value("exportRecompressImages", False, type=bool)
         
         self.init_ui()
         setup_menu(self)
@@ -40,6 +108,8 @@ class MainWindow(QMainWindow):
         self.restore_geometry()
         # Set application icon
         self.set_app_icon()
+        self.restore_session()
+        QTimer.singleShot(0, self.finish_startup)
 
     def init_ui(self):
         """Initialize the main UI components"""
@@ -49,16 +119,27 @@ class MainWindow(QMainWindow):
         # Create splitter for resizable panes
         self.splitter = QSplitter(Qt.Horizontal)
         
-        # Left pane: Editor
-        self.editor = MarkdownTextEdit(self)
-        self.editor.textChanged.connect(self.on_text_changed)
+        # Left pane: Editor tabs with the find/replace bar underneath
+        self.tabs = QTabWidget()
+        self.tabs.setTabsClosable(True)
+        self.tabs.setMovable(True)
+        self.tabs.setDocumentMode(True)
+        self.tabs.tabCloseRequested.connect(self.close_tab)
+        self.find_bar = FindReplaceBar(self)
         
-        # Right pane: Preview
-        self.preview_handler = PreviewHandler(self)
+        editor_pane = QWidget()
+        editor_layout = QVBoxLayout(editor_pane)
+        editor_layout.setContentsMargins(0, 0, 0, 0)
+        editor_layout.setSpacing(0)
+        editor_layout.addWidget(self.tabs)
+        editor_layout.addWidget(self.find_bar)
+        
+        # Right pane: Preview (lite until the first paint; see finish_startup)
+        self.preview_handler = PreviewHandler(self, lite=True)
         self.preview = self.preview_handler.widget
         
         # Add to splitter
-        self.splitter.addWidget(self.editor)
+        self.splitter.addWidget(editor_pane)
         self.splitter.addWidget(self.preview)
         self.splitter.setStretchFactor(0, 1)
         self.splitter.setStretchFactor(1, 1)
@@ -71,6 +152,120 @@ class MainWindow(QMainWindow):
         self.preview_timer = QTimer()
         self.preview_timer.setSingleShot(True)
         self.preview_timer.timeout.connect(self.update_preview)
+        
+        # Start with one empty document
+        self.add_tab()
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+        
+        # Workspace file tree; filled in once the window is up (see finish_startup)
+        self.workspace_tree = WorkspaceTree(self)
+        self.addDockWidget(Qt.LeftDockWidgetArea, self.workspace_tree)
+        has_workspace = bool(self.workspace_root) and os.path.isdir(self.workspace_root)
+        self.workspace_tree.setVisible(has_workspace and self.settings.value("workspaceTreeVisible", True, type=bool))
+        
+        # Workspace search dock (hidden until used)
+        self.search_panel = SearchPanel(self)
+        self.addDockWidget(Qt.LeftDockWidgetArea, self.search_panel)
+        self.search_panel.hide()
+        
+        # Backlinks of the current document (hidden until shown from the View menu)
+        self.backlinks_panel = BacklinksPanel(self)
+        self.addDockWidget(Qt.RightDockWidgetArea, self.backlinks_panel)
+        self.backlinks_panel.hide()
+        
+        # Files offered when typing a link target; kept current by the tree's rescans and by saves
+        self.completion_index = CompletionIndex()
+        self.completion_builder = None
+        self.workspace_tree.scanner.scanned.connect(self.completion_index.update_folder)
+
+    @property
+    def current_tab(self):
+        """DocumentTab shown in the editor pane"""
+        return self.documents.get(self.tabs.currentWidget())
+
+    @property
+    def editor(self):
+        """Editor widget of the active tab"""
+        return self.tabs.currentWidget()
+
+    @property
+    def current_file(self):
+        return self.current_tab.current_file
+
+    @current_file.setter
+    def current_file(self, file_path):
+        self.current_tab.current_file = file_path
+        self.update_tab_title(self.current_tab)
+
+    @property
+    def is_modified(self):
+        return self.current_tab.is_modified
+
+    @is_modified.setter
+    def is_modified(self, modified):
+        self.current_tab.is_modified = modified
+        self.update_tab_title(self.current_tab)
+
+    def add_tab(self) -> DocumentTab:
+        """Create an empty document tab and make it current"""
+        tab = DocumentTab(self)
+        tab.editor.textChanged.connect(self.on_text_changed)
+        tab.tracker.blocks_changed.connect(lambda *args, tab=tab: self.on_stats_changed(tab))
+        tab.editor.cursorPositionChanged.connect(lambda tab=tab: self.on_stats_changed(tab))
+        tab.history.changed.connect(lambda tab=tab: self.on_history_changed(tab))
+        self.find_bar.connect_editor(tab.editor)
+        self.documents[tab.editor] = tab
+        self.tabs.setCurrentIndex(self.tabs.addTab(tab.editor, tab.title))
+        return tab
+
+    def tab_for_file(self, file_path):
+        """Return the tab already showing file_path, if any"""
+        for tab in self.documents.values():
+            if tab.current_file and os.path.abspath(tab.current_file) == os.path.abspath(file_path):
+                return tab
+        return None
+
+    def update_tab_title(self, tab):
+        """Refresh a tab's label and, for the active tab, the window title"""
+        index = self.tabs.indexOf(tab.editor)
+        if index >= 0:
+            self.tabs.setTabText(index, tab.title)
+            self.tabs.setTabToolTip(index, tab.current_file or "Untitled")
+        if tab is self.current_tab:
+            self.update_window_title()
+
+    def close_tab(self, index):
+        """Close a tab after a save check; always keep one tab open"""
+        tab = self.documents.get(self.tabs.widget(index))
+        if tab is None or not self.check_save(tab):
+            return
+        self.render_pool.discard(tab)
+        if tab.current_file:
+            self.file_watcher.unwatch(tab.current_file)
+        self.tabs.removeTab(self.tabs.indexOf(tab.editor))
+        del self.documents[tab.editor]
+        tab.editor.deleteLater()
+        if not self.documents:
+            self.add_tab()
+            self.update_preview()
+
+    def on_tab_changed(self, index):
+        """Show the activated tab's cached preview, re-rendering if it was evicted"""
+        tab = self.current_tab
+        if tab is None:
+            return
+        tab.last_active = time.monotonic()
+        self.update_window_title()
+        update_document_stats(self)
+        update_undo_stats(self)
+        if tab.html is not None and not self.preview_handler.lite:
+            self.preview_handler.show_html(tab.html)
+        else:
+            self.update_preview()
+        if self.find_bar.isVisible():
+            self.find_bar.start_search()
+        self.link_checker.schedule(0, recheck=True)
+        self.backlinks_panel.show_file(tab.current_file)
 
     def restore_geometry(self):
         """Restore window geometry and splitter state"""
@@ -83,9 +278,92 @@ class MainWindow(QMainWindow):
             self.splitter.restoreState(splitter_state)
 
     def save_geometry(self):
-        """Save window geometry and splitter state"""
+        """Save window geometry, splitter state and whether the workspace tree is shown"""
         self.settings.setValue("geometry", self.saveGeometry())
         self.settings.setValue("splitterState", self.splitter.saveState())
+        self.settings.setValue("workspaceTreeVisible", self.workspace_tree.isVisible())
+
+    def restore_session(self):
+        """Reopen last session's files and show its saved preview before anything renders"""
+        self.restored_scroll = []
+        session = self.snapshot.load()
+        if not session:
+            return
+        entries = [entry for entry in session.get("files", []) if os.path.isfile(entry.get("path", ""))]
+        if not entries:
+            return
+        self.open_files([entry["path"] for entry in entries])
+        self.preview_timer.stop()
+        self.debounce_started = None
+        for entry in entries:
+            tab = self.tab_for_file(entry["path"])
+            if tab is None:
+                continue
+            cursor = tab.editor.textCursor()
+            cursor.setPosition(min(entry.get("cursor", 0), tab.editor.document().characterCount() - 1))
+            tab.editor.setTextCursor(cursor)
+            # Scroll ranges are only known once the editors are laid out
+            self.restored_scroll.append((tab, entry.get("scroll", 0)))
+        
+        current = self.tab_for_file(session["current"]) if session.get("current") else None
+        if current is None:
+            return
+        self.tabs.setCurrentWidget(current.editor)
+        html = self.snapshot.cached_preview(current.current_file, current.tracker.text(), self.theme_manager.theme_id())
+        if html is not None:
+            current.preview_dirty.take()
+            current.html = html
+            self.preview_handler.show_html(html)
+
+    def save_session(self):
+        """Snapshot open files, cursors and the current preview for the next launch"""
+        files = []
+        for index in range(self.tabs.count()):
+            tab = self.documents[self.tabs.widget(index)]
+            if tab.current_file:
+                files.append({
+                    "path": tab.current_file,
+                    "cursor": tab.editor.textCursor().position(),
+                    "scroll": tab.editor.verticalScrollBar().value(),
+                })
+        tab = self.current_tab
+        preview = None
+        if tab.current_file and tab.html is not None:
+            preview = (tab.current_file, tab.tracker.text(), self.theme_manager.theme_id(), tab.html)
+        self.snapshot.save(files, tab.current_file, preview)
+
+    def finish_startup(self):
+        """Runs once the window is painted: start the engines and log time-to-interactive"""
+        self.starting_up = False
+        self.interactive_ms = (time.perf_counter() - STARTED_AT) * 1000
+        for tab, scroll in self.restored_scroll:
+            tab.editor.verticalScrollBar().setValue(scroll)
+        self.restored_scroll = []
+        
+        if not self.lite_preview and self.preview_handler.set_lite_mode(False):
+            self.preview = self.preview_handler.widget
+        self.preview_handler.apply_lite_style()
+        self.render_tracer.trace_finished.connect(self.on_first_preview)
+        self.update_preview()
+        
+        # Converter version probe and cache index scan stay off the UI thread
+        threading.Thread(target=self.warm_up, daemon=True).start()
+        if self.workspace_root and os.path.isdir(self.workspace_root):
+            self.workspace_tree.set_root(self.workspace_root)
+            self.search_panel.set_root(self.workspace_root)
+            self.backlinks_panel.set_root(self.workspace_root)
+        self.refresh_completion_index()
+        self.status_bar.showMessage(f"Ready in {self.interactive_ms:.0f} ms", 3000)
+
+    def warm_up(self):
+        self.converter.backend_id()
+        self.converter.cache.size()
+        self.converter.sandbox.warm_up()
+
+    def on_first_preview(self, trace):
+        self.render_tracer.trace_finished.disconnect(self.on_first_preview)
+        preview_ms = (time.perf_counter() - STARTED_AT) * 1000
+        self.snapshot.log_startup(self.interactive_ms, preview_ms, sum(1 for tab in self.documents.values() if tab.current_file))
 
     def dragEnterEvent(self, event):
         """Accept drag events containing .md files"""
@@ -95,21 +373,37 @@ class MainWindow(QMainWindow):
             event.ignore()
 
     def dropEvent(self, event):
-        """Handle file drop - load first valid .md file after save check"""
+        """Handle file drop - open every valid .md file in its own tab"""
         paths = self.file_handler.extract_md_paths(event.mimeData())
-        if paths and self.check_save():
-            self.load_file(paths[0])
+        if paths:
+            self.open_files(paths)
         event.acceptProposedAction()  # Always accept to prevent OS default
 
     def on_text_changed(self):
         """Track modifications and update preview"""
-        if not self.is_modified:
-            self.is_modified = True
-            self.update_window_title()
+        tab = self.documents.get(self.sender()) or self.current_tab
+        if not tab.is_modified:
+            tab.is_modified = True
+            self.update_tab_title(tab)
+        tab.evict(keep_last_good=True)
+        # Renders of the text before this edit are stale, even if the debounce has not fired yet
+        tab.render_revision += 1
         
         # Debounce preview updates
-        self.preview_timer.stop()
-        self.preview_timer.start(300)
+        if tab is self.current_tab:
+            if self.debounce_started is None:
+                self.debounce_started = time.perf_counter()
+            self.preview_timer.stop()
+            self.preview_timer.start(300)
+            self.link_checker.schedule()
+
+    def on_stats_changed(self, tab):
+        if tab is self.current_tab:
+            update_document_stats(self)
+
+    def on_history_changed(self, tab):
+        if tab is self.current_tab:
+            update_undo_stats(self)
 
     def update_window_title(self):
         """Show current file and modification status"""
@@ -121,31 +415,112 @@ class MainWindow(QMainWindow):
         self.setWindowTitle(title)
 
     def new_file(self):
-        """Create new document"""
-        if self.check_save():
-            self.editor.clear()
-            self.current_file = None
-            self.is_modified = False
-            self.update_window_title()
-            self.update_preview()
+        """Create new document in its own tab"""
+        self.add_tab()
+        self.update_preview()
 
     def open_file(self):
         """Open file dialog"""
-        file_path, _ = QFileDialog.getOpenFileName(
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self, "Open Markdown File", "",
             "Markdown Files (*.md *.markdown);;Text Files (*.txt);;All Files (*)"
         )
-        if file_path:
-            self.load_file(file_path)
+        if file_paths:
+            self.open_files(file_paths)
 
     def load_file(self, file_path):
-        """Load file into editor"""
-        if self.file_handler.load_file(file_path, self.editor):
-            self.current_file = file_path
-            self.is_modified = False
-            self.update_window_title()
+        """Load file into a tab (switching to it if it is already open)"""
+        return self.open_files([file_path])
+
+    def open_files(self, file_paths):
+        """Read files in parallel and open each one in a tab; returns True if all opened"""
+        to_read = []
+        for file_path in file_paths:
+            tab = self.tab_for_file(file_path)
+            if tab is not None:
+                self.tabs.setCurrentWidget(tab.editor)
+            elif file_path not in to_read:
+                to_read.append(file_path)
+        
+        opened = 0
+        loaded_path = None
+        for file_path, content, error in self.file_handler.read_files(to_read):
+            if error is not None:
+                self.file_handler.show_load_error(file_path, error)
+                continue
+            tab = self.current_tab if self.current_tab.is_blank() else self.add_tab()
+            tab.editor.setPlainText(content)
+            tab.history.clear()  # Loading is not an undoable edit
+            tab.current_file = file_path
+            tab.is_modified = False
+            tab.saved_text = content
+            self.file_watcher.watch(file_path, content)
+            self.tabs.setCurrentWidget(tab.editor)
+            self.update_tab_title(tab)
             self.update_preview()
-            self.status_bar.showMessage(f"Loaded: {os.path.basename(file_path)}", 3000)
+            opened += 1
+            loaded_path = file_path
+        
+        if opened == 1:
+            self.status_bar.showMessage(f"Loaded: {os.path.basename(loaded_path)}", 3000)
+        elif opened:
+            self.status_bar.showMessage(f"Loaded {opened} files", 3000)
+        return opened == len(to_read)
+
+    def open_file_at_line(self, file_path, line):
+        """Open a file (if not already current) and put the cursor on a 1-based line"""
+        if not self.load_file(file_path):
+            return
+        block = self.editor.document().findBlockByNumber(max(line - 1, 0))
+        cursor = self.editor.textCursor()
+        cursor.setPosition(block.position())
+        self.editor.setTextCursor(cursor)
+        self.editor.centerCursor()
+        self.editor.setFocus()
+
+    def show_find(self):
+        """Open the find bar"""
+        self.find_bar.open_bar()
+
+    def show_replace(self):
+        """Open the find bar focused on the replacement field"""
+        self.find_bar.open_bar(replace=True)
+
+    def open_workspace_folder(self):
+        """Choose the workspace folder shown in the file tree and used for search"""
+        folder = QFileDialog.getExistingDirectory(
+            self, "Open Workspace Folder", self.workspace_root
+        )
+        if folder:
+            self.workspace_root = folder
+            self.settings.setValue("workspaceRoot", folder)
+            self.workspace_tree.set_root(folder)
+            self.workspace_tree.show()
+            self.search_panel.set_root(folder)
+            self.search_panel.show()
+            self.backlinks_panel.set_root(folder)
+            self.refresh_completion_index()
+
+    def refresh_completion_index(self):
+        """Rebuild the link completion index for the workspace and image folders in the background"""
+        folders = (self.workspace_root, self.image_handler.save_folder)
+        roots = tuple(dict.fromkeys(os.path.abspath(folder) for folder in folders if folder and os.path.isdir(folder)))
+        if self.completion_builder and self.completion_builder.isRunning():
+            self.completion_builder.requestInterruption()
+            self.completion_builder.wait()
+        self.completion_builder = CompletionIndexBuilder(self.completion_index, roots, self)
+        self.completion_builder.index_built.connect(self.completion_index.replace)
+        self.completion_builder.start()
+
+    def show_workspace_search(self):
+        """Show the workspace search dock, asking for a folder if none is set"""
+        if not self.workspace_root or not os.path.isdir(self.workspace_root):
+            self.open_workspace_folder()
+            return
+        self.search_panel.refresh_index()
+        self.search_panel.show()
+        self.search_panel.query_input.setFocus()
+        self.search_panel.query_input.selectAll()
 
     def save_file(self):
         """Save current file"""
@@ -167,32 +542,326 @@ class MainWindow(QMainWindow):
 
     def write_file(self, file_path):
         """Write content to file"""
-        if self.file_handler.save_file(file_path, self.editor.toPlainText()):
+        if self.file_watcher.has_changed(file_path):
+            reply = QMessageBox.warning(
+                self, "File Changed on Disk",
+                f"'{os.path.basename(file_path)}' was changed by another program since it was opened.\n"
+                "Overwrite it with the editor contents?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+            )
+            if reply != QMessageBox.Yes:
+                return
+        content = self.editor.toPlainText()
+        if self.file_handler.save_file(file_path, content):
+            tab = self.current_tab
+            if tab.current_file and tab.current_file != file_path:
+                self.file_watcher.unwatch(tab.current_file)
             self.current_file = file_path
             self.is_modified = False
+            tab.saved_text = content
+            self.file_watcher.watch(file_path, content)
+            self.backlinks_panel.file_saved(file_path, content)
+            self.completion_index.add(os.path.abspath(file_path))
             self.update_window_title()
             self.status_bar.showMessage(f"Saved: {os.path.basename(file_path)}", 3000)
 
-    def check_save(self) -> bool:
+    def rename_file(self):
+        """Rename or move the current file and point the workspace's links at its new name"""
+        tab = self.current_tab
+        if not tab.current_file:
+            self.status_bar.showMessage("Save the document before renaming it", 3000)
+            return
+        if self.backlinks_panel.is_building():
+            # Files the builder has not reached yet would keep links to the old name
+            QMessageBox.information(
+                self, "Rename File",
+                "The workspace's links are still being read. Try again once that has finished."
+            )
+            return
+        old_path = os.path.abspath(tab.current_file)
+        new_path, _ = QFileDialog.getSaveFileName(
+            self, "Rename File", old_path, "Markdown Files (*.md *.markdown)",
+            options=QFileDialog.DontConfirmOverwrite
+        )
+        if not new_path or os.path.abspath(new_path) == old_path:
+            return
+        new_path = os.path.abspath(new_path)
+        if os.path.exists(new_path):
+            QMessageBox.critical(self, "Error", f"'{os.path.basename(new_path)}' already exists.")
+            return
+        
+        graph = self.backlinks_panel.graph
+        sources = []
+        if graph is not None and graph.contains(old_path):
+            sources = [source for source in graph.linking_files(old_path) if source != old_path]
+        if sources:
+            reply = QMessageBox.question(
+                self, "Rename File",
+                f"{len(sources)} file(s) link to '{os.path.basename(old_path)}'.\n"
+                "Rename it and update those links?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
+            )
+            if reply != QMessageBox.Yes:
+                return
+        try:
+            os.rename(old_path, new_path)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not rename the file: {e}")
+            return
+        
+        self.file_watcher.unwatch(old_path)
+        self.current_file = new_path
+        self.completion_index.remove(os.path.abspath(old_path))
+        self.completion_index.add(os.path.abspath(new_path))
+        self.file_watcher.watch(new_path, tab.saved_text)
+        # Relative links in the document itself must follow it to another folder
+        text = tab.tracker.text()
+        new_text, _ = retarget_links(text, os.path.dirname(old_path), old_path, new_path, os.path.dirname(new_path))
+        if new_text != text:
+            tab.replace_text(new_text)
+        
+        # Open documents are edited in place (undoable); the rest are rewritten on disk
+        updated_links = updated_files = 0
+        # "path: reason" of linking files that could not be rewritten
+        failed = []
+        for source in sources:
+            source_tab = self.tab_for_file(source)
+            if source_tab is not None:
+                text = source_tab.tracker.text()
+            else:
+                try:
+                    text = self.file_handler.read_file(source)
+                except (OSError, UnicodeDecodeError) as e:
+                    failed.append(f"{source}: {e}")
+                    continue
+            new_text, count = retarget_links(text, os.path.dirname(source), old_path, new_path)
+            if not count:
+                continue
+            if source_tab is not None:
+                source_tab.replace_text(new_text)
+            elif self.file_handler.save_file(source, new_text):
+                graph.index_file(source, new_text)
+            else:
+                failed.append(f"{source}: could not be saved")
+                continue
+            updated_links += count
+            updated_files += 1
+        
+        if graph is not None and graph.contains(old_path):
+            graph.remove_file(old_path)
+            graph.index_file(new_path, tab.saved_text)
+        self.backlinks_panel.show_file(new_path)
+        self.status_bar.showMessage(
+            f"Renamed to {os.path.basename(new_path)}; updated {updated_links} link(s) in {updated_files} file(s)", 5000
+        )
+        if failed:
+            QMessageBox.warning(
+                self, "Rename File",
+                f"Links to '{os.path.basename(old_path)}' could not be updated in {len(failed)} file(s):\n\n"
+                + "\n".join(failed)
+            )
+
+    def on_file_changed_externally(self, file_path, content):
+        """Reload a clean buffer in place, or offer to merge into a modified one"""
+        tab = self.tab_for_file(file_path)
+        if tab is None:
+            return
+        name = os.path.basename(file_path)
+        if not tab.is_modified:
+            tab.replace_text(content)
+            tab.saved_text = content
+            tab.is_modified = False
+            self.update_tab_title(tab)
+            self.status_bar.showMessage(f"Reloaded: {name} (changed on disk)", 3000)
+            return
+        
+        self.tabs.setCurrentWidget(tab.editor)
+        box = QMessageBox(QMessageBox.Warning, "File Changed on Disk",
+                          f"'{name}' was changed by another program and has unsaved edits here.", parent=self)
+        merge_button = box.addButton("Merge", QMessageBox.AcceptRole)
+        reload_button = box.addButton("Reload from Disk", QMessageBox.DestructiveRole)
+        box.addButton("Keep Mine", QMessageBox.RejectRole)
+        box.setDefaultButton(merge_button)
+        box.exec_()
+        
+        if box.clickedButton() is merge_button:
+            merged, conflicts = merge3(tab.saved_text, tab.editor.toPlainText(), content)
+            tab.replace_text(merged)
+            if conflicts:
+                self.status_bar.showMessage(f"Merged with {conflicts} conflict(s) - look for <<<<<<< markers", 8000)
+            else:
+                self.status_bar.showMessage(f"Merged changes from disk into {name}", 3000)
+        elif box.clickedButton() is reload_button:
+            tab.replace_text(content)
+            tab.is_modified = False
+            self.update_tab_title(tab)
+        # The disk version is now the common base for later merges and saves
+        tab.saved_text = content
+
+    def on_file_removed_externally(self, file_path):
+        """Mark a document whose file was deleted as unsaved"""
+        tab = self.tab_for_file(file_path)
+        if tab is not None:
+            tab.is_modified = True
+            self.update_tab_title(tab)
+            self.status_bar.showMessage(f"{os.path.basename(file_path)} was deleted or moved on disk", 5000)
+
+    def check_save(self, tab=None) -> bool:
         """Prompt to save if modified"""
-        if not self.is_modified:
+        tab = tab or self.current_tab
+        if not tab.is_modified:
             return True
+        # Show the document being asked about; saving acts on the current tab
+        self.tabs.setCurrentWidget(tab.editor)
         
         filename = os.path.basename(self.current_file) if self.current_file else 'Untitled'
-        reply = QMessageBox.question(
-            self, "Save Changes?",
+        box = QMessageBox(
+            QMessageBox.Question, "Save Changes?",
             f"The document '{filename}' has been modified.\nSave changes?",
-            QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel
+            QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel, self
         )
+        changes_button = box.addButton("Show Changes...", QMessageBox.ActionRole) if tab.current_file else None
+        while True:
+            reply = box.exec_()
+            if changes_button is None or box.clickedButton() is not changes_button:
+                break
+            self.show_changes(tab, modal=True)
         
         if reply == QMessageBox.Save:
             self.save_file()
             return True
         return reply == QMessageBox.Discard
 
+    def show_changes(self, tab=None, modal=False):
+        """Show what changed in the buffer since the file on disk, diffed in the background"""
+        tab = tab or self.current_tab
+        if not tab.current_file:
+            self.status_bar.showMessage("Save the document first to compare it with the saved file", 3000)
+            return
+        dialog = DiffDialog(self, tab)
+        dialog.start()
+        if modal:
+            dialog.exec_()
+        else:
+            dialog.setAttribute(Qt.WA_DeleteOnClose)
+            dialog.show()
+
+    def on_diff_ready(self, tab, key, added, removed, html):
+        """Keep the latest diff until the buffer or the file on disk changes"""
+        tab.diff = (key, added, removed, html)
+
     def update_preview(self):
-        """Render markdown to HTML"""
-        self.preview_handler.update_preview(self.editor.toPlainText())
+        """Render markdown to HTML on the shared render pool"""
+        if self.starting_up:
+            return  # finish_startup renders the current tab
+        tab = self.current_tab
+        trace = self.render_tracer.start()
+        if self.debounce_started is not None:
+            trace.add("debounce", self.debounce_started, time.perf_counter())
+            self.debounce_started = None
+        with trace.stage("extract"):
+            dirty = tab.preview_dirty.take()
+            if not dirty and not self.preview_handler.lite:
+                # Nothing changed since the last conversion: reuse it, re-themed if needed
+                if tab.html is None and tab.body_html is not None:
+                    tab.html = self.converter.page_for_body(tab.body_html)
+                if tab.html is not None:
+                    self.show_rendered(tab.html, trace)
+                    return
+            text = tab.tracker.text()
+        tab.render_revision += 1
+        if not text.strip():
+            tab.body_html = ""
+            tab.html = self.converter.get_preview_template("Preview will appear here...")
+            self.show_rendered(tab.html, trace)
+            return
+        if self.preview_handler.lite:
+            # Qt's native markdown parser builds the document in a background thread
+            started = time.perf_counter()
+
+            def shown():
+                trace.add("convert", started, time.perf_counter())
+                self.render_tracer.widget_updated(trace, False)
+
+            self.preview_handler.show_markdown(text, shown)
+            return
+        context = PipelineContext(base_dir=self.document_dir(tab))
+        self.render_pool.render(tab, tab.render_revision, text, trace, context=context)
+
+    def document_dir(self, tab):
+        """Folder relative paths in a document resolve against, or None for untitled documents"""
+        return os.path.dirname(os.path.abspath(tab.current_file)) if tab.current_file else None
+
+    def on_rendered(self, tab, revision, body, html, trace, context):
+        """Cache a finished render and show it if its tab is still current"""
+        if tab.editor not in self.documents or revision != tab.render_revision:
+            return  # Closed tab or superseded by a newer edit
+        if body is not None:
+            tab.last_good_body = body
+        elif context.error and tab.last_good_body is not None:
+            # Keep showing the previous render rather than an error page
+            html = self.converter.page_with_warning(tab.last_good_body, context.error)
+            self.status_bar.showMessage(context.error, 5000)
+        tab.body_html = body
+        tab.html = html
+        tab.body_complete = not context.skipped
+        if context.skipped and tab is self.current_tab:
+            self.deferred_timer.start()
+        if tab is self.current_tab:
+            self.show_rendered(html, trace)
+        if body and self.converter.diagrams.has_pending(body):
+            # A diagram may have finished before this body arrived
+            self.diagram_timer.start()
+        self.evict_background_tabs()
+
+    def render_deferred_stages(self):
+        """Re-render the current tab with the stages that were over their live budget"""
+        tab = self.current_tab
+        if tab.body_complete or tab.html is None:
+            return  # Already complete, or an edit has a render on the way
+        context = PipelineContext(base_dir=self.document_dir(tab), budgets=False)
+        self.render_pool.render(tab, tab.render_revision, tab.tracker.text(), self.render_tracer.start(), context=context)
+
+    def refresh_diagrams(self):
+        """Swap finished diagrams into rendered bodies without converting again"""
+        diagrams = self.converter.diagrams
+        current = self.current_tab
+        for tab in self.documents.values():
+            if not tab.body_html or not diagrams.has_pending(tab.body_html):
+                continue
+            body = diagrams.refresh(tab.body_html)
+            if body == tab.body_html:
+                continue
+            tab.body_html = body
+            if tab is current and tab.html is not None and not self.preview_handler.lite:
+                tab.html = self.converter.page_for_body(body)
+                self.show_rendered(tab.html, self.render_tracer.start())
+            elif tab.html is not None:
+                tab.html = None  # Re-wrapped from body_html when activated
+
+    def show_rendered(self, html, trace):
+        """Put HTML into the preview widget, timing the update"""
+        with trace.stage("update"):
+            waits_for_load = self.preview_handler.show_html(html)
+        self.render_tracer.widget_updated(trace, waits_for_load)
+
+    def evict_background_tabs(self):
+        """Drop rendered HTML of least recently used background tabs under memory pressure"""
+        background = sorted(
+            (tab for tab in self.documents.values() if tab is not self.current_tab and tab.html is not None),
+            key=lambda tab: tab.last_active
+        )
+        available = get_available_memory()
+        if available is not None and available < LOW_MEMORY_BYTES:
+            for tab in background:
+                tab.evict()
+            return
+        cached = sum(len(tab.html) for tab in background)
+        for tab in background:
+            if cached <= MAX_CACHED_HTML_CHARS:
+                break
+            cached -= len(tab.html)
+            tab.evict()
 
     def wrap_selection(self, before: str, after: str):
         """Wrap selected text with markdown syntax"""
@@ -227,10 +896,13 @@ class MainWindow(QMainWindow):
             self, "Select Image", "", "Images (*.png *.jpg *.jpeg *.gif *.svg)"
         )
         if file_path:
-            # Make path relative if possible
-            saved_path = self.image_handler.get_relative_image_path(file_path, self.current_file)
-            alt = os.path.splitext(os.path.basename(saved_path))[0]
-            self.insert_text(f"![{alt}]({saved_path})\n")
+            self.insert_image_path(file_path)
+
+    def insert_image_path(self, file_path):
+        """Insert image markdown for a file, relative to the current document if possible"""
+        saved_path = self.image_handler.get_relative_image_path(file_path, self.current_file)
+        alt = os.path.splitext(os.path.basename(saved_path))[0]
+        self.insert_text(f"![{alt}]({saved_path})\n")
 
     def insert_list(self):
         """Insert bulleted list"""
@@ -255,15 +927,67 @@ class MainWindow(QMainWindow):
         """Change the default image save folder"""
         self.image_handler.change_folder(self)
         update_status_bar(self)
+        self.refresh_completion_index()
 
     def change_name_prefix(self):
         """Change the image name prefix"""
         self.image_handler.change_prefix(self)
         update_status_bar(self)
 
+    def change_undo_budget(self):
+        """Set how much memory each document's undo history may use"""
+        budget_mb, ok = QInputDialog.getInt(self, "Undo History", "Undo memory per document (MB):",
+                                            self.current_tab.history.budget_bytes // (1024 * 1024), 1, 4096)
+        if not ok:
+            return
+        self.settings.setValue("undoBudgetMB", budget_mb)
+        for tab in self.documents.values():
+            tab.history.set_budget(budget_mb * 1024 * 1024)
+
+    def toggle_paste_as_code(self, enabled):
+        """Wrap pasted text in a fenced code block"""
+        self.paste_as_code = enabled
+        self.settings.setValue("pasteAsCode", enabled)
+
+    def toggle_paste_rich_text(self, enabled):
+        """Convert formatted (HTML) clipboard content to Markdown when pasting"""
+        self.paste_rich_text = enabled
+        self.settings.setValue("pasteRichText", enabled)
+
+    def change_conversion_limits(self):
+        """Set the time and memory a conversion may use before it is stopped"""
+        sandbox = self.converter.sandbox
+        timeout, ok = QInputDialog.getInt(self, "Conversion Limits", "Stop conversions after (seconds):",
+                                          sandbox.timeout, 1, 600)
+        if not ok:
+            return
+        label = "Stop conversions using more than (MB):"
+        if os.name == 'nt':
+            label = "Stop conversions using more than (MB, not enforced on Windows):"
+        memory, ok = QInputDialog.getInt(self, "Conversion Limits", label, sandbox.max_rss_mb, 64, 65536, 64)
+        if not ok:
+            return
+        sandbox.timeout = timeout
+        sandbox.max_rss_mb = memory
+        self.settings.setValue("conversionTimeoutS", timeout)
+        self.settings.setValue("conversionMemoryMB", memory)
+
     def toggle_night_mode(self):
         """Toggle between day and night mode"""
-        self.night_mode = not self.night_mode
+        self.set_night_mode(not self.night_mode)
+
+    def select_theme(self, theme_id):
+        """Use a theme for its mode and switch to that mode"""
+        night_mode = self.theme_manager.set_theme(theme_id)
+        if night_mode == self.night_mode:
+            self.theme_manager.apply_theme()
+            self.retheme_preview()
+        else:
+            self.set_night_mode(night_mode)
+
+    def set_night_mode(self, night_mode):
+        """Apply the day or night theme to the window and the preview"""
+        self.night_mode = night_mode
         self.settings.setValue("nightMode", self.night_mode)
         self.night_mode_action.setChecked(self.night_mode)
         self.night_mode_toolbar_action.setChecked(self.night_mode)
@@ -272,16 +996,130 @@ class MainWindow(QMainWindow):
         self.night_mode_toolbar_action.setText("☀️" if self.night_mode else "🌙")
         
         self.theme_manager.apply_theme()
+        self.retheme_preview()
+
+    def retheme_preview(self):
+        """Re-wrap converted bodies in the new theme without converting again"""
+        self.preview_handler.apply_lite_style()
+        current = self.current_tab
+        for tab in self.documents.values():
+            if tab is not current:
+                tab.html = None  # Re-wrapped from body_html when activated
+        if self.preview_handler.lite:
+            return  # The lite preview follows the palette by itself
+        if current.html is not None and current.body_html:
+            # Restyle the loaded page instead of reloading it
+            current.html = self.converter.page_for_body(current.body_html)
+            if self.preview_handler.set_theme_css(self.converter.theme_css()):
+                return
+        current.html = None
         self.update_preview()
 
+    def toggle_lite_preview(self, enabled):
+        """Switch between the web engine preview and the native lite preview"""
+        if not enabled and not WEB_ENGINE_AVAILABLE:
+            self.lite_preview_action.setChecked(True)
+            self.status_bar.showMessage("PyQtWebEngine is not available; staying in lite preview", 3000)
+            return
+        self.lite_preview = enabled
+        self.settings.setValue("litePreview", enabled)
+        if self.preview_handler.set_lite_mode(enabled):
+            self.preview = self.preview_handler.widget
+            self.update_preview()
+
+    def clear_render_cache(self):
+        """Delete all cached renders from disk"""
+        freed = self.converter.cache.clear()
+        self.status_bar.showMessage(f"Render cache cleared ({freed / (1024 * 1024):.1f} MB freed)", 3000)
+
+    def toggle_render_trace(self, enabled):
+        """Start or stop recording per-stage render traces for export"""
+        self.render_tracer.set_recording(enabled)
+        self.status_bar.showMessage("Recording render trace" if enabled else "Render trace recording stopped", 3000)
+
+    def export_render_trace(self):
+        """Save recorded traces as JSONL or Chrome trace JSON"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export Render Trace", "render-trace.json",
+            "Chrome Trace (*.json);;JSON Lines (*.jsonl)"
+        )
+        if file_path:
+            try:
+                count = self.render_tracer.export(file_path)
+            except OSError as e:
+                QMessageBox.critical(self, "Error", f"Could not write trace: {e}")
+                return
+            self.status_bar.showMessage(f"Exported {count} render traces to {os.path.basename(file_path)}", 3000)
+
+    def export_document(self, fmt):
+        """Export the current document in the background"""
+        tab = self.current_tab
+        label, file_filter, extension = EXPORT_FORMATS[fmt]
+        base_name = os.path.splitext(self.current_file)[0] if self.current_file else "Untitled"
+        file_path, _ = QFileDialog.getSaveFileName(self, f"Export as {label}", base_name + extension, file_filter)
+        if not file_path:
+            return
+        if not os.path.splitext(file_path)[1]:
+            file_path += extension
+        
+        # Reuse the preview's body HTML unless the text changed or the export runs other stages
+        reusable = tab.html is not None and tab.body_complete and self.converter.pipeline.same_for_export(fmt)
+        body_html = tab.body_html if reusable else None
+        base_dir = os.path.dirname(self.current_file) if self.current_file else os.getcwd()
+        self.export_queue.submit(fmt, file_path, tab.editor.toPlainText(), body_html, base_dir)
+        self.status_bar.showMessage(f"Exporting {os.path.basename(file_path)}...", 3000)
+
+    def cancel_exports(self):
+        """Cancel all queued and running exports"""
+        self.export_queue.cancel_all()
+
+    def toggle_recompress_images(self, enabled):
+        """Shrink oversized PNGs when inlining them into self-contained HTML"""
+        self.export_queue.recompress_images = enabled
+        self.settings.setValue("exportRecompressImages", enabled)
+
+    def on_export_done(self, message, ok):
+        if ok:
+            self.status_bar.showMessage(message, 5000)
+        else:
+            QMessageBox.critical(self, "Export Failed", message)
+
     def set_app_icon(self):
         """Set application icon"""
         self.theme_manager.set_app_icon()
 
+    def confirm_cancel_exports(self) -> bool:
+        """Ask before closing cancels exports that are still running"""
+        count = len(self.export_queue.jobs)
+        if not count:
+            return True
+        reply = QMessageBox.question(
+            self, "Exports Running",
+            f"{count} export(s) are still running.\nCancel them and quit?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        )
+        return reply == QMessageBox.Yes
+
     def closeEvent(self, event):
         """Handle application close"""
-        if self.check_save():
+        if self.confirm_cancel_exports() and all(self.check_save(tab) for tab in list(self.documents.values())):
             self.save_geometry()
+            self.save_session()
+            self.search_panel.stop()
+            self.find_bar.stop()
+            self.workspace_tree.stop()
+            self.backlinks_panel.stop()
+            self.preview_handler.stop()
+            for worker in list(self.diff_workers):
+                worker.requestInterruption()
+                worker.wait()
+            if self.completion_builder and self.completion_builder.isRunning():
+                self.completion_builder.requestInterruption()
+                self.completion_builder.wait()
+            self.render_pool.wait_for_done()
+            self.converter.diagrams.shutdown()
+            self.converter.sandbox.shutdown()
+            self.export_queue.wait_for_done()
             event.accept()
         else:
             event.ignore()
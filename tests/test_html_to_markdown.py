@@ -0,0 +1,28 @@
+from converter.html_to_markdown import MarkdownWriter
+
+
+def convert(html):
+    writer = MarkdownWriter()
+    writer.feed(html)
+    writer.close()
+    return writer.markdown()
+
+
+def test_table():
+    html = "<table><tr><th>a</th><th>b</th></tr><tr><td>1</td><td>2</td></tr></table>"
+    assert convert(html) == "| a | b |\n|---|---|\n| 1 | 2 |\n"
+
+
+def test_nested_table_is_flattened_into_its_cell():
+    html = ("<table><tr><td>a<table><tr><td>x</td><td>y</td></tr></table>b</td><td>c</td></tr>"
+            "<tr><td>d</td><td>e</td></tr></table>")
+    assert convert(html) == "| a x y b | c |\n|---|---|\n| d | e |\n"
+
+
+def test_empty_nested_table():
+    html = "<table><tr><td>a<table></table>b</td><td>c</td></tr></table><p>after</p>"
+    assert convert(html) == "| a b | c |\n|---|---|\n\nafter\n"
+
+
+def test_unbalanced_table_tags():
+    assert convert("<td>a</td></table></td><p>text</p>") == "a\n\ntext\n"
@@ -1,192 +1,152 @@
+import os
+import json
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPalette, QColor, QPainter, QPen, QFont, QPixmap, QIcon
 
+from utils import get_app_data_dir
+
+BUILTIN_THEME_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "themes")
+
+# Filled from a theme's "colors" and applied to the main window in one call
+STYLESHEET_TEMPLATE = """
+QPlainTextEdit {{
+    background-color: {editor_background};
+    color: {editor_text};
+    selection-background-color: {editor_selection};
+    border: 1px solid {editor_border};
+}}
+QToolBar {{
+    background-color: {bar_background};
+    border: 1px solid {bar_border};
+}}
+QToolButton {{
+    color: {bar_text};
+    background-color: transparent;
+    border: none;
+    padding: 5px;
+}}
+QToolButton:hover {{
+    background-color: {hover};
+}}
+QToolButton:checked {{
+    background-color: {checked};
+    color: {checked_text};
+}}
+QMenuBar {{
+    background-color: {bar_background};
+    color: {bar_text};
+}}
+QMenuBar::item {{
+    background-color: transparent;
+    padding: 5px 10px;
+}}
+QMenuBar::item:selected {{
+    background-color: {hover};
+}}
+QMenu {{
+    background-color: {bar_background};
+    color: {bar_text};
+}}
+QMenu::item:selected {{
+    background-color: {hover};
+}}
+QStatusBar {{
+    background-color: {bar_background};
+    color: {bar_text};
+}}
+QStatusBar QLabel {{
+    color: {bar_text};
+}}
+"""
+
+
+def load_theme_files(folder, bundled=None):
+    """{theme id: theme dict} for the JSON theme files in folder.
+
+    A file replacing one of the bundled themes becomes the base other themes
+    fill their missing colors from, so it has to define all of its colors.
+    """
+    themes = {}
+    try:
+        names = sorted(os.listdir(folder))
+    except OSError:
+        return themes
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(folder, name), 'r', encoding='utf-8') as file:
+                theme = json.load(file)
+            theme["colors"] = dict(theme["colors"])
+            theme_id = os.path.splitext(name)[0]
+            if bundled and theme_id in bundled:
+                missing = set(bundled[theme_id]["colors"]) - set(theme["colors"])
+                if missing:
+                    raise ValueError(f"missing colors {', '.join(sorted(missing))}")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Skipping theme {name}: {e}")
+            continue
+        themes[theme_id] = theme
+    return themes
+
+
 class ThemeManager:
-    """Manages application themes (light/dark modes)"""
+    """Manages application themes (light/dark modes) defined as JSON data"""
     
     def __init__(self, main_window):
         self.main_window = main_window
+        # Built-in themes; files in the user theme folder add to or override them
+        self.themes = load_theme_files(BUILTIN_THEME_DIR)
+        self.themes.update(load_theme_files(get_app_data_dir("themes"), self.themes))
+        # theme id -> (stylesheet, palette), compiled on first use
+        self.compiled = {}
     
-    def apply_theme(self):
-        """Apply the current theme (day/night) to the entire application"""
-        if self.main_window.night_mode:
-            self.apply_dark_theme()
-        else:
-            self.apply_light_theme()
-    
-    def apply_dark_theme(self):
-        """Apply dark theme to all UI components"""
-        # Dark palette
-        dark_palette = QPalette()
-        dark_palette.setColor(QPalette.Window, QColor(45, 45, 48))
-        dark_palette.setColor(QPalette.WindowText, Qt.white)
-        dark_palette.setColor(QPalette.Base, QColor(30, 30, 30))
-        dark_palette.setColor(QPalette.AlternateBase, QColor(45, 45, 48))
-        dark_palette.setColor(QPalette.ToolTipBase, Qt.white)
-        dark_palette.setColor(QPalette.ToolTipText, Qt.white)
-        dark_palette.setColor(QPalette.Text, Qt.white)
-        dark_palette.setColor(QPalette.Button, QColor(45, 45, 48))
-        dark_palette.setColor(QPalette.ButtonText, Qt.white)
-        dark_palette.setColor(QPalette.BrightText, Qt.red)
-        dark_palette.setColor(QPalette.Link, QColor(42, 130, 218))
-        dark_palette.setColor(QPalette.Highlight, QColor(42, 130, 218))
-        dark_palette.setColor(QPalette.HighlightedText, Qt.black)
-        self.main_window.setPalette(dark_palette)
-        
-        # Apply stylesheets
-        self._apply_dark_editor_style()
-        self._apply_dark_toolbar_style()
-        self._apply_dark_menubar_style()
-        self._apply_dark_statusbar_style()
-    
-    def apply_light_theme(self):
-        """Apply light theme to all UI components"""
-        # Light palette - use default system palette
-        self.main_window.setPalette(self.main_window.style().standardPalette())
-        
-        # Apply stylesheets
-        self._apply_light_editor_style()
-        self._apply_light_toolbar_style()
-        self._apply_light_menubar_style()
-        self._apply_light_statusbar_style()
-    
-    def _apply_dark_editor_style(self):
-        """Apply dark theme to editor"""
-        self.main_window.editor.setStyleSheet("""
-            QPlainTextEdit {
-                background-color: #2d2d30;
-                color: #f1f1f1;
-                selection-background-color: #264f78;
-                border: 1px solid #3e3e42;
-            }
-        """)
-    
-    def _apply_light_editor_style(self):
-        """Apply light theme to editor"""
-        self.main_window.editor.setStyleSheet("""
-            QPlainTextEdit {
-                background-color: #ffffff;
-                color: #333333;
-                selection-background-color: #3399ff;
-                border: 1px solid #ddd;
-            }
-        """)
-    
-    def _apply_dark_toolbar_style(self):
-        """Apply dark theme to toolbar"""
-        self.main_window.toolbar.setStyleSheet("""
-            QToolBar {
-                background-color: #3e3e42;
-                border: 1px solid #555;
-            }
-            QToolButton {
-                color: #f1f1f1;
-                background-color: transparent;
-                border: none;
-                padding: 5px;
-            }
-            QToolButton:hover {
-                background-color: #555;
-            }
-            QToolButton:checked {
-                background-color: #264f78;
-            }
-        """)
+    def theme_id(self, night_mode=None):
+        """Theme used for day or night mode"""
+        if night_mode is None:
+            night_mode = self.main_window.night_mode
+        key, default = ("nightTheme", "dark") if night_mode else ("dayTheme", "light")
+        theme_id = self.main_window.settings.value(key, default)
+        return theme_id if theme_id in self.themes else default
     
-    def _apply_light_toolbar_style(self):
-        """Apply light theme to toolbar"""
-        self.main_window.toolbar.setStyleSheet("""
-            QToolBar {
-                background-color: #f5f5f5;
-                border: 1px solid #ddd;
-            }
-            QToolButton {
-                color: #333;
-                background-color: transparent;
-                border: none;
-                padding: 5px;
-            }
-            QToolButton:hover {
-                background-color: #e0e0e0;
-            }
-            QToolButton:checked {
-                background-color: #3399ff;
-                color: white;
-            }
-        """)
-    
-    def _apply_dark_menubar_style(self):
-        """Apply dark theme to menu bar"""
-        self.main_window.menuBar().setStyleSheet("""
-            QMenuBar {
-                background-color: #3e3e42;
-                color: #f1f1f1;
-            }
-            QMenuBar::item {
-                background-color: transparent;
-                padding: 5px 10px;
-            }
-            QMenuBar::item:selected {
-                background-color: #555;
-            }
-            QMenu {
-                background-color: #3e3e42;
-                color: #f1f1f1;
-            }
-            QMenu::item:selected {
-                background-color: #555;
-            }
-        """)
-    
-    def _apply_light_menubar_style(self):
-        """Apply light theme to menu bar"""
-        self.main_window.menuBar().setStyleSheet("""
-            QMenuBar {
-                background-color: #f5f5f5;
-                color: #333;
-            }
-            QMenuBar::item {
-                background-color: transparent;
-                padding: 5px 10px;
-            }
-            QMenuBar::item:selected {
-                background-color: #e0e0e0;
-            }
-            QMenu {
-                background-color: #f5f5f5;
-                color: #333;
-            }
-            QMenu::item:selected {
-                background-color: #e0e0e0;
-            }
-        """)
+    def compile(self, theme_id):
+        """Build (and cache) the stylesheet and palette of a theme"""
+        if theme_id not in self.compiled:
+            theme = self.themes[theme_id]
+            # Colors a user theme leaves out come from the built-in theme of the same kind
+            base = self.themes["dark" if theme.get("dark") else "light"]
+            stylesheet = STYLESHEET_TEMPLATE.format_map({**base["colors"], **theme["colors"]})
+            if theme.get("palette"):
+                palette = QPalette()
+                for role, color in theme["palette"].items():
+                    if isinstance(getattr(QPalette, role, None), QPalette.ColorRole):
+                        palette.setColor(getattr(QPalette, role), QColor(color))
+            else:
+                palette = self.main_window.style().standardPalette()
+            self.compiled[theme_id] = (stylesheet, palette)
+        return self.compiled[theme_id]
     
-    def _apply_dark_statusbar_style(self):
-        """Apply dark theme to status bar"""
-        self.main_window.status_bar.setStyleSheet("""
-            QStatusBar {
-                background-color: #3e3e42;
-                color: #f1f1f1;
-            }
-            QLabel {
-                color: #f1f1f1;
-            }
-        """)
+    def apply_theme(self):
+        """Apply the current theme (day/night) to the entire application in one pass"""
+        theme_id = self.theme_id()
+        stylesheet, palette = self.compile(theme_id)
+        self.main_window.setPalette(palette)
+        self.main_window.setStyleSheet(stylesheet)
+        self.main_window.converter.extra_css = self.themes[theme_id].get("preview_css", "")
     
-    def _apply_light_statusbar_style(self):
-        """Apply light theme to status bar"""
-        self.main_window.status_bar.setStyleSheet("""
-            QStatusBar {
-                background-color: #f5f5f5;
-                color: #333;
-            }
-            QLabel {
-                color: #333;
-            }
-        """)
+    def set_theme(self, theme_id):
+        """Use a theme for the mode matching its "dark" flag; returns that night mode value"""
+        night_mode = bool(self.themes[theme_id].get("dark"))
+        self.main_window.settings.setValue("nightTheme" if night_mode else "dayTheme", theme_id)
+        return night_mode
     
     def set_app_icon(self):
         """Set application icon with theme awareness"""
+        icon_path = self.main_window.snapshot.icon_path(self.main_window.night_mode)
+        if os.path.isfile(icon_path):
+            # Drawn on an earlier launch; loading it skips font setup at startup
+            self.main_window.setWindowIcon(QIcon(icon_path))
+            return
         try:
             # Create a simple icon programmatically
             icon = QPixmap(32, 32)
@@ -207,6 +167,7 @@ class ThemeManager:
             painter.drawText(icon.rect(), Qt.AlignCenter, "M")
             painter.end()
             
+            icon.save(icon_path)
             self.main_window.setWindowIcon(QIcon(icon))
         except Exception as e:
             print(f"Failed to set app icon: {e}")
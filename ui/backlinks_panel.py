@@ -0,0 +1,94 @@
+import os
+from PyQt5.QtWidgets import QDockWidget, QWidget, QVBoxLayout, QListWidget, QListWidgetItem, QLabel
+from PyQt5.QtCore import Qt
+
+from handlers.link_graph import LinkGraph, LinkGraphBuilder
+
+
+class BacklinksPanel(QDockWidget):
+    """Dockable "Linked From" list for the current document, backed by the workspace link graph"""
+
+    def __init__(self, main_window):
+        super().__init__("Linked From", main_window)
+        self.main_window = main_window
+        self.graph = None
+        self.builder = None
+        self.current_file = None
+        self.setObjectName("backlinksPanel")
+
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        layout.setContentsMargins(4, 4, 4, 4)
+
+        self.status_label = QLabel("No workspace folder selected")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        self.results = QListWidget()
+        self.results.itemActivated.connect(self.open_result)
+        layout.addWidget(self.results)
+
+        self.setWidget(container)
+
+    def set_root(self, root):
+        """Switch to a workspace folder and (re)build its link graph in the background"""
+        if self.graph is None or self.graph.root != os.path.abspath(root):
+            self.stop()
+            self.graph = LinkGraph(root)
+        self.refresh_graph()
+
+    def refresh_graph(self):
+        """Incrementally update the graph by mtime"""
+        if self.graph is None or self.is_building():
+            return
+        self.status_label.setText("Reading workspace links...")
+        self.builder = LinkGraphBuilder(self.graph, self)
+        self.builder.graph_updated.connect(self.on_graph_updated)
+        self.builder.start()
+
+    def is_building(self):
+        """True while the graph may be missing links from files not read yet"""
+        return self.builder is not None and self.builder.isRunning()
+
+    def on_graph_updated(self, touched):
+        self.show_file(self.current_file)
+
+    def file_saved(self, file_path, content):
+        """Re-read one saved document's links without waiting for a rescan"""
+        if self.graph is not None and self.graph.contains(file_path):
+            self.graph.index_file(os.path.abspath(file_path), content)
+            self.show_file(self.current_file)
+
+    def show_file(self, file_path):
+        """List the links pointing at file_path"""
+        self.current_file = file_path
+        self.results.clear()
+        if self.graph is None:
+            return
+        if not file_path:
+            self.status_label.setText("Save the document to see what links to it")
+            return
+        backlinks = self.graph.backlinks(file_path)
+        name = os.path.basename(file_path)
+        self.status_label.setText(f"{len(backlinks)} link(s) to {name}" if backlinks else f"Nothing links to {name}")
+        for source, line, snippet in backlinks:
+            relative = os.path.relpath(source, self.graph.root)
+            item = QListWidgetItem(f"{relative}:{line}  {snippet}")
+            item.setData(Qt.UserRole, (source, line))
+            self.results.addItem(item)
+
+    def open_result(self, item):
+        """Open the linking file at the line of the link"""
+        source, line = item.data(Qt.UserRole)
+        self.main_window.open_file_at_line(source, line)
+
+    def stop(self):
+        """Interrupt background building and keep what was learned"""
+        if self.builder and self.builder.isRunning():
+            self.builder.requestInterruption()
+            self.builder.wait()
+        if self.graph is not None and self.graph.dirty:
+            try:
+                self.graph.save()
+            except OSError as e:
+                print(f"Could not save link graph: {e}")
@@ -0,0 +1,105 @@
+import os
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QTextBrowser, QDialogButtonBox
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from handlers.diff import TextDiff, DiffCancelled
+
+# (removed line, added line, removed word, added word, hunk header) backgrounds
+DIFF_COLORS = {
+    False: ("#ffeef0", "#e6ffed", "#fdb8c0", "#acf2bd", "#f1f8ff"),
+    True: ("#3c1f24", "#1f3a28", "#7d2e38", "#2e6b3d", "#1f2a3a"),
+}
+
+
+def disk_stamp(file_path):
+    """(mtime, size) identifying the file's current version on disk, or None if it is missing"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class DiffWorker(QThread):
+    """Diffs the file on disk against a snapshot of the buffer off the GUI thread"""
+
+    diff_ready = pyqtSignal(object, object, int, int, str)
+
+    def __init__(self, tab, key, file_path, text, parent=None):
+        super().__init__(parent)
+        self.tab = tab
+        self.key = key
+        self.file_path = file_path
+        self.text = text
+
+    def run(self):
+        try:
+            with open(self.file_path, 'r', encoding='utf-8', errors='replace') as file:
+                saved = file.read()
+        except OSError:
+            saved = ""  # Deleted on disk: everything in the buffer is new
+        try:
+            diff = TextDiff(saved, self.text, should_stop=self.isInterruptionRequested)
+        except DiffCancelled:
+            return
+        self.diff_ready.emit(self.tab, self.key, diff.added, diff.removed, diff.to_html())
+
+
+class DiffDialog(QDialog):
+    """Line and word level changes between the saved file and the buffer"""
+
+    def __init__(self, main_window, tab):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.tab = tab
+        self.setWindowTitle(f"Changes in {os.path.basename(tab.current_file)}")
+        self.resize(900, 650)
+
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel("Comparing with the saved file...")
+        layout.addWidget(self.summary_label)
+        self.view = QTextBrowser()
+        self.view.setOpenLinks(False)
+        removed, added, removed_word, added_word, header = DIFF_COLORS[main_window.night_mode]
+        self.view.document().setDefaultStyleSheet(
+            f"table.diff {{ border-collapse: collapse; }}"
+            f"td {{ padding: 0 4px; }}"
+            f"td.num {{ color: #888; }}"
+            f"pre {{ margin: 0; font-family: Consolas, Monaco, 'Courier New', monospace; }}"
+            f"tr.del {{ background-color: {removed}; }}"
+            f"tr.add {{ background-color: {added}; }}"
+            f"tr.hunk {{ background-color: {header}; color: #888; }}"
+            f".word-del {{ background-color: {removed_word}; }}"
+            f".word-add {{ background-color: {added_word}; }}"
+        )
+        layout.addWidget(self.view)
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def start(self):
+        """Show the cached diff if neither side changed since, otherwise compute it in the background"""
+        key = (disk_stamp(self.tab.current_file), self.tab.tracker.revision)
+        if self.tab.diff is not None and self.tab.diff[0] == key:
+            self.show_diff(self.tab, *self.tab.diff)
+            return
+        worker = DiffWorker(self.tab, key, self.tab.current_file, self.tab.tracker.text(), self.main_window)
+        # The cache is filled even if the dialog is closed before the diff finishes
+        worker.diff_ready.connect(self.main_window.on_diff_ready)
+        worker.diff_ready.connect(self.show_diff)
+        # Tracked so closing the window can stop it; the thread must not outlive its parent
+        workers = self.main_window.diff_workers
+        workers.add(worker)
+        worker.finished.connect(lambda: workers.discard(worker))
+        worker.finished.connect(worker.deleteLater)
+        worker.start()
+
+    def show_diff(self, tab, key, added, removed, html):
+        if tab is not self.tab:
+            return
+        if not added and not removed:
+            self.summary_label.setText("No changes since the file was saved.")
+            self.view.clear()
+            return
+        self.summary_label.setText(f"{added} line(s) added, {removed} line(s) removed since the file was saved")
+        self.view.setHtml(html)
@@ -1,6 +1,7 @@
 from PyQt5.QtWidgets import QMenu, QAction
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QKeySequence
+from handlers.export_handler import EXPORT_FORMATS
 
 def setup_menu(main_window):
     """Setup the menu bar"""
@@ -14,8 +15,14 @@ def setup_menu(main_window):
         None,  # Separator
         ("&Save", QKeySequence.Save, main_window.save_file),
         ("Save &As...", QKeySequence.SaveAs, main_window.save_file_as),
+        ("Show C&hanges...", "Ctrl+Shift+D", lambda: main_window.show_changes()),
+        ("Re&name File...", None, main_window.rename_file),
+        ("&Close Tab", QKeySequence.Close, lambda: main_window.close_tab(main_window.tabs.currentIndex())),
+        None,
+        ("Open &Workspace Folder...", None, main_window.open_workspace_folder),
         None,
         ("Change &Image Save Location...", None, main_window.change_image_save_location),
+        ("Conversion &Limits...", None, main_window.change_conversion_limits),
         None,
         ("E&xit", QKeySequence.Quit, main_window.close)
     ]
@@ -33,14 +40,21 @@ def setup_menu(main_window):
     # Edit menu
     edit_menu = menubar.addMenu("&Edit")
     edit_actions = [
-        ("&Undo", QKeySequence.Undo, main_window.editor.undo),
-        ("&Redo", QKeySequence.Redo, main_window.editor.redo),
+        ("&Undo", QKeySequence.Undo, lambda: main_window.editor.undo()),
+        ("&Redo", QKeySequence.Redo, lambda: main_window.editor.redo()),
+        None,
+        ("&Cut", QKeySequence.Cut, lambda: main_window.editor.cut()),
+        ("&Copy", QKeySequence.Copy, lambda: main_window.editor.copy()),
+        ("&Paste", QKeySequence.Paste, lambda: main_window.editor.paste()),
         None,
-        ("&Cut", QKeySequence.Cut, main_window.editor.cut),
-        ("&Copy", QKeySequence.Copy, main_window.editor.copy),
-        ("&Paste", QKeySequence.Paste, main_window.editor.paste),
+        ("Select &All", QKeySequence.SelectAll, lambda: main_window.editor.selectAll()),
+        ("Undo &History Limit...", None, main_window.change_undo_budget),
         None,
-        ("Select &All", QKeySequence.SelectAll, main_window.editor.selectAll),
+        ("&Find...", QKeySequence.Find, main_window.show_find),
+        ("Find &Next", QKeySequence.FindNext, main_window.find_bar.find_next),
+        ("Find Pre&vious", QKeySequence.FindPrevious, main_window.find_bar.find_previous),
+        ("&Replace...", "Ctrl+H", main_window.show_replace),
+        ("Search &Workspace...", "Ctrl+Shift+F", main_window.show_workspace_search),
     ]
     for item in edit_actions:
         if item is None:
@@ -52,6 +66,31 @@ def setup_menu(main_window):
                 action.setShortcut(shortcut)
             action.triggered.connect(callback)
             edit_menu.addAction(action)
+    edit_menu.addSeparator()
+    paste_code_action = QAction("Paste as &Code Block", main_window, checkable=True)
+    paste_code_action.setChecked(main_window.paste_as_code)
+    paste_code_action.toggled.connect(main_window.toggle_paste_as_code)
+    edit_menu.addAction(paste_code_action)
+    paste_rich_action = QAction("Paste Formatted Text as &Markdown", main_window, checkable=True)
+    paste_rich_action.setChecked(main_window.paste_rich_text)
+    paste_rich_action.toggled.connect(main_window.toggle_paste_rich_text)
+    edit_menu.addAction(paste_rich_action)
+    
+    # Export menu
+    export_menu = menubar.addMenu("E&xport")
+    for fmt in ("pdf", "docx", "epub", "html", "html-inline"):
+        action = QAction(f"{EXPORT_FORMATS[fmt][0]}...", main_window)
+        action.triggered.connect(lambda checked, fmt=fmt: main_window.export_document(fmt))
+        export_menu.addAction(action)
+    export_menu.addSeparator()
+    recompress_action = QAction("&Recompress Large PNGs", main_window, checkable=True)
+    recompress_action.setChecked(main_window.export_queue.recompress_images)
+    recompress_action.toggled.connect(main_window.toggle_recompress_images)
+    export_menu.addAction(recompress_action)
+    export_menu.addSeparator()
+    cancel_export_action = QAction("&Cancel All Exports", main_window)
+    cancel_export_action.triggered.connect(main_window.cancel_exports)
+    export_menu.addAction(cancel_export_action)
     
     # View menu
     view_menu = menubar.addMenu("&View")
@@ -60,8 +99,38 @@ def setup_menu(main_window):
     refresh_action.triggered.connect(main_window.update_preview)
     view_menu.addAction(refresh_action)
     
+    main_window.lite_preview_action = QAction("&Lite Preview", main_window, checkable=True)
+    main_window.lite_preview_action.setChecked(main_window.lite_preview)
+    main_window.lite_preview_action.toggled.connect(main_window.toggle_lite_preview)
+    view_menu.addAction(main_window.lite_preview_action)
+    workspace_action = main_window.workspace_tree.toggleViewAction()
+    workspace_action.setText("&Workspace Files")
+    view_menu.addAction(workspace_action)
+    backlinks_action = main_window.backlinks_panel.toggleViewAction()
+    backlinks_action.setText("Lin&ked From")
+    view_menu.addAction(backlinks_action)
+    
+    # Render instrumentation
+    trace_action = QAction("Record Render &Trace", main_window, checkable=True)
+    trace_action.toggled.connect(main_window.toggle_render_trace)
+    view_menu.addAction(trace_action)
+    export_trace_action = QAction("&Export Render Trace...", main_window)
+    export_trace_action.triggered.connect(main_window.export_render_trace)
+    view_menu.addAction(export_trace_action)
+    clear_cache_action = QAction("Clear Render &Cache", main_window)
+    clear_cache_action.triggered.connect(main_window.clear_render_cache)
+    view_menu.addAction(clear_cache_action)
+    view_menu.addSeparator()
+    
     # Add night mode toggle
     main_window.night_mode_action = QAction("&Night Mode", main_window, checkable=True)
     main_window.night_mode_action.setChecked(main_window.night_mode)
     main_window.night_mode_action.triggered.connect(main_window.toggle_night_mode)
-    view_menu.addAction(main_window.night_mode_action)
\ No newline at end of file
+    view_menu.addAction(main_window.night_mode_action)
+    
+    # Built-in and user themes
+    theme_menu = view_menu.addMenu("T&heme")
+    for theme_id, theme in sorted(main_window.theme_manager.themes.items(), key=lambda item: item[1].get("name", item[0])):
+        action = QAction(theme.get("name", theme_id), main_window)
+        action.triggered.connect(lambda checked, theme_id=theme_id: main_window.select_theme(theme_id))
+        theme_menu.addAction(action)
\ No newline at end of file
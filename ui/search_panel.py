@@ -0,0 +1,112 @@
+import os
+from PyQt5.QtWidgets import QDockWidget, QWidget, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QLabel
+from PyQt5.QtCore import Qt, QTimer
+
+from handlers.search_index import SearchIndex, IndexBuilder, SearchWorker
+
+class SearchPanel(QDockWidget):
+    """Dockable workspace search backed by the persistent inverted index"""
+
+    def __init__(self, main_window):
+        super().__init__("Search Workspace", main_window)
+        self.main_window = main_window
+        self.index = None
+        self.builder = None
+        # Queries still running; only the newest generation's results are shown
+        self.search_workers = set()
+        self.search_generation = 0
+        self.setObjectName("searchPanel")
+
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        layout.setContentsMargins(4, 4, 4, 4)
+
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText('Search terms or "exact phrase"')
+        self.query_input.textChanged.connect(self.schedule_search)
+        self.query_input.returnPressed.connect(self.run_search)
+        layout.addWidget(self.query_input)
+
+        self.status_label = QLabel("No workspace folder selected")
+        layout.addWidget(self.status_label)
+
+        self.results = QListWidget()
+        self.results.itemActivated.connect(self.open_result)
+        layout.addWidget(self.results)
+
+        self.setWidget(container)
+
+        # Debounce searches while typing
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.timeout.connect(self.run_search)
+
+    def set_root(self, root):
+        """Switch to a workspace folder and (re)index it in the background"""
+        if self.index is None or self.index.root != os.path.abspath(root):
+            self.stop()
+            self.index = SearchIndex(root)
+        self.refresh_index()
+
+    def refresh_index(self):
+        """Incrementally update the index by mtime"""
+        if self.index is None or (self.builder and self.builder.isRunning()):
+            return
+        self.status_label.setText(f"Indexing {self.index.root}...")
+        self.builder = IndexBuilder(self.index, self)
+        self.builder.indexing_finished.connect(self.on_indexing_finished)
+        self.builder.start()
+
+    def on_indexing_finished(self, touched):
+        """Report index size and re-run the pending query"""
+        self.status_label.setText(f"{len(self.index.files)} files indexed ({touched} updated)")
+        if self.query_input.text().strip():
+            self.run_search()
+
+    def schedule_search(self):
+        """Restart the search debounce timer"""
+        self.search_timer.start(150)
+
+    def run_search(self):
+        """Query the index and read the matching lines in a worker"""
+        self.search_timer.stop()
+        self.search_generation += 1
+        query = self.query_input.text().strip()
+        if self.index is None or not query:
+            self.results.clear()
+            return
+        worker = SearchWorker(self.index, query, self.search_generation, self)
+        worker.search_finished.connect(self.on_search_finished)
+        self.search_workers.add(worker)
+        worker.finished.connect(lambda: self.search_workers.discard(worker))
+        worker.finished.connect(worker.deleteLater)
+        worker.start()
+
+    def on_search_finished(self, generation, matches, elapsed_ms):
+        """List the results of the newest query"""
+        if generation != self.search_generation:
+            return  # Superseded by a later query
+        self.results.clear()
+        for path, line, hits, snippet in matches:
+            rel_path = os.path.relpath(path, self.index.root)
+            item = QListWidgetItem(f"{rel_path}:{line}  {snippet}")
+            item.setData(Qt.UserRole, (path, line))
+            item.setToolTip(f"{path} (line {line}, {hits} hit{'s' if hits != 1 else ''})")
+            self.results.addItem(item)
+        self.status_label.setText(f"{len(matches)} results in {elapsed_ms:.1f} ms")
+
+    def open_result(self, item):
+        """Open the file of a result at its matching line"""
+        path, line = item.data(Qt.UserRole)
+        self.main_window.open_file_at_line(path, line)
+
+    def stop(self):
+        """Stop a running indexer and queries before the window goes away"""
+        if self.builder and self.builder.isRunning():
+            self.builder.requestInterruption()
+            self.builder.wait()
+        # Results of the stopped queries belong to the old index
+        self.search_generation += 1
+        for worker in list(self.search_workers):
+            worker.requestInterruption()
+            worker.wait()
@@ -1,5 +1,5 @@
 import os  # Added missing import
-from PyQt5.QtWidgets import QStatusBar, QLabel
+from PyQt5.QtWidgets import QStatusBar, QLabel, QProgressBar
 
 def setup_statusbar(main_window):
     """Setup the status bar"""
@@ -12,8 +12,29 @@ def setup_statusbar(main_window):
     main_window.status_bar.addPermanentWidget(main_window.folder_label)
     main_window.status_bar.addPermanentWidget(main_window.prefix_label)
     
+    # Document statistics and the current section's word count
+    main_window.stats_label = QLabel()
+    main_window.section_label = QLabel()
+    main_window.status_bar.addPermanentWidget(main_window.section_label)
+    main_window.status_bar.addPermanentWidget(main_window.stats_label)
+    
+    # Preview latency readout
+    main_window.render_stats_label = QLabel()
+    main_window.status_bar.addPermanentWidget(main_window.render_stats_label)
+    main_window.undo_label = QLabel()
+    main_window.status_bar.addPermanentWidget(main_window.undo_label)
+    
+    # Background export progress, hidden while idle
+    main_window.export_progress = QProgressBar()
+    main_window.export_progress.setMaximumWidth(160)
+    main_window.export_progress.setFormat("Export %v/%m")
+    main_window.export_progress.hide()
+    main_window.status_bar.addPermanentWidget(main_window.export_progress)
+    
     # Show current image folder
     update_status_bar(main_window)
+    update_document_stats(main_window)
+    update_undo_stats(main_window)
 
 def update_status_bar(main_window):
     """Update status bar with current settings"""
@@ -27,4 +48,55 @@ def update_status_bar(main_window):
     main_window.prefix_label.setToolTip(f"Image name prefix: {main_window.image_handler.name_prefix}")
     
     # Show temporary message
-    main_window.status_bar.showMessage("Ready", 3000)
\ No newline at end of file
+    main_window.status_bar.showMessage("Ready", 3000)
+
+def update_render_stats(main_window):
+    """Show last and p95 preview latency"""
+    summary = main_window.render_tracer.summary()
+    if summary is None:
+        return
+    last, p95 = summary
+    main_window.render_stats_label.setText(f"⏱️ {last:.0f} ms (p95 {p95:.0f} ms)")
+    
+    # Per-stage breakdown of the last refresh
+    stages = main_window.render_tracer.last_trace.stage_ms()
+    breakdown = "\n".join(f"{name}: {ms:.1f} ms" for name, ms in stages.items())
+    main_window.render_stats_label.setToolTip(f"Preview latency (last / p95)\n{breakdown}")
+
+def update_undo_stats(main_window):
+    """Show the current tab's undo history memory"""
+    tab = main_window.current_tab
+    if tab is None:
+        return
+    history = tab.history
+    megabytes = history.memory / (1024 * 1024)
+    main_window.undo_label.setText(f"↶ {megabytes:.1f} MB")
+    main_window.undo_label.setToolTip(
+        f"Undo history: {len(history.undo_stack)} steps, {megabytes:.1f} of "
+        f"{history.budget_bytes / (1024 * 1024):.0f} MB"
+    )
+
+def update_export_progress(main_window, done, total):
+    """Show finished / queued exports, hiding the bar once all are done"""
+    main_window.export_progress.setVisible(done < total)
+    main_window.export_progress.setMaximum(max(total, 1))
+    main_window.export_progress.setValue(done)
+
+def update_document_stats(main_window):
+    """Show word, character and line counts, reading time and the cursor's section"""
+    tab = main_window.current_tab
+    if tab is None:
+        return
+    stats = tab.stats
+    minutes = max(1, round(stats.reading_minutes)) if stats.total_words else 0
+    main_window.stats_label.setText(
+        f"📝 {stats.total_words:,} words · {stats.characters:,} chars · {stats.line_count:,} lines · {minutes} min read"
+    )
+    
+    section = stats.section(tab.editor.textCursor().blockNumber())
+    if section is None:
+        main_window.section_label.clear()
+    else:
+        title, words = section
+        main_window.section_label.setText(f"§ {title[:30]}: {words:,} words")
+        main_window.section_label.setToolTip(f"Words in section '{title}'")
\ No newline at end of file
@@ -0,0 +1,236 @@
+import os
+from collections import deque
+from PyQt5.QtWidgets import (QDockWidget, QWidget, QVBoxLayout, QLabel, QTreeWidget, QTreeWidgetItem,
+                             QStyle, QLineEdit)
+from PyQt5.QtCore import Qt, QTimer, QFileSystemWatcher
+
+from handlers.workspace_scanner import WorkspaceScanner
+from utils import MARKDOWN_EXTENSIONS
+
+PATH_ROLE = Qt.UserRole
+IS_FOLDER_ROLE = Qt.UserRole + 1
+# Set on folders whose entries have been listed
+LOADED_ROLE = Qt.UserRole + 2
+# Items added per event loop turn, so huge folders fill in without freezing the UI
+BATCH_SIZE = 500
+WATCH_DEBOUNCE_MS = 300
+
+
+class WorkspaceTree(QDockWidget):
+    """Dockable tree of the workspace's markdown files and images.
+
+    Folders are listed in the background when first expanded and rescanned
+    when the file system watcher reports a change in one of them.
+    """
+
+    def __init__(self, main_window):
+        super().__init__("Workspace", main_window)
+        self.main_window = main_window
+        self.root = None
+        self.setObjectName("workspaceTree")
+
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        layout.setContentsMargins(4, 4, 4, 4)
+
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter loaded files")
+        self.filter_input.textChanged.connect(self.schedule_filter)
+        layout.addWidget(self.filter_input)
+
+        self.status_label = QLabel("No workspace folder selected")
+        layout.addWidget(self.status_label)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        self.tree.setUniformRowHeights(True)
+        self.tree.itemExpanded.connect(self.on_item_expanded)
+        self.tree.itemActivated.connect(self.open_item)
+        layout.addWidget(self.tree)
+        self.setWidget(container)
+
+        self.folder_icon = self.style().standardIcon(QStyle.SP_DirIcon)
+        self.file_icon = self.style().standardIcon(QStyle.SP_FileIcon)
+
+        self.scanner = WorkspaceScanner(self)
+        self.scanner.scanned.connect(self.on_scanned)
+        # folder path -> its tree item, for loaded and loading folders
+        self.folder_items = {}
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.changed_folders = set()
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setSingleShot(True)
+        self.watch_timer.timeout.connect(self.rescan_changed)
+
+        # (folder item, [(name, is folder)]) entries waiting to be added as items
+        self.batches = deque()
+        self.batch_timer = QTimer(self)
+        self.batch_timer.timeout.connect(self.add_next_batch)
+
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.timeout.connect(self.apply_filter)
+
+    def set_root(self, root):
+        """Show a new workspace folder; only its top level is listed right away"""
+        root = os.path.abspath(root)
+        if root == self.root:
+            return
+        self.root = root
+        self.scanner.reset()
+        self.batches.clear()
+        self.batch_timer.stop()
+        self.changed_folders.clear()
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        self.tree.clear()
+        self.folder_items = {}
+        item = self.make_item(os.path.basename(root) or root, root, True)
+        self.tree.addTopLevelItem(item)
+        item.setExpanded(True)
+        self.status_label.setText(f"Scanning {root}...")
+
+    def make_item(self, name, path, is_folder):
+        item = QTreeWidgetItem([name])
+        item.setData(0, PATH_ROLE, path)
+        item.setData(0, IS_FOLDER_ROLE, is_folder)
+        item.setIcon(0, self.folder_icon if is_folder else self.file_icon)
+        if is_folder:
+            # Shows the expand arrow before the folder has been listed
+            item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+        return item
+
+    def on_item_expanded(self, item):
+        path = item.data(0, PATH_ROLE)
+        if not item.data(0, LOADED_ROLE) and path not in self.folder_items:
+            self.folder_items[path] = item
+            self.scanner.scan(path)
+
+    def on_scanned(self, folder, listing):
+        item = self.folder_items.get(folder)
+        if item is None:
+            return
+        if listing is None:
+            # Gone or unreadable; its parent's rescan removes it if it was deleted
+            self.status_label.setText(f"Could not read {folder}")
+            return
+        if folder not in self.watcher.directories():
+            self.watcher.addPath(folder)
+        folders, files = listing
+        if item.data(0, LOADED_ROLE):
+            self.merge_listing(item, folders, files)
+        else:
+            item.setData(0, LOADED_ROLE, True)
+            entries = [(name, True) for name in folders] + [(name, False) for name in files]
+            if not entries:
+                item.setChildIndicatorPolicy(QTreeWidgetItem.DontShowIndicatorWhenChildless)
+            self.batches.append((item, entries))
+            if not self.batch_timer.isActive():
+                self.batch_timer.start(0)
+        if folder == self.root:
+            self.status_label.setText(self.root)
+
+    def add_next_batch(self):
+        """Create and attach the next few hundred pending items"""
+        budget = BATCH_SIZE
+        while self.batches and budget > 0:
+            item, entries = self.batches[0]
+            folder = item.data(0, PATH_ROLE)
+            chunk = [self.make_item(name, os.path.join(folder, name), is_folder)
+                     for name, is_folder in entries[:budget]]
+            rest = entries[budget:]
+            item.addChildren(chunk)
+            if self.filter_input.text():
+                for child in chunk:
+                    self.filter_item(child, self.filter_input.text().lower())
+            budget -= len(chunk)
+            if rest:
+                self.batches[0] = (item, rest)
+            else:
+                self.batches.popleft()
+        if not self.batches:
+            self.batch_timer.stop()
+
+    def merge_listing(self, item, folders, files):
+        """Bring a loaded folder's children in line with a fresh listing, keeping expanded subfolders"""
+        if any(queued is item for queued, _ in self.batches):
+            # Still being filled from the previous listing; start over with the new one
+            self.batches = deque((queued, entries) for queued, entries in self.batches if queued is not item)
+            for child in item.takeChildren():
+                self.forget_folder(child)
+            item.setData(0, LOADED_ROLE, False)
+            self.on_scanned(item.data(0, PATH_ROLE), (folders, files))
+            return
+        folder = item.data(0, PATH_ROLE)
+        wanted = [(name, True) for name in folders] + [(name, False) for name in files]
+        wanted_set = set(wanted)
+        for index in reversed(range(item.childCount())):
+            child = item.child(index)
+            key = (child.text(0), bool(child.data(0, IS_FOLDER_ROLE)))
+            if key not in wanted_set:
+                self.forget_folder(item.takeChild(index))
+        for index, (name, is_folder) in enumerate(wanted):
+            child = item.child(index)
+            if child is None or (child.text(0), bool(child.data(0, IS_FOLDER_ROLE))) != (name, is_folder):
+                item.insertChild(index, self.make_item(name, os.path.join(folder, name), is_folder))
+        item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator if wanted
+                                     else QTreeWidgetItem.DontShowIndicatorWhenChildless)
+
+    def forget_folder(self, item):
+        """Stop tracking a removed folder item and everything below it"""
+        if not item.data(0, IS_FOLDER_ROLE):
+            return
+        path = item.data(0, PATH_ROLE)
+        if self.folder_items.pop(path, None) is not None and path in self.watcher.directories():
+            self.watcher.removePath(path)
+        for index in range(item.childCount()):
+            self.forget_folder(item.child(index))
+
+    def on_directory_changed(self, path):
+        """Collect bursts of changes (checkouts, builds) into one rescan per folder"""
+        self.changed_folders.add(path)
+        self.watch_timer.start(WATCH_DEBOUNCE_MS)
+
+    def rescan_changed(self):
+        for folder in self.changed_folders:
+            if folder in self.folder_items:
+                self.scanner.scan(folder)
+        self.changed_folders.clear()
+
+    def schedule_filter(self):
+        """Restart the filter debounce timer"""
+        self.filter_timer.start(150)
+
+    def apply_filter(self):
+        """Hide loaded files whose names do not contain the filter text"""
+        text = self.filter_input.text().lower()
+        for index in range(self.tree.topLevelItemCount()):
+            self.filter_item(self.tree.topLevelItem(index), text)
+
+    def filter_item(self, item, text):
+        """Returns True if the item or anything below it matches"""
+        if item.data(0, IS_FOLDER_ROLE):
+            matched = [self.filter_item(item.child(index), text) for index in range(item.childCount())]
+            # Unloaded folders stay visible so they can still be opened
+            visible = not text or any(matched) or not item.data(0, LOADED_ROLE)
+        else:
+            visible = text in item.text(0).lower()
+        item.setHidden(not visible)
+        return visible
+
+    def open_item(self, item):
+        """Open markdown files; insert a link to images"""
+        if item.data(0, IS_FOLDER_ROLE):
+            return
+        path = item.data(0, PATH_ROLE)
+        if path.lower().endswith(MARKDOWN_EXTENSIONS):
+            self.main_window.open_files([path])
+        else:
+            self.main_window.insert_image_path(path)
+
+    def stop(self):
+        """Drop pending scans, e.g. on shutdown"""
+        self.scanner.reset()
+        self.scanner.pool.waitForDone(1000)
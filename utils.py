@@ -1,6 +1,10 @@
 """Utility functions for the markdown editor"""
 import os
 import platform
+import subprocess
+
+MARKDOWN_EXTENSIONS = ('.md', '.markdown')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.bmp')
 
 def get_default_image_folder():
     """Get the default image folder based on OS"""
@@ -11,4 +15,103 @@ def get_default_image_folder():
     elif platform.system() == "Darwin":  # macOS
         return os.path.join(home_dir, "Documents", "MarkdownImages")
     else:  # Linux and others
-        return os.path.join(home_dir, "Documents", "MarkdownImages")
\ No newline at end of file
+        return os.path.join(home_dir, "Documents", "MarkdownImages")
+
+def get_app_data_dir(*subdirs):
+    """Get (and create) the per-user data folder used for indexes and caches"""
+    home_dir = os.path.expanduser("~")
+    
+    if platform.system() == "Windows":
+        base = os.environ.get("APPDATA", os.path.join(home_dir, "AppData", "Roaming"))
+    elif platform.system() == "Darwin":  # macOS
+        base = os.path.join(home_dir, "Library", "Application Support")
+    else:  # Linux and others
+        base = os.environ.get("XDG_DATA_HOME", os.path.join(home_dir, ".local", "share"))
+    
+    path = os.path.join(base, "MyApp", "Markdown Editor", *subdirs)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def get_available_memory():
+    """Return available system memory in bytes, or None if it cannot be determined"""
+    try:
+        with open("/proc/meminfo", "r") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def get_process_rss(pid=None, include_children=True):
+    """Resident set size in bytes of a process and its descendants, or None where it
+    cannot be measured (Windows)"""
+    pid = pid or os.getpid()
+    if not os.path.isdir("/proc/self"):
+        return get_process_rss_from_ps(pid, include_children) if os.name == 'posix' else None
+    try:
+        with open(f"/proc/{pid}/status", "r") as file:
+            rss = next(int(line.split()[1]) * 1024 for line in file if line.startswith("VmRSS:"))
+    except (OSError, StopIteration):
+        return None
+    if include_children:
+        for child in child_pids(pid):
+            rss += get_process_rss(child) or 0
+    return rss
+
+def get_process_rss_from_ps(pid, include_children=True):
+    """get_process_rss for systems without /proc (macOS), from one ps listing of all processes"""
+    try:
+        output = subprocess.run(['ps', '-A', '-o', 'pid=,ppid=,rss='], capture_output=True,
+                                text=True, timeout=5).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    sizes = {}
+    children = {}
+    for line in output.splitlines():
+        try:
+            process, parent, rss = (int(field) for field in line.split())
+        except ValueError:
+            continue
+        sizes[process] = rss * 1024
+        children.setdefault(parent, []).append(process)
+    if pid not in sizes:
+        return None
+    total = 0
+    stack = [pid]
+    while stack:
+        process = stack.pop()
+        total += sizes.get(process, 0)
+        if include_children:
+            stack.extend(children.get(process, ()))
+    return total
+
+def child_pids(pid):
+    children = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children", "r") as file:
+                children.extend(int(child) for child in file.read().split())
+    except OSError:
+        pass
+    return children
+
+def iter_markdown_files(root):
+    """Yield (path, stat_result) for every markdown file below root"""
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue  # Skip .git, .venv and other hidden folders
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.lower().endswith(MARKDOWN_EXTENSIONS):
+                            yield entry.path, entry.stat()
+                    except OSError:
+                        continue
+        except OSError:
+            continue